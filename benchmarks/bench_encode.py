@@ -0,0 +1,96 @@
+"""
+Compare the encode profiles in zodiac_ffmpeg.ENCODE_PROFILES on the template.
+
+    python benchmarks/bench_encode.py                                # template.mp4, ffmpeg and stream-copy
+    python benchmarks/bench_encode.py --synthetic 10 --seconds 120   # synthetic 10 s template
+    python benchmarks/bench_encode.py --backends moviepy --profiles fast-draft publish
+    python benchmarks/bench_encode.py --synthetic 10 --overlay                 # with and without sign cards
+
+For each profile and backend it renders the template looped under a synthetic
+narration and reports wall time, CPU time, encode fps (output frames per wall second),
+output size and average bitrate. stream-copy is reported cold, including the one-off
+mezzanine encode, and warm, which is the daily cost once the mezzanine is cached.
+With --overlay every render is repeated with a synthetic horoscope's sign cards drawn
+over it, to compare overlay throughput with the plain re-encode.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+def cpu_seconds():
+    """CPU time of this process plus finished children (ffmpeg runs as a child process)."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def synthetic_document(audio):
+    """A full English horoscope, with audio split into matching header, sign and footer segments."""
+    from zodiac_document import HoroscopeDocument, SignEntry, SIGNS, HEADERS, FOOTERS
+    body = ("Today brings steady progress at work and a calm mood at home. Avoid hasty decisions "
+            "in money matters and spend time with family. ") * 3
+    blocks = len(SIGNS) + 2
+    bounds = [round(len(audio.samples) * index / blocks) for index in range(blocks + 1)]
+    audio.segments = list(zip(bounds, bounds[1:]))
+    return HoroscopeDocument('en-in', HEADERS['en-in'], [SignEntry(sign, sign, body.strip()) for sign in SIGNS],
+                             FOOTERS['en-in'])
+
+def render(render_video, audio, backend, profile, template, speed, document=None):
+    wall, cpu = time.perf_counter(), cpu_seconds()
+    video_buffer = render_video(audio, backend=backend, speed=speed, video_path=template, profile=profile,
+                                document=document)
+    return time.perf_counter() - wall, cpu_seconds() - cpu, video_buffer.getbuffer().nbytes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark encode profiles on the template.")
+    parser.add_argument('--template', default=os.path.join(BENCH_DIR, '..', 'template.mp4'))
+    parser.add_argument('--synthetic', type=float, help='Use a synthetic template of this many seconds instead')
+    parser.add_argument('--size', default='1280x720', help='Synthetic template frame size')
+    parser.add_argument('--seconds', type=float, default=90, help='Narration length before the speed change')
+    parser.add_argument('--speed', type=float, default=None, help='Speed factor (default: zodiac_video.SPEED_FACTOR)')
+    parser.add_argument('--profiles', nargs='+', default=None)
+    parser.add_argument('--backends', nargs='+', default=['ffmpeg', 'stream-copy'])
+    parser.add_argument('--overlay', action='store_true', help='Also render every case with sign cards drawn over it')
+    args = parser.parse_args()
+
+    # A private cache so stream-copy's cold run really encodes the mezzanine
+    work_dir = tempfile.mkdtemp(prefix='zodiac-encode-')
+    os.environ['ZODIAC_CACHE_DIR'] = os.path.join(work_dir, 'cache')
+    os.environ.setdefault('ZODIAC_LOG_LEVEL', 'WARNING')
+
+    # Imported after the environment is set: zodiac_cache reads ZODIAC_CACHE_DIR on import
+    from bench_time_stretch import SAMPLE_RATE, synthetic_narration  # noqa: E402
+    from zodiac_audio import NarrationAudio  # noqa: E402
+    from zodiac_ffmpeg import ENCODE_PROFILES, get_video_fps, probe_media, run_ffmpeg  # noqa: E402
+    from zodiac_video import render_video, SPEED_FACTOR  # noqa: E402
+
+    try:
+        template = args.template
+        if args.synthetic:
+            template = os.path.join(work_dir, 'template.mp4')
+            run_ffmpeg(['-f', 'lavfi', '-i', f'testsrc2=size={args.size}:rate=30', '-t', str(args.synthetic),
+                        '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p', template])
+        fps = get_video_fps(probe_media(template))
+        speed = args.speed or SPEED_FACTOR
+        audio = NarrationAudio.concatenate([synthetic_narration(args.seconds)], SAMPLE_RATE)
+        documents = [None, synthetic_document(audio)] if args.overlay else [None]
+        output_seconds = audio.duration / speed
+        frames = output_seconds * fps
+        print(f"Template: {template} at {fps:.2f} fps; output {output_seconds:.1f}s ({frames:.0f} frames)")
+
+        print(f"\n{'profile':<12}{'backend':<28}{'wall s':>9}{'cpu s':>9}{'enc fps':>10}{'size MB':>10}{'kbps':>9}")
+        for name in args.profiles or list(ENCODE_PROFILES):
+            profile = ENCODE_PROFILES[name]
+            for backend in args.backends:
+                for document in documents:
+                    for label in (['cold', 'warm'] if backend == 'stream-copy' else [None]):
+                        wall, cpu, size = render(render_video, audio, backend, profile, template, speed, document)
+                        column = backend + (f" ({label})" if label else '') + (' + overlay' if document else '')
+                        print(f"{name:<12}{column:<28}{wall:>9.2f}{cpu:>9.2f}{frames / wall:>10.1f}"
+                              f"{size / (1024 * 1024):>10.2f}{size * 8 / output_seconds / 1000:>9.0f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
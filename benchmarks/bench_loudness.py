@@ -0,0 +1,79 @@
+"""
+Compare narration mastering in zodiac_dsp with the old normalize, boost and clip path.
+
+    python benchmarks/bench_loudness.py                        # synthetic 3 and 12 minute narrations
+    python benchmarks/bench_loudness.py --input tts.mp3        # a real gTTS narration
+    python benchmarks/bench_loudness.py --block-sizes 4096 65536 1048576
+
+For each path it reports wall time, CPU time, peak traced memory (numpy allocations
+through tracemalloc, on top of the input) and the part of it beyond the output array,
+integrated loudness against the target,
+true peak (4x oversampled) and the share of samples sitting at full scale. Each block
+size of zodiac_dsp.master is listed separately to show memory tracking the block size
+rather than the narration length.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('ZODIAC_LOG_LEVEL', 'WARNING')
+
+from bench_time_stretch import SAMPLE_RATE, cpu_seconds, synthetic_narration  # noqa: E402
+from zodiac_audio import NarrationAudio  # noqa: E402
+from zodiac_dsp import DSP_BLOCK_SIZE, LOUDNESS_TARGET_LUFS, integrated_loudness, master  # noqa: E402
+
+def legacy(samples, sample_rate):
+    """The path master() replaced: librosa.util.normalize, a 2x boost and a hard clip."""
+    y = samples / np.max(np.abs(samples))
+    return np.clip(y * 2.0, -1.0, 1.0).astype(np.float32, copy=False)
+
+def true_peak_db(samples):
+    from scipy.signal import resample_poly
+    return 20 * np.log10(np.max(np.abs(resample_poly(samples, 4, 1))) + 1e-12)
+
+def measure(process, samples, sample_rate):
+    tracemalloc.start()
+    wall, cpu = time.perf_counter(), cpu_seconds()
+    output = process(samples, sample_rate)
+    wall, cpu = time.perf_counter() - wall, cpu_seconds() - cpu
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output, wall, cpu, peak
+
+def run(label, samples, sample_rate, block_sizes, repeats):
+    print(f"\n{label}: {len(samples) / sample_rate:.1f}s at {sample_rate} Hz, "
+          f"input {integrated_loudness(samples, sample_rate):.1f} LUFS, target {LOUDNESS_TARGET_LUFS:.1f} LUFS")
+    print(f"{'path':<26}{'wall s':>9}{'cpu s':>9}{'peak MB':>10}{'extra MB':>10}{'LUFS':>8}{'dBTP':>8}{'at FS %':>9}")
+    paths = [('legacy normalize+clip', legacy)]
+    for block_size in block_sizes:
+        paths.append((f"master block={block_size}", lambda y, sr, b=block_size: master(y, sr, block_size=b)))
+    paths.append(("master+compress", lambda y, sr: master(y, sr, compress=True)))
+    for name, process in paths:
+        runs = [measure(process, samples, sample_rate) for _ in range(repeats)]
+        output, wall, cpu, peak = min(runs, key=lambda result: result[1])
+        at_full_scale = np.mean(np.abs(output) >= 0.999) * 100
+        extra = peak - output.nbytes
+        print(f"{name:<26}{wall:>9.3f}{cpu:>9.3f}{peak / (1024 * 1024):>10.1f}{extra / (1024 * 1024):>10.1f}"
+              f"{integrated_loudness(output, sample_rate):>8.1f}{true_peak_db(output):>8.2f}{at_full_scale:>9.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark narration mastering against normalize+clip.")
+    parser.add_argument('--input', help='Audio file to master instead of the synthetic narrations')
+    parser.add_argument('--minutes', type=float, nargs='+', default=[3, 12])
+    parser.add_argument('--block-sizes', type=int, nargs='+', default=[8192, DSP_BLOCK_SIZE])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'rb') as f:
+            audio = NarrationAudio.from_bytes(f.read())
+        run(args.input, audio.samples, audio.sample_rate, args.block_sizes, args.repeats)
+    else:
+        for minutes in args.minutes:
+            run(f"synthetic {minutes:g} min", synthetic_narration(minutes * 60), SAMPLE_RATE,
+                args.block_sizes, args.repeats)
@@ -0,0 +1,234 @@
+"""
+Benchmark the pipeline stages offline, against the local fakes in benchmarks/fakes.py.
+
+    python benchmarks/bench_pipeline.py                              # 10 s and 60 s templates, ta
+    python benchmarks/bench_pipeline.py --templates 5 30 --backend ffmpeg --lang en-in
+    python benchmarks/bench_pipeline.py --gemini-latency 0 --tts-latency 0  # pipeline cost only
+
+Measured entry points are zodiac_text.main, zodiac_audio.main, zodiac_video.main and
+upload_youtube.upload_video. Each main includes the stages it calls (audio runs text,
+video runs audio), as it does in production. Every measurement runs in a fresh process,
+so peak RSS is per stage, shown next to the RSS after imports. CPU time includes ffmpeg
+children; their memory does not, since Linux carries the parent's high-water mark across
+fork and exec and rusage cannot separate the two. Video stages run once per synthetic template; the first run with an empty
+cache is reported as cold (it pays for the mezzanine encode).
+
+Each run is appended to benchmarks/results/pipeline.jsonl with the git commit, and the
+table shows the change against the latest earlier commit benchmarked with the same settings.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCH_DIR, '..')
+RESULTS_PATH = os.path.join(BENCH_DIR, 'results', 'pipeline.jsonl')
+LANG_CODES = {'ta': 0, 'en-in': 1, 'hi': 2}
+
+def cpu_seconds():
+    """CPU time of this process plus finished children (ffmpeg runs as a child process)."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def make_template(path, seconds, size, fps):
+    """Encode a synthetic template like the channel's: H.264, yuv420p, no audio."""
+    from zodiac_ffmpeg import run_ffmpeg
+    run_ffmpeg([
+        '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate={fps}',
+        '-t', str(seconds),
+        '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+        path,
+    ])
+
+def run_stage(stage, config):
+    """Run one stage in this (fresh) process and return its measurements."""
+    sys.path.insert(0, REPO_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    os.environ['ZODIAC_CACHE_DIR'] = config['cache_dir']
+    os.environ['ZODIAC_NO_CACHE'] = '1'
+    os.environ['ZODIAC_TIME_STRETCH'] = config['time_stretch']
+    # No zodiac_quota budgets against the fakes: the rate limits would time the waits rather
+    # than the pipeline, and two templates x 3 uploads of 1650 units spend the daily YouTube quota
+    for limit in ('ZODIAC_GEMINI_RPM', 'ZODIAC_GEMINI_TPM', 'ZODIAC_GEMINI_RPD', 'ZODIAC_TTS_RPM',
+                  'ZODIAC_YOUTUBE_UNITS_PER_DAY'):
+        os.environ[limit] = '0'
+
+    import fakes
+    for name, value in config['latency'].items():
+        setattr(fakes.latency, name, value)
+    fakes.install(sign_chars=config['sign_chars'])
+
+    import zodiac_text
+    import zodiac_audio
+    import zodiac_video
+    from upload_youtube import upload_video, PLAYLIST_ID
+
+    lang_code = LANG_CODES[config['lang']]
+    if stage == 'text':
+        call = lambda: zodiac_text.main(config['lang'])
+    elif stage == 'audio':
+        call = lambda: zodiac_audio.main(lang_code)
+    elif stage == 'video':
+        zodiac_video.TEMPLATE_PATH = config['template']
+        call = lambda: zodiac_video.main(lang_code, backend=config['backend'])
+    elif stage == 'upload':
+        youtube = fakes.FakeYouTube()
+        call = lambda: upload_video(youtube, 'Benchmark', 'Benchmark upload', '[]', PLAYLIST_ID, config['video'])
+    else:
+        raise ValueError(f"Unknown stage: {stage}")
+
+    # ru_maxrss is in KB on Linux
+    import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    wall, cpu = time.perf_counter(), cpu_seconds()
+    result = call()
+    wall, cpu = time.perf_counter() - wall, cpu_seconds() - cpu
+
+    if stage == 'video':
+        with open(config['video'], 'wb') as f:
+            f.write(result.getbuffer())
+    return {
+        'wall': wall,
+        'cpu': cpu,
+        'import_rss_mb': import_rss,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def _child(stage, config, queue):
+    # Keep the table readable: the pipeline's own INFO logging goes to the child's log file
+    with open(config['log'], 'a', encoding='utf-8') as log:
+        sys.stdout = log
+        try:
+            queue.put(('ok', run_stage(stage, config)))
+        except Exception as e:
+            queue.put(('error', f"{type(e).__name__}: {e}"))
+
+def measure(stage, config):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(stage, config, queue))
+    process.start()
+    status, value = queue.get()
+    process.join()
+    if status != 'ok':
+        raise RuntimeError(f"{stage} failed: {value} (see {config['log']})")
+    return value
+
+def summarize(label, stage, runs):
+    warm = runs[1:] or runs
+    return {
+        'stage': stage,
+        'template': label,
+        'cold_wall': runs[0]['wall'],
+        'wall': statistics.median(run['wall'] for run in warm),
+        'cpu': statistics.median(run['cpu'] for run in warm),
+        'import_rss_mb': max(run['import_rss_mb'] for run in runs),
+        'peak_rss_mb': max(run['peak_rss_mb'] for run in runs),
+    }
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def previous_record(settings, commit):
+    """The latest recorded run with the same settings from a different commit, if any."""
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['settings'] == settings and record['commit'] != commit:
+                previous = record
+    return previous
+
+def print_table(results, previous):
+    baseline = {(row['stage'], row['template']): row for row in previous['results']} if previous else {}
+    if previous:
+        print(f"\nChange is against {previous['commit']} ({previous['date']})")
+    print(f"\n{'stage':<8}{'template':<10}{'cold s':>9}{'wall s':>9}{'cpu s':>9}{'import MB':>11}{'peak MB':>9}{'change':>9}")
+    for row in results:
+        before = baseline.get((row['stage'], row['template']))
+        change = f"{(row['wall'] / before['wall'] - 1) * 100:+.0f}%" if before and before['wall'] else ''
+        print(f"{row['stage']:<8}{row['template']:<10}{row['cold_wall']:>9.2f}{row['wall']:>9.2f}{row['cpu']:>9.2f}"
+              f"{row['import_rss_mb']:>11.0f}{row['peak_rss_mb']:>9.0f}{change:>9}")
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+    from fakes import FakeLatency
+
+    parser = argparse.ArgumentParser(description="Benchmark the zodiac pipeline stages offline.")
+    parser.add_argument('--lang', default='ta', choices=list(LANG_CODES))
+    parser.add_argument('--templates', type=float, nargs='+', default=[10, 60], help='Synthetic template lengths in seconds')
+    parser.add_argument('--size', default='1280x720', help='Template frame size')
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--backend', default='stream-copy', help='zodiac_video render backend')
+    parser.add_argument('--time-stretch', default='atempo', help='ZODIAC_TIME_STRETCH engine (used by the moviepy backend)')
+    parser.add_argument('--sign-chars', type=int, default=400, help='Characters of fake horoscope text per sign')
+    parser.add_argument('--gemini-latency', type=float, default=FakeLatency.gemini)
+    parser.add_argument('--tts-latency', type=float, default=FakeLatency.tts_request)
+    parser.add_argument('--youtube-latency', type=float, default=FakeLatency.youtube_chunk, help='Seconds per upload request')
+    parser.add_argument('--youtube-mbps', type=float, default=FakeLatency.youtube_mbps)
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per stage; the first video run is cold')
+    parser.add_argument('--stages', nargs='+', default=['text', 'audio', 'video', 'upload'])
+    parser.add_argument('--no-record', action='store_true', help="Don't append this run to the results file")
+    args = parser.parse_args()
+
+    latency = asdict(FakeLatency(gemini=args.gemini_latency, tts_request=args.tts_latency,
+                                 youtube_chunk=args.youtube_latency, youtube_mbps=args.youtube_mbps))
+    settings = {
+        'lang': args.lang, 'templates': args.templates, 'size': args.size, 'fps': args.fps,
+        'backend': args.backend, 'time_stretch': args.time_stretch, 'sign_chars': args.sign_chars,
+        'latency': latency, 'repeats': args.repeats, 'stages': args.stages,
+    }
+    work_dir = tempfile.mkdtemp(prefix='zodiac-bench-')
+    base = dict(settings, cache_dir=os.path.join(work_dir, 'cache'), log=os.path.join(work_dir, 'pipeline.log'))
+    print(f"Working directory: {work_dir} (pipeline log: {base['log']})")
+
+    results = []
+    try:
+        for stage in [stage for stage in ('text', 'audio') if stage in args.stages]:
+            print(f"Running {stage} x{args.repeats}")
+            results.append(summarize('-', stage, [measure(stage, base) for _ in range(args.repeats)]))
+
+        for seconds in args.templates:
+            label = f"{seconds:g}s"
+            config = dict(base, template=os.path.join(work_dir, f"template-{label}.mp4"),
+                          video=os.path.join(work_dir, f"output-{label}.mp4"))
+            make_template(config['template'], seconds, args.size, args.fps)
+            if 'video' in args.stages or 'upload' in args.stages:
+                print(f"Running video x{args.repeats} on the {label} template")
+                runs = [measure('video', config) for _ in range(args.repeats)]
+                if 'video' in args.stages:
+                    results.append(summarize(label, 'video', runs))
+            if 'upload' in args.stages:
+                print(f"Running upload x{args.repeats} of the {label} render ({os.path.getsize(config['video'])} bytes)")
+                results.append(summarize(label, 'upload', [measure('upload', config) for _ in range(args.repeats)]))
+
+        commit = git_commit()
+        print_table(results, previous_record(settings, commit))
+        if not args.no_record:
+            os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+            with open(RESULTS_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'commit': commit, 'date': datetime.now().isoformat(timespec='seconds'),
+                                    'settings': settings, 'results': results}) + '\n')
+            print(f"\nRecorded in {RESULTS_PATH}")
+    except Exception:
+        print(f"Benchmark failed; keeping {work_dir} for inspection")
+        raise
+    shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,90 @@
+"""
+Guard the import cost of the CLI entry points with `python -X importtime`.
+
+    python benchmarks/bench_startup.py              # check every entry point against its budget
+    python benchmarks/bench_startup.py --scale 2    # slower machine: double every budget
+    python benchmarks/bench_startup.py --top 15     # show more of the heaviest imports
+
+Each module is imported in a fresh interpreter several times; the median cumulative
+import time must stay within its budget, and none of the heavy SDKs below may be loaded
+just by importing it (they belong inside the code paths that use them). Exits 1 if
+any entry point is over budget or imports a forbidden module, so CI can run it as a check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Median cumulative import time allowed per entry point, in milliseconds
+BUDGETS_MS = {
+    'zodiac_text': 150,
+    'zodiac_audio': 300,
+    'zodiac_video': 350,
+    'zodiac_shorts': 350,
+    'upload_youtube': 150,
+    'zodiac_pipeline': 400,
+    'zodiac_daemon': 400,
+    'zodiac_scheduler': 400,
+}
+
+# Multi-hundred-millisecond imports that must stay lazy
+FORBIDDEN_AT_IMPORT = ['moviepy', 'librosa', 'google.generativeai', 'googleapiclient',
+                       'google_auth_oauthlib', 'gtts', 'soundfile']
+
+def import_times(module):
+    """Run one fresh import and return {module name: (self us, cumulative us)}."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def loaded_modules(module):
+    code = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check entry point import times against their budgets.")
+    parser.add_argument('--modules', nargs='+', default=list(BUDGETS_MS))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every budget, for slower machines')
+    parser.add_argument('--top', type=int, default=5, help='Heaviest imports (self time) to list per entry point')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'entry point':<18}{'median ms':>11}{'budget ms':>11}  status")
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeats)]
+        median_ms = statistics.median(run[module][1] for run in runs) / 1000
+        budget_ms = BUDGETS_MS.get(module, max(BUDGETS_MS.values())) * args.scale
+        loaded = loaded_modules(module)
+        forbidden = [heavy for heavy in FORBIDDEN_AT_IMPORT
+                     if any(name == heavy or name.startswith(heavy + '.') for name in loaded)]
+        status = 'ok'
+        if median_ms > budget_ms:
+            status = 'OVER BUDGET'
+            failures.append(module)
+        if forbidden:
+            status = f"imports {', '.join(forbidden)}"
+            failures.append(module)
+        print(f"{module:<18}{median_ms:>11.1f}{budget_ms:>11.0f}  {status}")
+
+        heaviest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+        for name, (self_us, _) in heaviest:
+            print(f"{'':<20}{self_us / 1000:>7.1f} ms  {name}")
+
+    if failures:
+        print(f"\nStartup check failed for: {', '.join(dict.fromkeys(failures))}")
+        sys.exit(1)
+    print("\nAll entry points within budget")
@@ -0,0 +1,87 @@
+"""
+Compare the time-stretch engines in zodiac_video.change_audio_speed on narration-length audio.
+
+    python benchmarks/bench_time_stretch.py                  # synthetic 3 and 6 minute narrations
+    python benchmarks/bench_time_stretch.py --input tts.mp3  # a real gTTS narration
+
+For each engine it reports wall time, CPU time, duration error against the ideal
+stretched length, and the log-spectral distance between the long-term spectra of the
+input and output (lower is better; pitch-preserving stretches keep it small).
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from zodiac_audio import NarrationAudio  # noqa: E402
+from zodiac_video import TIME_STRETCH_ENGINES, SPEED_FACTOR  # noqa: E402
+
+SAMPLE_RATE = 24000
+
+def synthetic_narration(seconds, sample_rate=SAMPLE_RATE, seed=0):
+    """Speech-like test signal: gliding harmonic voice with syllable-rate gating and noise bursts."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = 150 + 50 * np.sin(2 * np.pi * 0.3 * t) + 20 * np.sin(2 * np.pi * 2.1 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 0.5
+    pauses = (np.sin(2 * np.pi * 0.2 * t) > -0.8).astype(np.float32)
+    noise = rng.standard_normal(len(t)) * 0.05 * (np.sin(2 * np.pi * 1.3 * t) > 0.9)
+    y = (voice * syllables * pauses + noise).astype(np.float32)
+    return y / np.max(np.abs(y)) * 0.8
+
+def cpu_seconds():
+    """CPU time of this process plus finished children (ffmpeg runs as a child process)."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def long_term_spectrum(y, n_fft=2048):
+    frames = len(y) // n_fft
+    blocks = y[:frames * n_fft].reshape(frames, n_fft) * np.hanning(n_fft)
+    return np.mean(np.abs(np.fft.rfft(blocks, axis=1)) ** 2, axis=0) + 1e-12
+
+def log_spectral_distance(reference, candidate):
+    diff = 10 * np.log10(long_term_spectrum(reference)) - 10 * np.log10(long_term_spectrum(candidate))
+    return float(np.sqrt(np.mean(diff ** 2)))
+
+def run(label, audio_bytes, speed, repeats):
+    audio = NarrationAudio.from_bytes(audio_bytes)
+    reference, sr = audio.samples, audio.sample_rate
+    expected = len(reference) / sr / speed
+    print(f"\n{label}: {len(reference) / sr:.1f}s at {sr} Hz, speed {speed}x -> expect {expected:.2f}s")
+    print(f"{'engine':<16}{'wall s':>10}{'cpu s':>10}{'x realtime':>12}{'dur err ms':>12}{'LSD dB':>10}")
+    for name, engine in TIME_STRETCH_ENGINES.items():
+        walls, cpus = [], []
+        for _ in range(repeats):
+            wall, cpu = time.perf_counter(), cpu_seconds()
+            stretched = engine(reference, sr, speed)
+            walls.append(time.perf_counter() - wall)
+            cpus.append(cpu_seconds() - cpu)
+        wall = min(walls)
+        duration_error = (len(stretched) / sr - expected) * 1000
+        print(f"{name:<16}{wall:>10.2f}{min(cpus):>10.2f}{expected / wall:>12.1f}{duration_error:>12.1f}"
+              f"{log_spectral_distance(reference, stretched):>10.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark time-stretch engines.")
+    parser.add_argument('--input', help='Audio file to stretch instead of synthetic narrations')
+    parser.add_argument('--minutes', type=float, nargs='+', default=[3, 6], help='Synthetic narration lengths')
+    parser.add_argument('--speed', type=float, default=SPEED_FACTOR)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'rb') as f:
+            run(args.input, f.read(), args.speed, args.repeats)
+    else:
+        for minutes in args.minutes:
+            buffer = io.BytesIO()
+            sf.write(buffer, synthetic_narration(minutes * 60), SAMPLE_RATE, format='WAV')
+            run(f"synthetic {minutes:g} min", buffer.getvalue(), args.speed, args.repeats)
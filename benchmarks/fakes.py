@@ -0,0 +1,197 @@
+"""
+Local stand-ins for Gemini, gTTS and the YouTube Data API, for benchmarks that must run offline.
+
+Each fake replays responses shaped like the real service's (a 12-sign horoscope, JSON
+metadata, 24 kHz MP3 narration, resumable upload chunks) after a configurable latency,
+so the pipeline's own cost can be measured without network access or API keys.
+install() routes zodiac_text and zodiac_audio to them; pass FakeYouTube() to upload_video.
+"""
+import asyncio
+import io
+import json
+import re
+import sys
+import time
+import types
+from dataclasses import dataclass
+
+import soundfile as sf
+
+SIGNS = {
+    'en': ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 'Libra', 'Scorpio',
+           'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'],
+    'ta': ['மேஷம்', 'ரிஷபம்', 'மிதுனம்', 'கடகம்', 'சிம்மம்', 'கன்னி', 'துலாம்', 'விருச்சிகம்',
+           'தனுசு', 'மகரம்', 'கும்பம்', 'மீனம்'],
+    'hi': ['मेष', 'वृषभ', 'मिथुन', 'कर्क', 'सिंह', 'कन्या', 'तुला', 'वृश्चिक', 'धनु', 'मकर', 'कुंभ', 'मीन'],
+}
+
+FILLER = ("Today brings steady progress at work and a calm mood at home. "
+          "A pending payment of ₹14588 may arrive by evening. "
+          "Avoid hasty decisions in money matters and spend time with family. ")
+
+@dataclass
+class FakeLatency:
+    """Simulated service latencies in seconds; TTS and upload also scale with payload size."""
+    gemini: float = 1.5
+    tts_request: float = 0.3
+    tts_chars_per_second: float = 15.0
+    youtube_chunk: float = 0.2
+    youtube_mbps: float = 50.0
+
+latency = FakeLatency()
+
+def horoscope_text(prompt, sign_chars=400):
+    """A response in the shape the horoscope prompts ask for: title line, 12 signs, closing line."""
+    first = re.search(r"first line with be ['\"](.+?)['\"]\n", prompt)
+    last = re.search(r"last line will be ['\"](.+?)['\"]\n", prompt)
+    lang = 'ta' if 'Tamil' in prompt else 'hi' if 'Hindi' in prompt else 'en'
+    summary = (FILLER * (sign_chars // len(FILLER) + 1))[:sign_chars].rsplit(' ', 1)[0] + '.'
+    lines = [first.group(1) if first else "Today's horoscope results:"]
+    lines += [f"{sign}: {summary}" for sign in SIGNS[lang]]
+    lines.append(last.group(1) if last else 'To know daily horoscope results do like, share, subscribe and comment.')
+    return '\n'.join(lines)
+
+def metadata_response(prompt, generation_config):
+    """Title, description or tags, or all three as JSON when the config asks for JSON."""
+    title = "🔮 Today's Zodiac Results ✨ Daily Horoscope for All 12 Signs"
+    description = "Your daily horoscope for every sign.\n\n" + ' '.join(f"#zodiac{i}" for i in range(50))
+    tags = ["zodiac", "horoscope", "astrology", "rasipalan", "rashifal", "daily", "today"]
+    if (generation_config or {}).get('response_mime_type') == 'application/json':
+        return json.dumps({'title': title, 'description': description, 'tags': tags}, ensure_ascii=False)
+    if 'tags' in prompt and 'formatted like' in prompt:
+        return json.dumps(tags)
+    if 'description' in prompt:
+        return description
+    return title
+
+class FakeGeminiResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeGeminiModel:
+    """Answers generate_content/generate_content_async like genai.GenerativeModel."""
+
+    def __init__(self, generation_config=None, sign_chars=400):
+        self.generation_config = generation_config
+        self.sign_chars = sign_chars
+        self.calls = 0
+
+    def _respond(self, prompt):
+        self.calls += 1
+        if 'Zodiac Result summaries' in prompt:
+            return FakeGeminiResponse(horoscope_text(prompt, self.sign_chars))
+        return FakeGeminiResponse(metadata_response(prompt, self.generation_config))
+
+    def generate_content(self, prompt, request_options=None):
+        time.sleep(latency.gemini)
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(latency.gemini)
+        return self._respond(prompt)
+
+def fake_mp3(seconds, sample_rate=24000):
+    """Speech-like mono MP3, the format gTTS returns."""
+    # Imported here: bench_time_stretch pulls in the zodiac modules, which only the
+    # measured process should load
+    from bench_time_stretch import synthetic_narration
+    buffer = io.BytesIO()
+    sf.write(buffer, synthetic_narration(max(seconds, 0.1), sample_rate), sample_rate, format='MP3')
+    return buffer.getvalue()
+
+class FakeTTS:
+    """Drop-in for gtts.gTTS; speech length follows the text length like real narration."""
+
+    def __init__(self, text, lang='en', tld='com', slow=False):
+        self.text = text
+        self.seconds = len(text) / latency.tts_chars_per_second * (1.5 if slow else 1.0)
+
+    def write_to_fp(self, fp):
+        time.sleep(latency.tts_request)
+        fp.write(fake_mp3(self.seconds))
+
+class FakeUploadStatus:
+    def __init__(self, progress):
+        self._progress = progress
+
+    def progress(self):
+        return self._progress
+
+class FakeInsertRequest:
+    """Resumable videos().insert request; each next_chunk() reads one chunk from the media body."""
+
+    def __init__(self, media_body):
+        self.media_body = media_body
+        self.resumable_uri = None
+        self.resumable_progress = 0
+
+    def next_chunk(self, num_retries=0):
+        if self.resumable_uri is None:
+            time.sleep(latency.youtube_chunk)
+            self.resumable_uri = f"https://upload.example.invalid/session/{id(self)}"
+        size = self.media_body.size()
+        chunk = self.media_body.getbytes(self.resumable_progress, self.media_body.chunksize())
+        time.sleep(latency.youtube_chunk + len(chunk) * 8 / (latency.youtube_mbps * 1e6))
+        self.resumable_progress += len(chunk)
+        if self.resumable_progress >= size:
+            return None, {'id': f"fake{self.resumable_progress:08x}"}
+        return FakeUploadStatus(self.resumable_progress / size), None
+
+class FakeExecute:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self, num_retries=0):
+        time.sleep(latency.youtube_chunk)
+        return self.response
+
+class FakeVideos:
+    def insert(self, part, body, media_body):
+        return FakeInsertRequest(media_body)
+
+class FakePlaylistItems:
+    def insert(self, part, body):
+        return FakeExecute({'id': 'fake-playlist-item', 'snippet': body['snippet']})
+
+class FakeBatch:
+    """new_batch_http_request(): every added request answered in one round trip."""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        time.sleep(latency.youtube_chunk)
+        for request_id, request in self.requests:
+            self.callback(request_id, request.response, None)
+
+class FakeYouTube:
+    """The subset of the YouTube Data API v3 client used by upload_youtube."""
+
+    def videos(self):
+        return FakeVideos()
+
+    def playlistItems(self):
+        return FakePlaylistItems()
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(callback)
+
+def install(sign_chars=400):
+    """Route zodiac_text's Gemini models and zodiac_audio's gTTS to the fakes."""
+    import zodiac_text
+
+    models = {}
+
+    def get_model(generation_config=None, model_name=zodiac_text.GEMINI_MODEL_NAME):
+        key = zodiac_text.make_key(model_name, generation_config or zodiac_text.GENERATION_CONFIG)
+        if key not in models:
+            models[key] = FakeGeminiModel(generation_config, sign_chars)
+        return models[key]
+
+    zodiac_text.get_model = get_model
+    # zodiac_audio imports gtts lazily, so the fake is installed as the module itself
+    sys.modules['gtts'] = types.SimpleNamespace(gTTS=FakeTTS)
@@ -1,38 +1,30 @@
-import base64
 import os
+from upload_youtube import load_credentials, TOKEN_FILE
 
-def encode_pickle_to_base64():
+def export_token_json():
     try:
-        # Read the youtube_token.pickle file in binary mode
-        with open('youtube_token.pickle', 'rb') as f:
-            pickle_data = f.read()
-        
-        # Encode to base64
-        base64_data = base64.b64encode(pickle_data)
-        
-        # Convert to string
-        base64_string = base64_data.decode('utf-8')
-        
+        # Read youtube_token.json, converting an older youtube_token.pickle first
+        credentials = load_credentials()
+        if credentials is None:
+            raise FileNotFoundError(TOKEN_FILE)
+        token_json = credentials.to_json()
+
         # Print instructions
-        print("\n=== YOUTUBE_TOKEN.PICKLE ENCODED SUCCESSFULLY ===")
+        print(f"\n=== {TOKEN_FILE.upper()} READY ===")
         print("\nFollow these steps to add to GitHub Secrets:")
         print("1. Go to your GitHub repository")
         print("2. Click Settings > Secrets and variables > Actions")
         print("3. Click 'New repository secret'")
-        print("4. Name: YOUTUBE_TOKEN_PICKLE")
-        print("5. Value: (copy the encoded string below)")
-        print("\n=== ENCODED STRING (copy everything below this line) ===")
-        print(base64_string)
-        print("=== END OF ENCODED STRING ===\n")
-        
-        # Also save to a file as backup
-        with open('youtube_token.pickle.base64.txt', 'w') as f:
-            f.write(base64_string)
-        print("Backup saved to youtube_token.pickle.base64.txt")
-        
+        print("4. Name: YOUTUBE_TOKEN_JSON")
+        print("5. Value: (copy the JSON below)")
+        print("\n=== TOKEN JSON (copy everything below this line) ===")
+        print(token_json)
+        print("=== END OF TOKEN JSON ===\n")
+        print("Once the secret works, delete YOUTUBE_TOKEN_BASE64 and youtube_token.pickle.")
+
     except FileNotFoundError:
-        print("Error: youtube_token.pickle file not found!")
-        print("Make sure youtube_token.pickle is in the same directory as this script.")
+        print(f"Error: neither {TOKEN_FILE} nor youtube_token.pickle was found!")
+        print("Run upload_youtube.py once to sign in, or copy the token into this directory.")
         print("\nCurrent directory contents:")
         for file in os.listdir('.'):
             if 'token' in file.lower() or 'pickle' in file.lower():
@@ -41,4 +33,4 @@ def encode_pickle_to_base64():
         print(f"Error: {str(e)}")
 
 if __name__ == "__main__":
-    encode_pickle_to_base64() 
\ No newline at end of file
+    export_token_json()
@@ -0,0 +1,56 @@
+import json
+
+from googleapiclient.http import HttpMockSequence, HttpRequest
+from googleapiclient.model import JsonModel
+
+import upload_youtube
+import zodiac_quota
+
+class FakeVideos:
+    def __init__(self, http):
+        self.http = http
+
+    def insert(self, part, body, media_body):
+        return HttpRequest(self.http, JsonModel().response, 'https://youtube.example.invalid/upload/videos',
+                           method='POST', body=json.dumps(body), resumable=media_body)
+
+class FakeYouTube:
+    def __init__(self, responses):
+        self.http = HttpMockSequence(responses)
+
+    def videos(self):
+        return FakeVideos(self.http)
+
+def saved_upload(monkeypatch, tmp_path, size=1000):
+    monkeypatch.setitem(zodiac_quota.BUDGETS, 'youtube', zodiac_quota.ServiceBudget('youtube'))
+    video_path = str(tmp_path / 'video.mp4')
+    with open(video_path, 'wb') as f:
+        f.write(b'v' * size)
+    upload_youtube.save_upload_session(video_path, 'https://youtube.example.invalid/session/1')
+    return video_path
+
+def test_resume_sends_only_the_bytes_youtube_is_missing(monkeypatch, tmp_path):
+    video_path = saved_upload(monkeypatch, tmp_path)
+    youtube = FakeYouTube([
+        ({'status': '308', 'range': 'bytes=0-599'}, ''),
+        ({'status': '200'}, json.dumps({'id': 'resumed'})),
+    ])
+    assert upload_youtube.upload_video(youtube, 'Title', 'Description', '[]', None, video_path) == 'resumed'
+    query, chunk = youtube.http.request_sequence
+    assert query[3]['Content-Range'] == 'bytes */1000'
+    assert chunk[3]['Content-Range'] == 'bytes 600-999/1000'
+
+def test_resume_of_an_upload_that_already_finished(monkeypatch, tmp_path):
+    video_path = saved_upload(monkeypatch, tmp_path)
+    youtube = FakeYouTube([({'status': '201'}, json.dumps({'id': 'finished'}))])
+    assert upload_youtube.upload_video(youtube, 'Title', 'Description', '[]', None, video_path) == 'finished'
+
+def test_expired_session_starts_a_new_upload(monkeypatch, tmp_path):
+    video_path = saved_upload(monkeypatch, tmp_path)
+    youtube = FakeYouTube([
+        ({'status': '404'}, ''),
+        ({'status': '200', 'location': 'https://youtube.example.invalid/session/2'}, ''),
+        ({'status': '200'}, json.dumps({'id': 'restarted'})),
+    ])
+    assert upload_youtube.upload_video(youtube, 'Title', 'Description', '[]', None, video_path) == 'restarted'
+    assert youtube.http.request_sequence[2][3]['Content-Range'] == 'bytes 0-999/1000'
@@ -0,0 +1,40 @@
+import os
+
+import zodiac_cache
+from zodiac_cache import DiskCache
+
+def entries(cache):
+    return sorted(name for _, _, names in os.walk(cache.directory) for name in names)
+
+def test_set_evicts_at_most_once_per_interval(monkeypatch, tmp_path):
+    cache = DiskCache('test', max_bytes=1000, root=str(tmp_path))
+    walks = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda: walks.append(1) or evict())
+    for index in range(20):
+        cache.set(f"{index:02d}key", b'x')
+    assert len(walks) == 1
+
+    monkeypatch.setattr(zodiac_cache, 'EVICT_INTERVAL', 0)
+    cache.set('20key', b'x')
+    assert len(walks) == 2
+
+def test_large_writes_still_keep_the_cache_under_max_bytes(tmp_path):
+    cache = DiskCache('test', max_bytes=300, root=str(tmp_path))
+    for index in range(10):
+        cache.set(f"{index:02d}key", b'x' * 100)
+    assert sum(os.path.getsize(os.path.join(cache.directory, name[:2], name)) for name in entries(cache)) <= 300
+
+def test_evict_tolerates_entries_expired_by_another_process(monkeypatch, tmp_path):
+    cache = DiskCache('test', max_bytes=1000, ttl_seconds=0, root=str(tmp_path))
+    cache.evict()
+    cache.set('00key', b'x')
+    assert entries(cache) == ['00key']
+    unlink = os.unlink
+
+    def unlink_twice(path):
+        unlink(path)
+        unlink(path)
+    monkeypatch.setattr(os, 'unlink', unlink_twice)
+    cache.evict()
+    assert entries(cache) == []
@@ -0,0 +1,52 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import zodiac_daemon
+
+@pytest.fixture
+def server():
+    # Never warmed or started: submitted jobs are only validated and queued
+    daemon = zodiac_daemon.ZodiacDaemon(workers=1, upload=False)
+    server = ThreadingHTTPServer((zodiac_daemon.DAEMON_HOST, 0), zodiac_daemon.DaemonRequestHandler)
+    server.zodiac = daemon
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    daemon.close()
+
+def post(server, payload):
+    request = urllib.request.Request(f"http://{zodiac_daemon.DAEMON_HOST}:{server.server_address[1]}/jobs",
+                                     data=json.dumps(payload).encode('utf-8'), method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+@pytest.mark.parametrize('payload', [
+    {'langs': 5},
+    {'langs': [['en']]},
+    {'langs': []},
+    {'backend': []},
+    {'profile': {'name': 'publish'}},
+    {'date': 20261017},
+    {'date': 'tomorrow'},
+    [],
+])
+def test_malformed_jobs_are_rejected_with_400(server, payload):
+    status, body = post(server, dict(payload, upload=False) if isinstance(payload, dict) else payload)
+    assert status == 400
+    assert body['error']
+
+def test_valid_job_is_queued(server):
+    status, body = post(server, {'langs': 'ta', 'date': '2026-10-20', 'upload': False})
+    assert status == 202
+    assert body['status'] == 'queued'
+    assert body['langs'] == ['ta']
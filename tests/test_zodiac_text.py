@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import zodiac_quota
+import zodiac_text
+from zodiac_cache import DiskCache
+
+class LoopBoundModel:
+    """Like the SDK's model: its async client belongs to the event loop of its first call."""
+
+    def __init__(self):
+        self.loop = None
+
+    async def generate_content_async(self, prompt):
+        loop = asyncio.get_running_loop()
+        self.loop = self.loop or loop
+        if loop is not self.loop:
+            raise RuntimeError('Event loop is closed')
+        return type('Response', (), {'text': f"answer to {prompt}"})()
+
+def install_model(monkeypatch, tmp_path):
+    model = LoopBoundModel()
+    monkeypatch.setattr(zodiac_text, 'get_model', lambda generation_config=None: model)
+    monkeypatch.setattr(zodiac_text, 'response_cache', DiskCache('gemini', max_bytes=1024 * 1024, root=str(tmp_path)))
+    monkeypatch.setitem(zodiac_quota.BUDGETS, 'gemini', zodiac_quota.ServiceBudget('gemini'))
+    return model
+
+def test_generate_many_twice_in_one_process(monkeypatch, tmp_path):
+    install_model(monkeypatch, tmp_path)
+    first = zodiac_text.generate_many(['a', 'b'], use_cache=False)
+    second = zodiac_text.generate_many(['c'], use_cache=False)
+    assert first == ['answer to a', 'answer to b']
+    assert second == ['answer to c']
+
+def test_generate_many_from_several_threads(monkeypatch, tmp_path):
+    install_model(monkeypatch, tmp_path)
+    results = {}
+
+    def run(name):
+        results[name] = zodiac_text.generate_many([name], use_cache=False)
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ('ta', 'en-in', 'hi')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {name: [f"answer to {name}"] for name in ('ta', 'en-in', 'hi')}
@@ -1,18 +1,16 @@
 import os
-import google_auth_oauthlib
-import googleapiclient.discovery
-import googleapiclient.errors
-import googleapiclient.http
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-import pickle
-import glob
-from zodiac_video import main as zodiac_video_main
-from zodiac_text import get_gemini_response
-import tempfile
-from datetime import datetime
-import ast
+from zodiac_artifacts import RunStore, json_serializer, hash_files
+from zodiac_cache import make_key
+from zodiac_telemetry import log_print, span, increment, propagate, write_metrics
+from zodiac_quota import budget, QuotaExceededError, YOUTUBE_UNITS
 import argparse
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
 
 # Add playlist modification scope
 SCOPES = [
@@ -22,170 +20,377 @@ SCOPES = [
 
 PLAYLIST_ID = "PLhv_6lhldIL6_-JayMXRAxaFtNIElnkEs"
 
-def log_print(level, message):
-    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} [{level}] {message}")
+# OAuth token store, in the JSON format google-auth reads and writes
+TOKEN_FILE = os.getenv('ZODIAC_YOUTUBE_TOKEN', 'youtube_token.json')
+# Older versions pickled the credentials here; converted to TOKEN_FILE on first load
+LEGACY_TOKEN_FILE = 'youtube_token.pickle'
+CLIENT_SECRETS_FILE = 'client.json'
+# Access tokens last an hour; refresh this long before expiry, off the critical path
+TOKEN_REFRESH_MARGIN = 10 * 60
+TOKEN_REFRESH_RETRY = 30
+HTTP_TIMEOUT = 120
 
-log_print("INFO", "=== Starting YouTube Upload Process ===")
-log_print("INFO", "Generating video metadata with Gemini AI")
+# One set of credentials, its refresher and the parsed discovery document per process
+_credentials_lock = threading.Lock()
+_token_refresher = None
+_discovery_lock = threading.Lock()
+_discovery_document = None
 
-def generate_title_description_tags(lang_code):
+# Resumable upload chunk size; must be a multiple of 256 KB
+UPLOAD_CHUNK_SIZE = int(os.getenv('ZODIAC_UPLOAD_CHUNK_MB', '8')) * 1024 * 1024
+UPLOAD_RETRIES = 5
+# YouTube keeps resumable sessions for about a week; don't try to reuse older ones
+UPLOAD_SESSION_MAX_AGE = 6 * 24 * 3600
+# Uploads running at once in upload_many; each holds its own HTTPS connection
+UPLOAD_CONCURRENCY = int(os.getenv('ZODIAC_UPLOAD_CONCURRENCY', '3'))
+# Playlist inserts sent per batched HTTP request (the YouTube API accepts up to 50)
+PLAYLIST_BATCH_SIZE = 50
+
+# Languages by lang_code, as used in zodiac_video and zodiac_audio
+METADATA_LANGUAGES = ['Tamil', 'English', 'Hindi']
+
+# JSON schema for the single structured metadata call
+METADATA_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["title", "description", "tags"],
+}
+
+def validate_metadata(metadata):
+    """Check a metadata response against METADATA_SCHEMA and return (title, description, tags)."""
+    if not isinstance(metadata, dict):
+        raise ValueError(f"Metadata must be an object, got {type(metadata).__name__}")
+    for field in METADATA_SCHEMA["required"]:
+        if field not in metadata:
+            raise ValueError(f"Metadata is missing '{field}'")
+    title, description, tags = metadata["title"], metadata["description"], metadata["tags"]
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("Metadata title must be a non-empty string")
+    if not isinstance(description, str) or not description.strip():
+        raise ValueError("Metadata description must be a non-empty string")
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError("Metadata tags must be a list of strings")
+    return title.strip(), description.strip(), tags
+
+def generate_metadata_structured(language, for_date=None):
+    """Generate title, description and tags in one schema-constrained Gemini call."""
+    log_print("INFO", "Requesting structured metadata (title, description, tags) in one call")
+    from zodiac_text import generate_json, dated_prompt
+    for_date = for_date or date.today()
+    metadata = generate_json(dated_prompt(f'''Create YouTube metadata for a video of the Zodiac Results in {language}. Return JSON with:
+- "title": one best catchy attractive youtube title in {language}. Include emojis.
+- "description": a best catchy attractive youtube description for that title, formatted with one line space between paragraphs, with 50 trending # tags like #tag1,... Use my channel link https://www.youtube.com/@rdrjsethurajan and the playlist link https://www.youtube.com/playlist?list={PLAYLIST_ID}
+- "tags": best trending viral youtube tags for that title. The sum of all tag lengths must be less than 500.''', for_date), METADATA_SCHEMA,
+                             for_date=for_date)
+    return validate_metadata(metadata)
+
+def parse_tags(text):
+    """Parse a tag list from free-form model output without evaluating it."""
     try:
-        lang_list = ['ta', 'en-in', 'hi']
-        if lang_code == 0:
-            language = 'Tamil'
-        elif lang_code == 1:
-            language = 'English'
-        elif lang_code == 2:
-            language = 'Hindi'
+        tags = json.loads(text)
+        if isinstance(tags, list):
+            return [str(tag) for tag in tags]
+    except ValueError:
+        pass
+    quoted = re.findall(r'["\']([^"\']+)["\']', text)
+    if quoted:
+        return quoted
+    return [tag.strip(' #[]') for tag in re.split(r'[,\n]', text)]
+
+def generate_metadata_concurrent(language, for_date=None):
+    """Fallback: request title, description and tags as three independent, concurrent calls."""
+    log_print("INFO", "Requesting title, description and tags concurrently")
+    from zodiac_text import generate_many, dated_prompt
+    for_date = for_date or date.today()
+    prompts = {
+        'title': f'''Give one best cautchy attractive youtube title on the Zodiac Results in {language}. Give only one title content no extra text. Include emojies.''',
+        'description': f'''Give a best cautchy attractive formatted with oneline space youtube description,
+    with 50 trending # tags in description like #tag1,... , for a video of the Zodiac Results in {language}. Use my channel link https://www.youtube.com/@rdrjsethurajan and the playlist link https://www.youtube.com/playlist?list={PLAYLIST_ID}. Give only the description, no extra text.''',
+        'tags': f'''Give a best trending viral youtube tags formatted like ["tag1", "tag2", ...] for a video of the Zodiac Results in {language}.
+    Give only tags content no extra text. Note that the sum of all tag length that is len(tag1)+len(tag2)+...etc. should be less than 500''',
+    }
+    results = dict(zip(prompts, generate_many([dated_prompt(prompt, for_date) for prompt in prompts.values()], for_date=for_date)))
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            raise result
+    return validate_metadata({
+        'title': results['title'],
+        'description': results['description'],
+        'tags': parse_tags(results['tags']),
+    })
+
+# Used when Gemini cannot produce metadata; never checkpointed, so the next run asks again
+STATIC_METADATA = (
+    "Today's Zodiac Horoscope Results - Daily Astrology Predictions",
+    "Get your daily zodiac horoscope predictions and astrology insights. #Zodiac #Horoscope #Astrology #Daily #Predictions",
+    ["Zodiac", "Horoscope", "Astrology", "Daily", "Predictions", "Rashifal"],
+)
+
+def get_tags_within_limit(strings_list, max_chars=499):
+    sublist = []
+    current_count = 0
+    for s in strings_list:
+        s = s.strip()
+        if not s or len(s) > 10:
+            continue  # skip empty or too-long tags
+        if current_count + len(s) <= max_chars:
+            sublist.append(s)
+            current_count += len(s)
+            log_print("DEBUG", "Tag characters so far: %d", current_count)
         else:
-            raise ValueError(f"Invalid language code: {lang_code}. Valid range: 0-{len(lang_list)-1}")
+            break
+    return str(sublist)  # return as str(sublist)
 
-        TITLE = get_gemini_response(f'''Give one best cautchy attractive youtube title on today's Zodiac Results in {language}. Give only one title content no extra text. Include emojies.''')
-        log_print("INFO", f"Generated title: {TITLE}")
-        
-        DESCRIPTION = get_gemini_response(f'''Give a best cautchy attractive formatted with oneline space youtube description,
-    with 50 trending # tags in description like #tag1,... , for {TITLE}. Use my channel link https://www.youtube.com/@rdrjsethurajan and the playlist link https://www.youtube.com/playlist?list={PLAYLIST_ID}''')
-        log_print("INFO", f"Generated description length: {len(DESCRIPTION)} characters")
-        log_print("INFO", f"Generated description: {DESCRIPTION}")
-        
-        # Focused set of relevant tags (staying within YouTube's 500 character limit)
-        TAGS = get_gemini_response(f'''Give a best trending viral youtube tags formatted like ["tag1", "tag2", ...] for {TITLE}.
-    Give only tags content no extra text. Note that the sum of all tag length that is len(tag1)+len(tag2)+...etc. should be less than 500''')
-        log_print("INFO", f"Generated tags: {TAGS}")
-        
+def generate_metadata(lang_code, for_date=None):
+    """
+    (TITLE, DESCRIPTION, TAGS) from Gemini: one structured call, or three concurrent
+    calls if that fails. Raises if neither works.
+    """
+    if lang_code < 0 or lang_code >= len(METADATA_LANGUAGES):
+        raise ValueError(f"Invalid language code: {lang_code}. Valid range: 0-{len(METADATA_LANGUAGES)-1}")
+    language = METADATA_LANGUAGES[lang_code]
+
+    try:
+        TITLE, DESCRIPTION, TAGS = generate_metadata_structured(language, for_date)
+    except QuotaExceededError:
+        raise
     except Exception as e:
-        log_print("ERROR", f"Error generating metadata: {str(e)}")
-        # Fallback metadata for zodiac content
-        TITLE = "Today's Zodiac Horoscope Results - Daily Astrology Predictions"
-        DESCRIPTION = "Get your daily zodiac horoscope predictions and astrology insights. #Zodiac #Horoscope #Astrology #Daily #Predictions"
-        TAGS = ["Zodiac", "Horoscope", "Astrology", "Daily", "Predictions", "Rashifal"]
-
-    def get_tags_within_limit(strings_list, max_chars=499):
-        sublist = []
-        current_count = 0
-        for s in strings_list:
-            s = s.strip()
-            if not s or len(s) > 10:
-                continue  # skip empty or too-long tags
-            if current_count + len(s) <= max_chars:
-                sublist.append(s)
-                current_count += len(s)
-                print(current_count, '\n')
-            else:
-                break
-        return str(sublist)  # return as str(sublist)
+        log_print("WARNING", f"Structured metadata call failed, falling back to concurrent calls: {str(e)}")
+        increment('metadata_fallbacks', to='concurrent')
+        TITLE, DESCRIPTION, TAGS = generate_metadata_concurrent(language, for_date)
+
+    log_print("INFO", f"Generated title: {TITLE}")
+    log_print("INFO", f"Generated description length: {len(DESCRIPTION)} characters")
+    log_print("INFO", f"Generated description: {DESCRIPTION}")
+    log_print("INFO", f"Generated tags: {TAGS}")
 
-    # Safely convert to list if TAGS is a string
-    if isinstance(TAGS, str):
-        TAGS = ast.literal_eval(TAGS)
     # Focused set of relevant tags (staying within YouTube's 500 character limit)
     TAGS = get_tags_within_limit(TAGS, 499)
-    print("INFO", f"Generated tags within limit: {TAGS}")
-    print("INFO", f"Type of TAGS: {type(TAGS)}")
-
+    log_print("INFO", f"Generated tags within limit: {TAGS}")
     return TITLE, DESCRIPTION, TAGS
 
-def authenticate_youtube():
-    """Authenticate with YouTube API using cached credentials if available."""
-    log_print("INFO", "=== Starting YouTube Authentication Process ===")
+def static_metadata(error):
+    log_print("ERROR", f"Error generating metadata: {str(error)}")
+    increment('metadata_fallbacks', to='static')
+    TITLE, DESCRIPTION, TAGS = STATIC_METADATA
+    return TITLE, DESCRIPTION, get_tags_within_limit(TAGS, 499)
+
+def generate_title_description_tags(lang_code, for_date=None):
+    """generate_metadata, or the static fallback metadata if Gemini fails."""
+    try:
+        return generate_metadata(lang_code, for_date)
+    except Exception as e:
+        return static_metadata(e)
+
+def load_credentials():
+    """
+    Read the stored YouTube credentials, or return None if there are none. A token
+    pickled by older versions is converted to the JSON store on first load.
+    """
+    from google.oauth2.credentials import Credentials
+    if os.path.exists(TOKEN_FILE):
+        with open(TOKEN_FILE, 'r', encoding='utf-8') as f:
+            return Credentials.from_authorized_user_info(json.load(f), SCOPES)
+    if os.path.exists(LEGACY_TOKEN_FILE):
+        log_print("WARNING", f"Converting {LEGACY_TOKEN_FILE} to {TOKEN_FILE}; delete the pickle once the JSON token works")
+        import pickle
+        with open(LEGACY_TOKEN_FILE, 'rb') as f:
+            credentials = pickle.load(f)
+        save_credentials(credentials)
+        return credentials
+    return None
+
+def save_credentials(credentials):
+    """Write the credentials to TOKEN_FILE as JSON, readable by this user only."""
+    temp_path = f"{TOKEN_FILE}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(credentials.to_json())
+    os.replace(temp_path, TOKEN_FILE)
+
+def authorize_interactively():
+    """Run the browser OAuth flow for new credentials with a refresh token, and store them."""
+    log_print("INFO", "No valid credentials found, starting new authentication")
     os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
-    credentials = None
-    token_file = 'youtube_token.pickle'
+    try:
+        # Load client secrets file
+        client_secrets_file = CLIENT_SECRETS_FILE
+        log_print("INFO", f"Loading client secrets from: {client_secrets_file}")
+        
+        if not os.path.exists(client_secrets_file):
+            log_print("ERROR", f"Client secrets file not found: {client_secrets_file}")
+            raise FileNotFoundError(f"Client secrets file not found: {client_secrets_file}")
+        
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        flow = InstalledAppFlow.from_client_secrets_file(
+            client_secrets_file, 
+            SCOPES,
+            redirect_uri='http://localhost:8080/'
+        )
+        
+        # Force offline access to get refresh token
+        flow.oauth2session.auto_refresh_url = flow.client_config['token_uri']
+        flow.oauth2session.auto_refresh_kwargs = {
+            'client_id': flow.client_config['client_id'],
+            'client_secret': flow.client_config['client_secret']
+        }
+        
+        log_print("INFO", "Starting OAuth2 authentication flow")
+        log_print("INFO", "Please follow the browser prompts to sign in.")
+        log_print("INFO", "Make sure to check 'Keep me signed in' if prompted.")
+        
+        credentials = flow.run_local_server(
+            port=8080,
+            prompt='consent',  # Force consent screen to ensure we get refresh token
+            authorization_prompt_message='Please authorize the application to access your YouTube account'
+        )
+        
+        # Verify we have a refresh token
+        if not credentials.refresh_token:
+            log_print("ERROR", "No refresh token received")
+            raise Exception("No refresh token received. Please try again and make sure to grant all requested permissions.")
+            
+        log_print("INFO", "Successfully obtained credentials with refresh token")
+        
+        # Save the complete credentials
+        save_credentials(credentials)
+        log_print("INFO", "Saved credentials to cache")
+        
+    except Exception as e:
+        log_print("ERROR", f"Authentication Error: {str(e)}")
+        if "redirect_uri_mismatch" in str(e):
+            log_print("ERROR", "Redirect URI mismatch detected")
+            log_print("INFO", "To fix the redirect URI mismatch:")
+            log_print("INFO", "1. Go to https://console.cloud.google.com")
+            log_print("INFO", "2. Select your project")
+            log_print("INFO", "3. Go to APIs & Services > Credentials")
+            log_print("INFO", "4. Edit your OAuth 2.0 Client ID")
+            log_print("INFO", "5. Add 'http://localhost:8080/' to Authorized redirect URIs")
+            log_print("INFO", "6. Save the changes")
+        raise
 
-    # Try to load cached credentials first
-    if os.path.exists(token_file):
-        log_print("INFO", "Found cached credentials file")
-        try:
-            with open(token_file, 'rb') as token:
-                credentials = pickle.load(token)
-                log_print("INFO", "Loaded cached credentials")
-                
-                # Check if credentials are valid or can be refreshed
-                if credentials and credentials.expired and credentials.refresh_token:
-                    try:
-                        log_print("INFO", "Refreshing expired credentials")
-                        credentials.refresh(Request())
-                        log_print("INFO", "Refreshed expired credentials")
-                        # Save the refreshed credentials
-                        with open(token_file, 'wb') as token:
-                            pickle.dump(credentials, token)
-                        log_print("INFO", "Saved refreshed credentials to cache")
-                    except Exception as e:
-                        log_print("ERROR", f"Could not refresh credentials: {str(e)}")
-                        credentials = None
-                elif not credentials or not credentials.valid:
-                    log_print("WARNING", "Cached credentials are invalid")
-                    credentials = None
-                else:
-                    log_print("INFO", "Cached credentials are valid")
-        except Exception as e:
-            log_print("ERROR", f"Error loading cached credentials: {str(e)}")
+    return credentials
+
+class TokenRefresher:
+    """
+    Keeps one set of credentials fresh from a background thread: the access token is
+    refreshed TOKEN_REFRESH_MARGIN before it expires and written back to the token
+    store, so uploads never wait on a refresh round trip. Refreshes reuse one pooled
+    HTTPS session to the token endpoint.
+    """
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self._session = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='youtube-token-refresh', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def seconds_left(self):
+        """Seconds until the access token expires; 0 when the expiry is unknown."""
+        if not self.credentials.token or not self.credentials.expiry:
+            return 0
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (self.credentials.expiry - now).total_seconds()
+
+    def refresh(self):
+        """Refresh unless another thread already did within the margin; raises if it fails."""
+        with self._lock:
+            if self.seconds_left() > TOKEN_REFRESH_MARGIN:
+                return
+            import requests
+            from google.auth.transport.requests import Request
+            self._session = self._session or requests.Session()
+            with span('youtube.token_refresh'):
+                self.credentials.refresh(Request(self._session))
+            save_credentials(self.credentials)
+            increment('youtube_token_refreshes')
+            log_print("INFO", f"Refreshed YouTube access token, valid until {self.credentials.expiry} UTC")
+
+    def ensure_fresh(self):
+        """Block until the access token is usable, refreshing now if the background refresh has not."""
+        if not self.credentials.valid:
+            self.refresh()
+
+    def _run(self):
+        while True:
+            wait = self.seconds_left() - TOKEN_REFRESH_MARGIN
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                log_print("WARNING", f"Could not refresh the YouTube token, retrying in {TOKEN_REFRESH_RETRY}s: {str(e)}")
+                self._wake.wait(TOKEN_REFRESH_RETRY)
+                self._wake.clear()
+
+def get_youtube_credentials():
+    """
+    Load the stored YouTube credentials, or authorize interactively when there are none,
+    and keep them fresh in the background. Every call in the process gets the same
+    Credentials; nothing here waits on the network once a token is stored.
+    """
+    global _token_refresher
+    with _credentials_lock:
+        if _token_refresher is None:
+            log_print("INFO", "=== Starting YouTube Authentication Process ===")
             credentials = None
+            try:
+                credentials = load_credentials()
+                if credentials:
+                    log_print("INFO", f"Loaded cached credentials from {TOKEN_FILE}")
+            except Exception as e:
+                log_print("ERROR", f"Error loading cached credentials: {str(e)}")
+            if not credentials or not credentials.refresh_token:
+                credentials = authorize_interactively()
+            _token_refresher = TokenRefresher(credentials).start()
+        return _token_refresher.credentials
 
-    # Only get new credentials if we don't have valid ones
-    if not credentials or not credentials.valid:
-        log_print("INFO", "No valid credentials found, starting new authentication")
-        try:
-            # Load client secrets file
-            client_secrets_file = "client.json"
-            log_print("INFO", f"Loading client secrets from: {client_secrets_file}")
-            
-            if not os.path.exists(client_secrets_file):
-                log_print("ERROR", f"Client secrets file not found: {client_secrets_file}")
-                raise FileNotFoundError(f"Client secrets file not found: {client_secrets_file}")
-            
-            flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
-                client_secrets_file, 
-                SCOPES,
-                redirect_uri='http://localhost:8080/'
-            )
-            
-            # Force offline access to get refresh token
-            flow.oauth2session.auto_refresh_url = flow.client_config['token_uri']
-            flow.oauth2session.auto_refresh_kwargs = {
-                'client_id': flow.client_config['client_id'],
-                'client_secret': flow.client_config['client_secret']
-            }
-            
-            log_print("INFO", "Starting OAuth2 authentication flow")
-            log_print("INFO", "Please follow the browser prompts to sign in.")
-            log_print("INFO", "Make sure to check 'Keep me signed in' if prompted.")
-            
-            credentials = flow.run_local_server(
-                port=8080,
-                prompt='consent',  # Force consent screen to ensure we get refresh token
-                authorization_prompt_message='Please authorize the application to access your YouTube account'
-            )
-            
-            # Verify we have a refresh token
-            if not credentials.refresh_token:
-                log_print("ERROR", "No refresh token received")
-                raise Exception("No refresh token received. Please try again and make sure to grant all requested permissions.")
-                
-            log_print("INFO", "Successfully obtained credentials with refresh token")
-            
-            # Save the complete credentials
-            with open(token_file, 'wb') as token:
-                pickle.dump(credentials, token)
-            log_print("INFO", "Saved credentials to cache")
-            
-        except Exception as e:
-            log_print("ERROR", f"Authentication Error: {str(e)}")
-            if "redirect_uri_mismatch" in str(e):
-                log_print("ERROR", "Redirect URI mismatch detected")
-                log_print("INFO", "To fix the redirect URI mismatch:")
-                log_print("INFO", "1. Go to https://console.cloud.google.com")
-                log_print("INFO", "2. Select your project")
-                log_print("INFO", "3. Go to APIs & Services > Credentials")
-                log_print("INFO", "4. Edit your OAuth 2.0 Client ID")
-                log_print("INFO", "5. Add 'http://localhost:8080/' to Authorized redirect URIs")
-                log_print("INFO", "6. Save the changes")
-            raise
+def ensure_fresh_credentials():
+    """Before the first upload byte: wait for a usable access token (see TokenRefresher)."""
+    if _token_refresher:
+        _token_refresher.ensure_fresh()
 
+def youtube_discovery_document():
+    """
+    The YouTube Data API discovery document, parsed once per process from the static
+    copy bundled with google-api-python-client; None if this version bundles none.
+    """
+    global _discovery_document
+    with _discovery_lock:
+        if _discovery_document is None:
+            from googleapiclient.discovery_cache import get_static_doc
+            document = get_static_doc('youtube', 'v3')
+            _discovery_document = json.loads(document) if document else False
+        return _discovery_document or None
+
+def build_youtube_service(credentials):
+    """
+    Build a YouTube API client on its own keep-alive HTTPS connection; each thread that
+    talks to the API needs its own. Reusing one client for a video's upload chunks and
+    playlist insert keeps them on that connection.
+    """
+    import googleapiclient.discovery
+    import google_auth_httplib2
+    import httplib2
     try:
         log_print("INFO", "Building YouTube service")
-        youtube = googleapiclient.discovery.build(
-            "youtube", "v3", credentials=credentials)
+        http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+        document = youtube_discovery_document()
+        if document:
+            youtube = googleapiclient.discovery.build_from_document(document, http=http)
+        else:
+            youtube = googleapiclient.discovery.build("youtube", "v3", http=http)
         log_print("INFO", "YouTube service built successfully")
         log_print("INFO", "=== YouTube Authentication Completed Successfully ===")
         return youtube
@@ -193,10 +398,88 @@ def authenticate_youtube():
         log_print("ERROR", f"Error building YouTube service: {str(e)}")
         raise
 
-def upload_video(youtube, TITLE, DESCRIPTION, TAGS, PLAYLIST_ID, video_buffer):
-    """Upload a video to YouTube with the given title and video buffer."""
+def authenticate_youtube():
+    """Authenticate with YouTube API using cached credentials if available."""
+    return build_youtube_service(get_youtube_credentials())
+
+def upload_session_path(video_path):
+    """Where the resumable session URI for an upload from video_path is persisted."""
+    return f"{video_path}.upload.json"
+
+def load_upload_session(video_path):
+    """Return a saved resumable session URI for this exact file, or None."""
+    state_path = upload_session_path(video_path)
+    if not os.path.exists(state_path):
+        return None
+    try:
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+        stat = os.stat(video_path)
+        if state.get('size') != stat.st_size or state.get('mtime') != stat.st_mtime:
+            log_print("INFO", "Saved upload session belongs to a different file version, starting a new one")
+            return None
+        if time.time() - state.get('created', 0) > UPLOAD_SESSION_MAX_AGE:
+            log_print("INFO", "Saved upload session is too old, starting a new one")
+            return None
+        return state['resumable_uri']
+    except Exception as e:
+        log_print("WARNING", f"Could not read saved upload session: {str(e)}")
+        return None
+
+def save_upload_session(video_path, resumable_uri):
+    stat = os.stat(video_path)
+    with open(upload_session_path(video_path), 'w') as f:
+        json.dump({'resumable_uri': resumable_uri, 'size': stat.st_size, 'mtime': stat.st_mtime,
+                   'created': time.time()}, f)
+
+def clear_upload_session(video_path):
+    if os.path.exists(upload_session_path(video_path)):
+        os.unlink(upload_session_path(video_path))
+
+def query_upload_session(request, resumable_uri, size):
+    """
+    Ask YouTube how much of a saved resumable upload it already has, with the empty PUT of
+    the resumable upload protocol. Returns (bytes received, None), (size, the uploaded
+    video) if the upload had already finished, or None if the session is no longer valid.
+    """
+    import googleapiclient.errors
+    resp, content = request.http.request(
+        resumable_uri, method='PUT', headers={'Content-Range': f'bytes */{size}', 'Content-Length': '0'})
+    if resp.status in (200, 201):
+        return size, request.postproc(resp, content)
+    if resp.status == 308:
+        # 'bytes=0-N' once any bytes have arrived
+        received = resp.get('range')
+        return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+    if resp.status in (404, 410):
+        return None
+    raise googleapiclient.errors.HttpError(resp, content, uri=resumable_uri)
+
+def playlist_item_body(playlist_id, video_id):
+    return {
+        "snippet": {
+            "playlistId": playlist_id,
+            "resourceId": {
+                "kind": "youtube#video",
+                "videoId": video_id
+            }
+        }
+    }
+
+def upload_video(youtube, TITLE, DESCRIPTION, TAGS, PLAYLIST_ID, video, publish_at=None):
+    """
+    Upload a video to YouTube with the given title.
+    video is a file path or a readable, seekable file object (an mmap or BytesIO); it is
+    streamed in UPLOAD_CHUNK_SIZE resumable chunks. For file paths the session URI is
+    saved next to the file, so an interrupted upload resumes from the last byte.
+    With PLAYLIST_ID None the video is not added to a playlist. With publish_at (an aware
+    datetime) the video stays private until YouTube publishes it at that time.
+    """
     log_print("INFO", "=== Starting Video Upload Process ===")
     log_print("INFO", f"Uploading video with title: {TITLE}")
+    import googleapiclient.errors
+    import googleapiclient.http
+    ensure_fresh_credentials()
     
     request_body = {
         "snippet": {
@@ -206,7 +489,7 @@ def upload_video(youtube, TITLE, DESCRIPTION, TAGS, PLAYLIST_ID, video_buffer):
            "tags": TAGS,
         },
         "status": {
-            "privacyStatus": "public",  # or "private"/"unlisted"
+            "privacyStatus": "private" if publish_at else "public",  # or "private"/"unlisted"
             # "selfDeclaredMadeForKids": False,  # Mandatory COPPA compliance
             "autoCaption": True  # Enable auto captions by default
         },
@@ -229,103 +512,329 @@ def upload_video(youtube, TITLE, DESCRIPTION, TAGS, PLAYLIST_ID, video_buffer):
         }
     }
 
-    log_print("INFO", "Creating temporary file from video buffer")
-    # Create a temporary file from the video buffer
-    with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_file:
-        temp_file.write(video_buffer.read())
-        temp_file_path = temp_file.name
-        log_print("INFO", f"Temporary file created: {temp_file_path}")
+    if publish_at:
+        # Scheduled videos must be private until YouTube publishes them
+        request_body["status"]["publishAt"] = publish_at.isoformat()
+        log_print("INFO", f"Scheduling the video to go public at {publish_at.isoformat()}")
+
+    video_path = os.fspath(video) if isinstance(video, (str, os.PathLike)) else None
+    if video_path:
+        log_print("INFO", f"Streaming upload from file: {video_path} ({os.path.getsize(video_path)} bytes)")
+        media_body = googleapiclient.http.MediaFileUpload(
+            video_path, mimetype='video/mp4', chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+    else:
+        log_print("INFO", "Streaming upload from file object")
+        media_body = googleapiclient.http.MediaIoBaseUpload(
+            video, mimetype='video/mp4', chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
 
     try:
+        resumable_uri = load_upload_session(video_path) if video_path else None
+        if not resumable_uri:
+            # Quota is charged when the upload session is created, not per chunk
+            budget('youtube').acquire(YOUTUBE_UNITS['videos.insert'])
+
         log_print("INFO", "Initiating YouTube upload request")
+        increment('youtube_requests', method='videos.insert')
         request = youtube.videos().insert(
             part="snippet,status",
             body=request_body,
-            media_body=googleapiclient.http.MediaFileUpload(temp_file_path, chunksize=-1, resumable=True)
+            media_body=media_body
         )
 
-        log_print("INFO", "Starting upload process")
-        response = None 
+        response = None
+        if resumable_uri:
+            resumed = query_upload_session(request, resumable_uri, media_body.size())
+            if resumed:
+                request.resumable_uri = resumable_uri
+                request.resumable_progress, response = resumed
+                log_print("INFO", f"Resuming previous upload session at byte {request.resumable_progress}")
+            else:
+                log_print("WARNING", "Saved upload session is no longer valid, restarting upload")
+                clear_upload_session(video_path)
+                budget('youtube').acquire(YOUTUBE_UNITS['videos.insert'])
+                resumable_uri = None
+
+        log_print("INFO", f"Starting upload process ({UPLOAD_CHUNK_SIZE // (1024 * 1024)} MB chunks)")
         while response is None:
-            status, response = request.next_chunk()
+            try:
+                sent_before = request.resumable_progress
+                with span('youtube.upload_chunk', offset=sent_before):
+                    status, response = request.next_chunk(num_retries=UPLOAD_RETRIES)
+                increment('upload_chunks')
+                if response is None:
+                    increment('upload_bytes', max(0, request.resumable_progress - sent_before))
+                else:
+                    increment('upload_bytes', max(0, media_body.size() - sent_before))
+            except googleapiclient.errors.HttpError as e:
+                if resumable_uri and e.resp.status in (404, 410):
+                    # The saved session expired on the server; start over with a fresh one
+                    log_print("WARNING", "Saved upload session is no longer valid, restarting upload")
+                    clear_upload_session(video_path)
+                    budget('youtube').acquire(YOUTUBE_UNITS['videos.insert'])
+                    resumable_uri = None
+                    request.resumable_uri = None
+                    request.resumable_progress = 0
+                    continue
+                raise
+            if video_path and request.resumable_uri and request.resumable_uri != resumable_uri:
+                resumable_uri = request.resumable_uri
+                save_upload_session(video_path, resumable_uri)
             if status:
                 progress = int(status.progress()*100)
                 log_print("INFO", f"Upload progress: {progress}%")
 
+        if video_path:
+            clear_upload_session(video_path)
         video_id = response['id']
         log_print("INFO", f"Video uploaded successfully with ID: {video_id}")
         
-        # Add to playlist
-        try:
-            youtube.playlistItems().insert(
-                part="snippet",
-                body={
-                    "snippet": {
-                        "playlistId": PLAYLIST_ID,
-                        "resourceId": {
-                            "kind": "youtube#video",
-                            "videoId": video_id
-                        }
-                    }
-                }
-            ).execute()
-            log_print("INFO", "Video added to playlist successfully!")
-            log_print("INFO", f"Playlist URL: https://www.youtube.com/playlist?list={PLAYLIST_ID}")
-        except Exception as e:
-            log_print("WARNING", f"Could not add video to playlist: {str(e)}")
+        # Add to playlist, unless the caller batches the playlist inserts (add_to_playlist_batch)
+        if PLAYLIST_ID:
+            try:
+                budget('youtube').acquire(YOUTUBE_UNITS['playlistItems.insert'])
+                increment('youtube_requests', method='playlistItems.insert')
+                youtube.playlistItems().insert(
+                    part="snippet",
+                    body=playlist_item_body(PLAYLIST_ID, video_id)
+                ).execute()
+                log_print("INFO", "Video added to playlist successfully!")
+                log_print("INFO", f"Playlist URL: https://www.youtube.com/playlist?list={PLAYLIST_ID}")
+            except Exception as e:
+                log_print("WARNING", f"Could not add video to playlist: {str(e)}")
+
+        return video_id
     
     finally:
-        # Clean up temporary file
-        log_print("INFO", "Cleaning up temporary file")
-        os.unlink(temp_file_path)
         log_print("INFO", "=== Video Upload Process Completed Successfully ===")
 
-if __name__ == "__main__":
-    try:
-        log_print("INFO", "=== Starting Complete Zodiac Video Upload Workflow ===")
+def metadata_stage(lang_code, store=None):
+    """
+    Generate (TITLE, DESCRIPTION, TAGS), checkpointed in the RunStore when one is given.
+    Only Gemini's metadata is checkpointed: when it fails the static fallback is
+    returned without completing the stage, so the next run tries Gemini again. A spent
+    daily quota is raised rather than papered over, so the scheduler can stop.
+    """
+    with span('metadata', lang_code=lang_code):
+        if not store:
+            return generate_title_description_tags(lang_code)
+        try:
+            metadata = store.checkpoint(
+                'metadata', make_key(lang_code, store.run_date.isoformat()),
+                lambda: dict(zip(('title', 'description', 'tags'), generate_metadata(lang_code, store.run_date))),
+                *json_serializer('metadata.json'))
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            return static_metadata(e)
+        return metadata['title'], metadata['description'], metadata['tags']
 
-        parser = argparse.ArgumentParser(description="Upload generated zodiac video to YouTube.")
-        parser.add_argument('--lang', type=str, default='ta', choices=['ta', 'en-in', 'hi'], help='Language code: ta for Tamil, en-in for English, hi for Hindi')
-        args = parser.parse_args()
-        lang_map = {'ta': 0, 'en-in': 1, 'hi': 2}
-        lang_code = lang_map.get(args.lang, 0)
+def upload_stage(youtube, video_path, metadata, store=None, playlist_id=PLAYLIST_ID, publish_at=None):
+    """
+    Upload the video and return its ID. With a RunStore, an upload that already
+    completed for this exact video and metadata is not repeated, even if it was
+    scheduled. With playlist_id None the playlist insert is left to playlist_stage;
+    publish_at schedules the video (see upload_video).
+    """
+    TITLE, DESCRIPTION, TAGS = metadata
+    with span('upload', bytes=os.path.getsize(video_path)):
+        if not store:
+            return upload_video(youtube, TITLE, DESCRIPTION, TAGS, playlist_id, video_path, publish_at)
+        video_hash = hash_files([video_path])
+        if store.completed('upload'):
+            # Uploaded with the static metadata, which is not checkpointed: never upload the same video twice
+            previous = json_serializer('upload.json')[1](store)
+            if previous.get('video_sha256') == video_hash:
+                log_print("INFO", f"[{store.lang}] This video was already uploaded as {previous['video_id']}")
+                return previous['video_id']
+        result = store.checkpoint(
+            'upload', make_key(video_hash, store.output_hash('metadata')),
+            lambda: {'video_id': upload_video(youtube, TITLE, DESCRIPTION, TAGS, playlist_id, video_path, publish_at),
+                     'publish_at': publish_at.isoformat() if publish_at else None, 'video_sha256': video_hash},
+            *json_serializer('upload.json'))
+        return result['video_id']
 
-        TITLE, DESCRIPTION, TAGS = generate_title_description_tags(lang_code)
+def add_to_playlist_batch(youtube, playlist_id, video_ids):
+    """
+    Add videos to the playlist with one batched HTTP request per PLAYLIST_BATCH_SIZE
+    videos. Returns {video_id: error or None}. YouTube can reject some inserts in a
+    batch with a conflict when they modify one playlist at once; those are retried
+    one at a time.
+    """
+    video_ids = list(dict.fromkeys(video_ids))
+    errors = {}
 
-        # Determine the video file name based on language
-        video_file_map = {
-            'ta': 'output_video.mp4',
-            'en-in': 'output_video_1.mp4',
-            'hi': 'output_video_2.mp4'
-        }
-        video_path = video_file_map.get(args.lang, 'output_video.mp4')
+    def on_response(request_id, response, exception):
+        errors[request_id] = exception
+
+    for start in range(0, len(video_ids), PLAYLIST_BATCH_SIZE):
+        chunk = video_ids[start:start + PLAYLIST_BATCH_SIZE]
+        batch = youtube.new_batch_http_request(callback=on_response)
+        budget('youtube').acquire(YOUTUBE_UNITS['playlistItems.insert'] * len(chunk))
+        for video_id in chunk:
+            batch.add(youtube.playlistItems().insert(part="snippet", body=playlist_item_body(playlist_id, video_id)),
+                      request_id=video_id)
+        increment('youtube_requests', method='batch')
+        try:
+            with span('youtube.playlist_batch', videos=len(chunk)):
+                batch.execute()
+        except Exception as e:
+            log_print("WARNING", f"Batched playlist insert failed: {str(e)}")
+            for video_id in chunk:
+                errors.setdefault(video_id, e)
+
+    for video_id in video_ids:
+        if video_id in errors and errors[video_id] is None:
+            continue
+        log_print("WARNING", f"Retrying playlist insert for {video_id}: {str(errors.get(video_id, 'no response'))}")
+        try:
+            budget('youtube').acquire(YOUTUBE_UNITS['playlistItems.insert'])
+            increment('youtube_requests', method='playlistItems.insert')
+            youtube.playlistItems().insert(
+                part="snippet", body=playlist_item_body(playlist_id, video_id)).execute(num_retries=UPLOAD_RETRIES)
+            errors[video_id] = None
+        except Exception as e:
+            errors[video_id] = e
+
+    for video_id in video_ids:
+        increment('playlist_inserts', status='failed' if errors[video_id] else 'added')
+    return {video_id: errors[video_id] for video_id in video_ids}
 
-        if not os.path.exists(video_path):
-            log_print("ERROR", f"Video file {video_path} does not exist!")
-            exit(1)
+def playlist_stage(youtube, uploads, playlist_id=PLAYLIST_ID):
+    """
+    Add uploaded videos to the playlist in one batch. uploads is [(store or None, video_id)];
+    videos whose store already recorded the insert are skipped, so a rerun never adds a
+    video twice. Returns {video_id: error or None}.
+    """
+    def key(store):
+        return make_key(store.output_hash('upload'), playlist_id)
 
-        with open(video_path, "rb") as f:
-            import io
-            video_buffer = io.BytesIO(f.read())
+    pending = [(store, video_id) for store, video_id in uploads
+               if not (store and store.completed('playlist', key(store)))]
+    errors = add_to_playlist_batch(youtube, playlist_id, [video_id for _, video_id in pending]) if pending else {}
+    for store, video_id in pending:
+        if store and not errors[video_id]:
+            store.checkpoint('playlist', key(store), lambda: {'playlist_id': playlist_id, 'video_id': video_id},
+                             *json_serializer('playlist.json'))
+    added = sum(1 for error in errors.values() if not error)
+    log_print("INFO", f"Added {added}/{len(errors)} videos to playlist {playlist_id}"
+                      f"{f' ({len(uploads) - len(pending)} already there)' if len(pending) < len(uploads) else ''}")
+    return {video_id: errors.get(video_id) for _, video_id in uploads}
 
-        log_print("INFO", "Video file loaded successfully!")
+@dataclass
+class UploadItem:
+    """One rendered video for upload_many. store, when given, checkpoints its upload and playlist insert."""
+    label: str
+    video_path: str
+    metadata: tuple
+    store: RunStore = None
 
-        # Authenticate once for all uploads
-        log_print("INFO", "Authenticating with YouTube")
-        youtube = authenticate_youtube()
+@dataclass
+class UploadResult:
+    label: str
+    video_path: str
+    video_id: str = None
+    error: Exception = None
+    playlist_error: Exception = None
 
-        # Upload the video
+def upload_many(credentials, items, playlist_id=PLAYLIST_ID, concurrency=UPLOAD_CONCURRENCY):
+    """
+    Upload several videos with one set of credentials, up to concurrency at once, then
+    add every uploaded video to the playlist in one batched request. A failed upload
+    or playlist insert is recorded in that video's UploadResult; it does not stop the
+    others. Returns an UploadResult per item, in order.
+    """
+    # httplib2 connections are not thread-safe: one service per upload thread
+    local = threading.local()
+
+    def upload_one(item):
+        result = UploadResult(item.label, item.video_path)
         try:
-            log_print("INFO", "Processing video for upload")
-            log_print("INFO", f"Generated title: {TITLE}")
-            upload_video(youtube, TITLE, DESCRIPTION, TAGS, PLAYLIST_ID, video_buffer)
-            log_print("INFO", "Successfully uploaded generated video")
+            if not hasattr(local, 'youtube'):
+                local.youtube = build_youtube_service(credentials)
+            result.video_id = upload_stage(local.youtube, item.video_path, item.metadata, item.store, playlist_id=None)
         except Exception as e:
-            log_print("ERROR", f"Error uploading video: {str(e)}")
+            result.error = e
+        return result
+
+    with span('upload.batch', videos=len(items), concurrency=concurrency):
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(items)))) as pool:
+            results = list(pool.map(propagate(upload_one), items))
 
-        log_print("INFO", "=== Complete Zodiac Video Upload Workflow Completed Successfully ===")
+        uploaded = [(item, result) for item, result in zip(items, results) if result.video_id]
+        if playlist_id and uploaded:
+            try:
+                errors = playlist_stage(build_youtube_service(credentials),
+                                        [(item.store, result.video_id) for item, result in uploaded], playlist_id)
+            except Exception as e:
+                log_print("ERROR", f"Could not add the uploads to playlist {playlist_id}: {str(e)}")
+                errors = {result.video_id: e for _, result in uploaded}
+            for _, result in uploaded:
+                result.playlist_error = errors[result.video_id]
+
+    for result in results:
+        if result.error:
+            log_print("ERROR", f"[{result.label}] {result.video_path}: upload failed: {str(result.error)}")
+        elif result.playlist_error:
+            log_print("WARNING", f"[{result.label}] {result.video_path}: uploaded as {result.video_id}, "
+                                 f"not added to the playlist: {str(result.playlist_error)}")
+        else:
+            log_print("INFO", f"[{result.label}] {result.video_path}: uploaded as {result.video_id}")
+    return results
+
+# Prefer today's checkpointed render; fall back to the file zodiac_video.py writes
+VIDEO_FILES = {
+    'ta': 'output_video.mp4',
+    'en-in': 'output_video_1.mp4',
+    'hi': 'output_video_2.mp4'
+}
+
+def upload_item(lang, lang_code):
+    """Today's metadata and rendered video for a language, or None if it has not been rendered."""
+    store = RunStore(lang)
+    video_path = store.path('video.mp4') if store.completed('video') else VIDEO_FILES[lang]
+    if not os.path.exists(video_path):
+        log_print("ERROR", f"[{lang}] Video file {video_path} does not exist!")
+        return None
+    log_print("INFO", f"[{lang}] Video file found: {video_path} ({os.path.getsize(video_path)} bytes)")
+    return UploadItem(lang, video_path, metadata_stage(lang_code, store), store)
+
+if __name__ == "__main__":
+    failed = False
+    try:
+        log_print("INFO", "=== Starting Complete Zodiac Video Upload Workflow ===")
+
+        parser = argparse.ArgumentParser(description="Upload generated zodiac videos to YouTube.")
+        parser.add_argument('--lang', type=str, default='ta', help="'all' or a comma separated list of: ta (Tamil), en-in (English), hi (Hindi)")
+        parser.add_argument('--concurrency', type=int, default=UPLOAD_CONCURRENCY, help='Videos uploaded at once (default: ZODIAC_UPLOAD_CONCURRENCY or 3)')
+        parser.add_argument('--no-cache', action='store_true', help="Bypass the Gemini response cache; metadata already checkpointed in today's run directory is still reused")
+        args = parser.parse_args()
+        if args.no_cache:
+            os.environ['ZODIAC_NO_CACHE'] = '1'
+        lang_map = {'ta': 0, 'en-in': 1, 'hi': 2}
+        langs = list(lang_map) if args.lang == 'all' else [lang.strip() for lang in args.lang.split(',')]
+        unknown = [lang for lang in langs if lang not in lang_map]
+        if unknown:
+            parser.error(f"Unsupported language(s): {', '.join(unknown)}")
+
+        # Metadata for every language at once, while the credentials load
+        with ThreadPoolExecutor(max_workers=len(langs)) as metadata_pool:
+            futures = [metadata_pool.submit(propagate(upload_item), lang, lang_map[lang]) for lang in langs]
+            log_print("INFO", "Authenticating with YouTube")
+            credentials = get_youtube_credentials()
+            items = [future.result() for future in futures]
+        failed = None in items
+        items = [item for item in items if item]
+
+        # One set of credentials for all uploads; the playlist inserts go out as one batch
+        results = upload_many(credentials, items, concurrency=args.concurrency)
+        failed = failed or any(result.error for result in results)
+        uploaded = sum(1 for result in results if result.video_id)
+        log_print("INFO", f"=== Complete Zodiac Video Upload Workflow Completed: {uploaded}/{len(langs)} uploaded ===")
 
     except Exception as e:
         log_print("ERROR", f"An error occurred in main workflow: {str(e)}")
         raise
-
+    finally:
+        write_metrics()
+    if failed:
+        exit(1)
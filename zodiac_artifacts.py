@@ -0,0 +1,142 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime, date
+from zodiac_telemetry import log_print, span
+
+# One directory per (date, language) holds every stage's output and a manifest
+RUNS_DIR = os.getenv('ZODIAC_RUNS_DIR', 'runs')
+
+# Pipeline stages in order. The speed change is fused into the render graph by the
+# ffmpeg backends, so it is checkpointed as part of 'video' rather than on its own
+STAGES = ['text', 'audio', 'video', 'shorts', 'metadata', 'upload', 'playlist']
+
+def hash_files(paths):
+    """Hash the contents of several files in order."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def run_directory(lang, run_date, root=None):
+    return os.path.join(root or RUNS_DIR, run_date.isoformat(), lang)
+
+def read_manifest(lang, run_date, root=None):
+    """A run directory's manifest, without creating the directory; empty if the run has not started."""
+    try:
+        with open(os.path.join(run_directory(lang, run_date, root), 'manifest.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'lang': lang, 'date': run_date.isoformat(), 'stages': {}}
+
+class RunStore:
+    """
+    Artifact store for one language on one date: runs/<date>/<lang>/.
+    Each stage's outputs are written next to manifest.json, which records for every
+    completed stage its input hash, output files, output hash and timings. A stage is
+    reused on the next run only if it completed with the same input hash. Downstream
+    stages use upstream output hashes as inputs, so a changed upstream result
+    invalidates everything after it, and a retry repeats only what actually failed.
+    """
+
+    def __init__(self, lang, run_date=None, root=None):
+        self.lang = lang
+        self.run_date = run_date or date.today()
+        self.directory = run_directory(lang, self.run_date, root)
+        self.manifest_path = os.path.join(self.directory, 'manifest.json')
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest = read_manifest(lang, self.run_date, root)
+
+    def _save_manifest(self):
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def stage(self, name):
+        return self.manifest['stages'].get(name)
+
+    def output_hash(self, name):
+        """Hash of a completed stage's outputs; downstream stages use it as their input hash."""
+        entry = self.stage(name)
+        return entry['output_hash'] if entry else None
+
+    def completed(self, name, input_hash=None):
+        entry = self.stage(name)
+        if not entry or entry.get('status') != 'complete':
+            return False
+        if input_hash is not None and entry.get('input_hash') != input_hash:
+            return False
+        return all(os.path.exists(self.path(filename)) for filename in entry['outputs'])
+
+    def reset(self):
+        """Forget every checkpoint so the next run starts from the first stage."""
+        with self._lock:
+            self.manifest['stages'] = {}
+            self._save_manifest()
+
+    def checkpoint(self, name, input_hash, produce, save, load):
+        """
+        Return the stage's value, from disk if it already completed with this input hash.
+        Otherwise produce() it, persist it with save(value, store) -> [filenames] and
+        record it in the manifest. load(store) reads a persisted value back.
+        """
+        if self.completed(name, input_hash):
+            log_print("INFO", f"[{self.lang}] Resuming: stage '{name}' already complete, loading from {self.directory}")
+            with span('checkpoint.load', stage=name, lang=self.lang):
+                return load(self)
+
+        log_print("INFO", f"[{self.lang}] Running stage '{name}'")
+        started_at = time.time()
+        started = time.monotonic()
+        value = produce()
+        with span('checkpoint.save', stage=name, lang=self.lang):
+            outputs = save(value, self)
+        seconds = time.monotonic() - started
+
+        with self._lock:
+            self.manifest['stages'][name] = {
+                'status': 'complete',
+                'input_hash': input_hash,
+                'outputs': outputs,
+                'output_hash': hash_files([self.path(filename) for filename in outputs]),
+                'started_at': datetime.fromtimestamp(started_at).isoformat(timespec='seconds'),
+                'seconds': round(seconds, 3),
+            }
+            self._save_manifest()
+        log_print("INFO", f"[{self.lang}] Stage '{name}' completed in {seconds:.1f}s")
+        return value
+
+# Serializers for the checkpoint() save/load callbacks
+
+def json_serializer(filename):
+    def save(value, store):
+        with open(store.path(filename), 'w', encoding='utf-8') as f:
+            json.dump(value, f, indent=2, ensure_ascii=False)
+        return [filename]
+
+    def load(store):
+        with open(store.path(filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return save, load
+
+def bytes_serializer(filename):
+    """For io.BytesIO values such as the rendered mp4."""
+    def save(value, store):
+        with open(store.path(filename), 'wb') as f:
+            f.write(value.getbuffer())
+        return [filename]
+
+    def load(store):
+        with open(store.path(filename), 'rb') as f:
+            return io.BytesIO(f.read())
+    return save, load
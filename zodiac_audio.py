@@ -1,79 +1,218 @@
 from zodiac_text import main as zodiac_text_main
-from gtts import gTTS
+from zodiac_ffmpeg import decode_audio
+from zodiac_cache import DiskCache, cache_enabled, make_key
+from zodiac_document import HoroscopeDocument, document_serializer, DOCUMENT_VERSION
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import io
-from datetime import datetime
+import os
+from dataclasses import dataclass, field
+from zodiac_telemetry import log_print, span, increment, propagate
+from zodiac_quota import budget
 
-def log_print(level, message):
-    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} [{level}] {message}")
+# Language mapping for zodiac text generation, by lang_code
+ZODIAC_LANGS = ['ta', 'en-in', 'hi']
+# Language mapping for gTTS (different format)
+GTTS_LANGS = ['ta', 'en', 'hi']
 
-def zodiac_reader(text, lang):
-    """Generate speech from text using gTTS."""
+TTS_TLD = 'co.in'
+# gTTS always returns 24 kHz mono MP3
+TTS_SAMPLE_RATE = 24000
+TTS_MAX_WORKERS = int(os.getenv('ZODIAC_TTS_WORKERS', '6'))
+TTS_BACKEND = 'gtts'
+# RunStore file of the text stage's HoroscopeDocument
+DOCUMENT_FILE = 'text.json'
+
+# Synthesized segments keyed by (text, lang, tld, slow, backend). Title and closing lines
+# recur every day, and same-day reruns replay every sign, so only new text reaches gTTS
+segment_cache = DiskCache(
+    'tts',
+    max_bytes=int(os.getenv('ZODIAC_TTS_CACHE_BYTES', str(200 * 1024 * 1024))),
+)
+
+@dataclass
+class NarrationAudio:
+    """
+    Decoded narration handed between the audio, speed and video stages.
+    Samples stay mono float32 in memory and are only encoded once, at the final mux.
+    segments holds the (start, end) sample range of each spoken block, in order; for a
+    HoroscopeDocument that is the header, one per sign in zodiac order, then the footer.
+    """
+    samples: np.ndarray
+    sample_rate: int
+    segments: list = field(default_factory=list)
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+
+    @classmethod
+    def concatenate(cls, parts, sample_rate):
+        """Join per-block sample arrays, recording where each block starts and ends."""
+        segments = []
+        start = 0
+        for part in parts:
+            segments.append((start, start + len(part)))
+            start += len(part)
+        samples = np.concatenate(parts).astype(np.float32, copy=False) if parts else np.zeros(0, np.float32)
+        return cls(samples, sample_rate, segments)
+
+    @classmethod
+    def from_bytes(cls, audio_bytes):
+        """Decode an encoded audio file (WAV, MP3, ...) held in memory."""
+        import soundfile as sf
+        y, sr = sf.read(io.BytesIO(audio_bytes), dtype='float32', always_2d=True)
+        samples = y.mean(axis=1)
+        return cls(samples, sr, [(0, len(samples))])
+
+    def pcm_bytes(self):
+        """Zero-copy view of the samples as raw f32le bytes, e.g. for an ffmpeg stdin pipe."""
+        return memoryview(np.ascontiguousarray(self.samples, dtype=np.float32)).cast('B')
+
+    def with_samples(self, samples):
+        """Return new audio with processed samples, rescaling segment boundaries to the new length."""
+        ratio = len(samples) / len(self.samples) if len(self.samples) else 1.0
+        segments = [(round(start * ratio), round(end * ratio)) for start, end in self.segments]
+        return NarrationAudio(samples, self.sample_rate, segments)
+
+def narration_serializer(filename):
+    """RunStore save/load callbacks that keep NarrationAudio lossless as .npz."""
+    def save(audio, store):
+        np.savez(store.path(filename), samples=audio.samples, sample_rate=audio.sample_rate,
+                 segments=np.asarray(audio.segments, dtype=np.int64).reshape(-1, 2))
+        return [filename]
+
+    def load(store):
+        with np.load(store.path(filename)) as data:
+            return NarrationAudio(data['samples'], int(data['sample_rate']),
+                                  [tuple(map(int, segment)) for segment in data['segments']])
+    return save, load
+
+def split_into_blocks(text):
+    """
+    Split formatted horoscope text into speakable blocks: the title line, one block per
+    sign (its title line plus the indented summary lines) and the closing line.
+    HoroscopeDocument.speech_blocks() gives the same blocks without re-scanning text.
+    """
+    blocks = []
+    for line in text.split('\n'):
+        if not line.strip():
+            continue
+        if line.startswith(' ') and blocks:
+            # Indented lines are the wrapped summary of the current sign
+            blocks[-1] = f"{blocks[-1]} {line.strip()}"
+        else:
+            blocks.append(line.strip())
+    return blocks
+
+def synthesize_block(text, lang, slow=False):
+    """Synthesize one block with gTTS and return the MP3 bytes, using the segment cache when possible."""
+    key = make_key(text, lang, TTS_TLD, slow, TTS_BACKEND)
+    use_cache = cache_enabled()
+    if use_cache:
+        cached = segment_cache.get(key)
+        if cached is not None:
+            return cached
+
+    # gtts pulls in requests and bs4; load it only when a block actually needs synthesizing
+    from gtts import gTTS
+    budget('tts').acquire()
+    with span('tts.request', lang=lang, chars=len(text)) as current:
+        tts = gTTS(text=text, lang=lang, tld=TTS_TLD, slow=slow)
+        block_buffer = io.BytesIO()
+        tts.write_to_fp(block_buffer)
+        segment = block_buffer.getvalue()
+        current.set(bytes=len(segment))
+    increment('tts_requests', backend=TTS_BACKEND)
+    increment('tts_bytes', len(segment), backend=TTS_BACKEND)
+
+    segment_cache.set(key, segment)
+    return segment
+
+def zodiac_reader(document, lang):
+    """
+    Generate speech with gTTS, one concurrent request per block. document is a
+    HoroscopeDocument, or formatted text that is split with split_into_blocks.
+    """
     log_print("INFO", "=== Starting Text-to-Speech Conversion ===")
     log_print("INFO", f"Language: {lang}")
-    log_print("INFO", f"Text length: {len(text)} characters")
     
     try:
-        log_print("INFO", "Initializing gTTS with specified parameters")
-        # Generate Tamil speech
-        tts = gTTS(text=text, lang=lang, tld='co.in', slow=False)
-        log_print("INFO", "gTTS object created successfully")
-        
-        # Save to bytes buffer instead of file
-        log_print("INFO", "Converting speech to audio buffer")
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
+        if isinstance(document, HoroscopeDocument):
+            blocks = document.speech_blocks()
+        else:
+            blocks = split_into_blocks(document)
+        log_print("INFO", f"Text length: {sum(len(block) for block in blocks)} characters")
+        workers = min(TTS_MAX_WORKERS, len(blocks)) or 1
+        log_print("INFO", f"Synthesizing {len(blocks)} blocks with {workers} workers")
+
+        with span('tts.synthesize', blocks=len(blocks), workers=workers), \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            segments = list(pool.map(propagate(lambda block: synthesize_block(block, lang)), blocks))
+        log_print("INFO", f"Synthesized {len(segments)} segments ({sum(len(segment) for segment in segments)} bytes of MP3), "
+                          f"segment cache hits: {segment_cache.hits}, misses: {segment_cache.misses}")
+
+        # Decode every segment to PCM at one rate and join on sample boundaries;
+        # byte-concatenating MP3s would leave frame-aligned gaps and clicks
+        log_print("INFO", "Stitching segments into one sample array")
+        with span('tts.decode', segments=len(segments)):
+            decoded = [decode_audio(segment, TTS_SAMPLE_RATE) for segment in segments]
+            audio = NarrationAudio.concatenate(decoded, TTS_SAMPLE_RATE)
         
-        buffer_size = len(audio_buffer.getvalue())
-        log_print("INFO", f"Audio buffer created successfully. Size: {buffer_size} bytes")
+        log_print("INFO", f"Narration audio created successfully. Samples: {len(audio.samples)}, duration: {audio.duration:.2f}s")
         log_print("INFO", "=== Text-to-Speech Conversion Completed Successfully ===")
         
-        return audio_buffer
+        return audio
         
     except Exception as e:
         log_print("ERROR", f"Error in text-to-speech conversion: {str(e)}")
         raise
 
-def main(lang_code):
-    """Main function to generate zodiac audio."""
+def main(lang_code, store=None):
+    """
+    Main function to generate zodiac audio.
+    With a RunStore, the text and audio stages are checkpointed and resumed from it.
+    """
     log_print("INFO", "=== Starting Zodiac Audio Generation Process ===")
     log_print("INFO", f"Language code received: {lang_code}")
     
-    # Language mapping for zodiac text generation
-    zodiac_langs = ['ta', 'en-in', 'hi']
-    
-    # Language mapping for gTTS (different format)
-    gtts_langs = ['ta', 'en', 'hi']
-    
-    if lang_code < 0 or lang_code >= len(zodiac_langs):
-        log_print("ERROR", f"Invalid language code: {lang_code}. Valid range: 0-{len(zodiac_langs)-1}")
+    if lang_code < 0 or lang_code >= len(ZODIAC_LANGS):
+        log_print("ERROR", f"Invalid language code: {lang_code}. Valid range: 0-{len(ZODIAC_LANGS)-1}")
         raise ValueError(f"Invalid language code: {lang_code}")
     
-    zodiac_lang = zodiac_langs[lang_code]
-    gtts_lang = gtts_langs[lang_code]
+    zodiac_lang = ZODIAC_LANGS[lang_code]
+    gtts_lang = GTTS_LANGS[lang_code]
     log_print("INFO", f"Selected zodiac language: {zodiac_lang} (code: {lang_code})")
     log_print("INFO", f"Selected gTTS language: {gtts_lang}")
     
     try:
         log_print("INFO", "Calling zodiac_text_main to generate zodiac content")
-        zodiac_text = zodiac_text_main(zodiac_lang)
-        
-        if not zodiac_text or zodiac_text.startswith("An error occurred"):
-            log_print("ERROR", "Failed to get zodiac text from zodiac_text_main")
-            raise Exception("Zodiac text generation failed")
+        if store:
+            document = store.checkpoint(
+                'text', make_key(zodiac_lang, store.run_date.isoformat(), DOCUMENT_VERSION),
+                lambda: zodiac_text_main(zodiac_lang, store.run_date), *document_serializer(DOCUMENT_FILE))
+        else:
+            document = zodiac_text_main(zodiac_lang)
         
-        log_print("INFO", "Zodiac text generated successfully")
-        log_print("DEBUG", f"Zodiac text preview: {zodiac_text[:100]}...")
+        log_print("INFO", f"Zodiac text generated successfully ({len(document.signs)} signs)")
+        log_print("DEBUG", "Zodiac text preview: %s...", document.to_text()[:100])
         
         # Generate audio from text using gTTS language code
-        audio_buffer = zodiac_reader(zodiac_text, gtts_lang)
+        with span('audio', lang=gtts_lang) as current:
+            if store:
+                audio = store.checkpoint(
+                    'audio', make_key(store.output_hash('text'), gtts_lang, TTS_TLD, TTS_BACKEND),
+                    lambda: zodiac_reader(document, gtts_lang), *narration_serializer('audio.npz'))
+            else:
+                audio = zodiac_reader(document, gtts_lang)
+            current.set(seconds_of_audio=round(audio.duration, 2))
         
         log_print("INFO", "=== Zodiac Audio Generation Completed Successfully ===")
-        return audio_buffer
+        return audio
         
     except Exception as e:
         log_print("ERROR", f"Error in main audio generation process: {str(e)}")
         raise
 
 # if __name__ == "__main__":
-#     main(0)
+#     main(0)
\ No newline at end of file
@@ -0,0 +1,123 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+from zodiac_telemetry import log_print, increment
+
+# Root for everything cached between runs (mezzanines, API responses, audio segments)
+CACHE_DIR = os.getenv('ZODIAC_CACHE_DIR', os.path.join('.cache', 'zodiac'))
+# set() walks the cache directory to evict at most this often, unless a tenth of
+# max_bytes has been written since the last walk
+EVICT_INTERVAL = 60
+
+def cache_enabled():
+    """Caches can be bypassed for a whole run with ZODIAC_NO_CACHE=1 (or --no-cache on the CLIs)."""
+    return os.getenv('ZODIAC_NO_CACHE', '') not in ('1', 'true', 'yes')
+
+def make_key(*parts):
+    """Build a stable content-addressed key from JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class DiskCache:
+    """
+    A small content-addressed byte cache on disk.
+    Entries expire after ttl_seconds, and once the cache grows past max_bytes the
+    least recently used entries are evicted (reads refresh an entry's mtime). Eviction
+    walks the whole directory, so set() only runs it on the first write, every
+    EVICT_INTERVAL seconds, or after a tenth of max_bytes has been written.
+    """
+
+    def __init__(self, name, max_bytes, ttl_seconds=None, root=None):
+        self.name = name
+        self.directory = os.path.join(root or CACHE_DIR, name)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._evicted_at = None
+        self._written = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return the cached bytes for key, or None on a miss or expired entry."""
+        path = self._path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if self.ttl_seconds is not None and age > self.ttl_seconds:
+                log_print("DEBUG", "[%s] Cache entry expired: %s", self.name, key[:12])
+                os.unlink(path)
+                raise FileNotFoundError(path)
+            with open(path, 'rb') as f:
+                value = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            increment('cache_misses', cache=self.name)
+            return None
+        with self._lock:
+            self.hits += 1
+        increment('cache_hits', cache=self.name)
+        increment('cache_read_bytes', len(value), cache=self.name)
+        log_print("DEBUG", "[%s] Cache hit: %s", self.name, key[:12])
+        return value
+
+    def set(self, key, value):
+        """Store bytes under key and, when due, evict old entries if the cache is over its size limit."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic rename so concurrent readers never see a partial entry
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(value)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._written += len(value)
+            due = (self._evicted_at is None or time.monotonic() - self._evicted_at >= EVICT_INTERVAL
+                   or self._written * 10 >= self.max_bytes)
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        with self._lock:
+            self._evicted_at = time.monotonic()
+            self._written = 0
+            entries = []
+            now = time.time()
+            for dirpath, _, filenames in os.walk(self.directory):
+                for filename in filenames:
+                    if filename.endswith('.tmp'):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if self.ttl_seconds is not None and now - stat.st_mtime > self.ttl_seconds:
+                        # Another process may have expired it first
+                        with contextlib.suppress(FileNotFoundError):
+                            os.unlink(path)
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            increment('cache_evictions', cache=self.name)
+            log_print("DEBUG", "[%s] Evicted entries down to %d bytes", self.name, total)
@@ -0,0 +1,390 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zodiac_pipeline import run_languages, render_threads, start_render_workers, LANGUAGES
+from zodiac_video import validate_video_file, RENDER_BACKENDS, TEMPLATE_PATH
+from zodiac_ffmpeg import prepare_template_mezzanine, probe_media, file_sha256, get_encode_profile, ENCODE_PROFILES
+from zodiac_artifacts import read_manifest, STAGES
+from zodiac_telemetry import log_print, span, increment, propagate, write_metrics
+import argparse
+import json
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+
+# A long-running process that keeps everything a run pays for at startup warm across
+# jobs: module imports, the Gemini model, the YouTube services, the probed template and
+# its mezzanine, and the render worker processes. Jobs are queued over a localhost HTTP
+# endpoint (or the submit command below, which uses it) and run one at a time, each
+# with all of its languages in parallel as in zodiac_pipeline.
+
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = int(os.getenv('ZODIAC_DAEMON_PORT', '8765'))
+DAEMON_URL = os.getenv('ZODIAC_DAEMON_URL', f'http://{DAEMON_HOST}:{DAEMON_PORT}')
+# Finished jobs kept for status queries
+JOB_HISTORY = 200
+POLL_SECONDS = 5.0
+
+JOB_OPTIONS = {'langs', 'backend', 'profile', 'shorts', 'overlay', 'upload', 'fresh', 'date'}
+FINISHED = ('succeeded', 'failed')
+
+def warm_render_worker(template_path):
+    """Render pool initializer: load what every render needs before the first job arrives."""
+    # The mastering and overlay stages import these on first use
+    import scipy.ndimage  # noqa: F401
+    import scipy.signal  # noqa: F401
+    import PIL.Image  # noqa: F401
+    if os.path.exists(template_path):
+        probe_media(template_path)
+        file_sha256(template_path)
+
+@dataclass
+class Job:
+    """
+    One queued pipeline run. The options mirror zodiac_pipeline's command line; date is
+    the ISO date of the runs directory to work in (today when submitted, by default).
+    """
+    id: str
+    langs: list
+    backend: str = 'stream-copy'
+    profile: str = None
+    shorts: bool = False
+    overlay: bool = False
+    upload: bool = True
+    fresh: bool = False
+    date: str = None
+    status: str = 'queued'
+    submitted_at: float = None
+    started_at: float = None
+    finished_at: float = None
+    results: dict = field(default_factory=dict)
+    error: str = None
+
+    @classmethod
+    def from_request(cls, payload):
+        """Validate a submitted JSON object and build a queued Job; raises ValueError."""
+        if not isinstance(payload, dict):
+            raise ValueError("Job must be a JSON object")
+        unknown = set(payload) - JOB_OPTIONS
+        if unknown:
+            raise ValueError(f"Unknown job options: {', '.join(sorted(unknown))}")
+        langs = payload.get('langs', 'all')
+        if isinstance(langs, str):
+            langs = list(LANGUAGES) if langs == 'all' else [lang.strip() for lang in langs.split(',')]
+        # Types first: a list or number in a membership test would raise TypeError, not a 400
+        if (not isinstance(langs, list) or not langs
+                or any(not isinstance(lang, str) or lang not in LANGUAGES for lang in langs)):
+            raise ValueError(f"langs must be 'all' or a list of: {', '.join(LANGUAGES)}")
+        backend = payload.get('backend', 'stream-copy')
+        if not isinstance(backend, str) or backend not in RENDER_BACKENDS:
+            raise ValueError(f"Unsupported render backend: {backend}")
+        profile = payload.get('profile')
+        if profile is not None and (not isinstance(profile, str) or profile not in ENCODE_PROFILES):
+            raise ValueError(f"Unknown encode profile: {profile}")
+        run_date = payload.get('date')
+        if run_date and not isinstance(run_date, str):
+            raise ValueError(f"date must be YYYY-MM-DD, got {run_date!r}")
+        run_date = date.fromisoformat(run_date) if run_date else date.today()
+        return cls(uuid.uuid4().hex[:12], langs, backend, profile, bool(payload.get('shorts')),
+                   bool(payload.get('overlay')), bool(payload.get('upload', True)), bool(payload.get('fresh')),
+                   run_date.isoformat(), submitted_at=time.time())
+
+    def progress(self):
+        """Completed stages per language, read from the runs directory's manifests (never created here)."""
+        progress = {}
+        for lang in self.langs:
+            stages = read_manifest(lang, date.fromisoformat(self.date))['stages']
+            progress[lang] = [name for name in STAGES if stages.get(name, {}).get('status') == 'complete']
+        return progress
+
+    def to_dict(self):
+        data = asdict(self)
+        if self.status != 'queued':
+            data['progress'] = self.progress()
+        return data
+
+class ZodiacDaemon:
+    """
+    The job queue and the warm state it runs against. warm() loads everything up front;
+    jobs then run on a single worker thread, reusing the render and metadata pools.
+    """
+
+    def __init__(self, workers=None, upload=True, profile=None):
+        self.workers = workers
+        self.upload = upload
+        self.profile = get_encode_profile(profile)
+        self.render_pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_render_worker,
+                                               initargs=(TEMPLATE_PATH,))
+        self.metadata_pool = ThreadPoolExecutor(max_workers=len(LANGUAGES))
+        self.credentials = None
+        self.services = {}
+        self.jobs = {}
+        self.warm_seconds = {}
+        self.started = time.monotonic()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=propagate(self._run), name='zodiac-daemon-jobs', daemon=True)
+
+    def _warm_step(self, name, function):
+        started = time.monotonic()
+        try:
+            function()
+            self.warm_seconds[name] = round(time.monotonic() - started, 3)
+        except Exception as e:
+            log_print("WARNING", f"Could not warm {name}: {str(e)}")
+            self.warm_seconds[name] = None
+
+    def _warm_gemini(self):
+        from zodiac_text import configure_gemini, get_model
+        configure_gemini()
+        get_model()
+
+    def _warm_template(self):
+        validate_video_file(TEMPLATE_PATH)
+        file_sha256(TEMPLATE_PATH)
+        prepare_template_mezzanine(TEMPLATE_PATH, self.profile)
+
+    def _warm_render_pool(self):
+        start_render_workers(self.render_pool, self.workers)
+
+    def youtube_services(self):
+        """
+        Credentials and one YouTube service per language, built once; upload_youtube keeps
+        the credentials fresh in the background and each service keeps its connection open.
+        """
+        from upload_youtube import get_youtube_credentials, build_youtube_service
+        if self.credentials is None:
+            self.credentials = get_youtube_credentials()
+            self.services = {lang: build_youtube_service(self.credentials) for lang in LANGUAGES}
+        return self.credentials, self.services
+
+    def warm(self):
+        log_print("INFO", "=== Warming Zodiac daemon ===")
+        with span('daemon.warm'):
+            self._warm_step('gemini', self._warm_gemini)
+            self._warm_step('template', self._warm_template)
+            self._warm_step('render_pool', self._warm_render_pool)
+            if self.upload:
+                self._warm_step('youtube', self.youtube_services)
+        log_print("INFO", f"Daemon warm: {', '.join(f'{name} {seconds}s' for name, seconds in self.warm_seconds.items())}")
+
+    def start(self):
+        self._worker.start()
+
+    def submit(self, payload):
+        job = Job.from_request(payload)
+        if job.upload and not self.upload:
+            raise ValueError("This daemon was started with --skip-upload; submit with upload false")
+        with self._lock:
+            self.jobs[job.id] = job
+            finished = [job_id for job_id, old in self.jobs.items() if old.status in FINISHED]
+            for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+                del self.jobs[job_id]
+        self._queue.put(job)
+        increment('daemon_jobs_submitted')
+        log_print("INFO", f"Queued job {job.id}: {', '.join(job.langs)} for {job.date} (backend: {job.backend})")
+        return job
+
+    def job(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def status(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return {
+            'uptime_seconds': round(time.monotonic() - self.started, 1),
+            'queued': sum(1 for job in jobs if job.status == 'queued'),
+            'running': [job.id for job in jobs if job.status == 'running'],
+            'upload': self.upload,
+            'warm_seconds': self.warm_seconds,
+        }
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._execute(job)
+
+    def _execute(self, job):
+        job.status = 'running'
+        job.started_at = time.time()
+        log_print("INFO", f"=== Running job {job.id} ===")
+        try:
+            profile = get_encode_profile(job.profile)
+            if not profile.threads:
+                profile = profile.with_threads(render_threads(self.workers, job.langs))
+            credentials, services = self.youtube_services() if job.upload else (None, {})
+            with span('daemon.job', job=job.id, langs=','.join(job.langs), backend=job.backend):
+                results = run_languages(job.langs, self.render_pool, self.metadata_pool, credentials, job.backend,
+                                        job.fresh, profile, job.shorts, job.overlay, date.fromisoformat(job.date),
+                                        services)
+            job.results = {lang: str(error) if error else None for lang, error in results.items()}
+            job.status = 'failed' if any(results.values()) else 'succeeded'
+        except Exception as e:
+            log_print("ERROR", f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = 'failed'
+        job.finished_at = time.time()
+        increment('daemon_jobs', status=job.status)
+        log_print("INFO", f"=== Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s ===")
+        write_metrics()
+
+    def close(self):
+        """Let the running job finish, then stop the worker and the pools."""
+        self._queue.put(None)
+        if self._worker.is_alive():
+            self._worker.join()
+        self.metadata_pool.shutdown()
+        self.render_pool.shutdown()
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON over localhost:
+    GET /health, GET /jobs, GET /jobs/<id> and POST /jobs with the job's options.
+    """
+
+    def _reply(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        daemon = self.server.zodiac
+        if self.path == '/health':
+            return self._reply(200, daemon.status())
+        if self.path == '/jobs':
+            with daemon._lock:
+                jobs = list(daemon.jobs.values())
+            return self._reply(200, [job.to_dict() for job in jobs])
+        if self.path.startswith('/jobs/'):
+            job = daemon.job(self.path[len('/jobs/'):])
+            if job:
+                return self._reply(200, job.to_dict())
+            return self._reply(404, {'error': 'No such job'})
+        self._reply(404, {'error': f'Unknown path: {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            return self._reply(404, {'error': f'Unknown path: {self.path}'})
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            job = self.server.zodiac.submit(json.loads(self.rfile.read(length) or b'{}'))
+        except ValueError as e:
+            return self._reply(400, {'error': str(e)})
+        self._reply(202, job.to_dict())
+
+    def log_message(self, format, *args):
+        log_print("DEBUG", f"{self.address_string()} {format % args}")
+
+def serve(port=DAEMON_PORT, workers=None, upload=True, profile=None):
+    """Warm up, then serve jobs on localhost until interrupted or sent SIGTERM."""
+    daemon = ZodiacDaemon(workers, upload, profile)
+    server = ThreadingHTTPServer((DAEMON_HOST, port), DaemonRequestHandler)
+    server.zodiac = daemon
+    # shutdown() waits for serve_forever, so it has to come from another thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    try:
+        daemon.warm()
+        daemon.start()
+        log_print("INFO", f"=== Zodiac daemon listening on http://{DAEMON_HOST}:{port} ===")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log_print("INFO", "Shutting down Zodiac daemon")
+        server.server_close()
+        daemon.close()
+        write_metrics()
+
+def request(method, path, payload=None, url=None):
+    """Call the daemon's HTTP endpoint and return the decoded JSON reply."""
+    import urllib.error
+    import urllib.request
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(f"{url or DAEMON_URL}{path}", data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        raise ValueError(json.load(e).get('error', str(e))) from None
+
+def wait_for_job(job_id, url=None, interval=POLL_SECONDS):
+    """Poll a job until it finishes, logging each newly completed stage; return the final job."""
+    reported = set()
+    while True:
+        job = request('GET', f'/jobs/{job_id}', url=url)
+        for lang, stages in job.get('progress', {}).items():
+            for stage in stages:
+                if (lang, stage) not in reported:
+                    reported.add((lang, stage))
+                    log_print("INFO", f"[{job_id}] {lang}: {stage} complete")
+        if job['status'] in FINISHED:
+            return job
+        time.sleep(interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Zodiac pipeline as a warm daemon, or submit jobs to one.")
+    parser.add_argument('--url', type=str, default=DAEMON_URL, help='Daemon endpoint for submit and status (default: ZODIAC_DAEMON_URL)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='Warm up and process jobs until stopped')
+    serve_parser.add_argument('--port', type=int, default=DAEMON_PORT, help='Localhost port (default: ZODIAC_DAEMON_PORT or 8765)')
+    serve_parser.add_argument('--workers', type=int, default=int(os.getenv('ZODIAC_RENDER_WORKERS', '0')) or None, help='Maximum render processes (default: CPU count)')
+    serve_parser.add_argument('--profile', type=str, default=None, choices=list(ENCODE_PROFILES), help='Encode profile whose mezzanine is prepared at startup')
+    serve_parser.add_argument('--skip-upload', action='store_true', help='Do not load YouTube credentials; only accept jobs that skip upload')
+    serve_parser.add_argument('--no-cache', action='store_true', help='Bypass the Gemini response cache for every job')
+
+    submit_parser = commands.add_parser('submit', help='Queue a job on a running daemon')
+    submit_parser.add_argument('--lang', type=str, default='all', help="'all' or a comma separated list of: ta, en-in, hi")
+    submit_parser.add_argument('--backend', type=str, default='stream-copy', choices=list(RENDER_BACKENDS), help='Render backend passed to zodiac_video')
+    submit_parser.add_argument('--profile', type=str, default=None, choices=list(ENCODE_PROFILES), help='Encode profile for the renders')
+    submit_parser.add_argument('--shorts', action='store_true', help='Also render a vertical Short per sign')
+    submit_parser.add_argument('--overlay', action='store_true', help='Show a card with the sign being read over each video')
+    submit_parser.add_argument('--skip-upload', action='store_true', help='Only render the videos')
+    submit_parser.add_argument('--fresh', action='store_true', help="Ignore the day's completed stages and start over")
+    submit_parser.add_argument('--date', type=str, help='Run directory date to work in, YYYY-MM-DD (default: today)')
+    submit_parser.add_argument('--wait', action='store_true', help='Report progress until the job finishes; exit 1 if it fails')
+
+    status_parser = commands.add_parser('status', help='Show the daemon, or one job')
+    status_parser.add_argument('job', nargs='?', help='Job id (default: the daemon and all its jobs)')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        if args.no_cache:
+            os.environ['ZODIAC_NO_CACHE'] = '1'
+        serve(args.port, args.workers, upload=not args.skip_upload, profile=args.profile)
+    else:
+        try:
+            if args.command == 'submit':
+                job = request('POST', '/jobs', {
+                    'langs': args.lang, 'backend': args.backend, 'profile': args.profile, 'shorts': args.shorts,
+                    'overlay': args.overlay, 'upload': not args.skip_upload, 'fresh': args.fresh, 'date': args.date,
+                }, url=args.url)
+                log_print("INFO", f"Submitted job {job['id']} ({', '.join(job['langs'])} for {job['date']})")
+                if args.wait:
+                    job = wait_for_job(job['id'], url=args.url)
+                    print(json.dumps(job, indent=2, ensure_ascii=False))
+                    if job['status'] != 'succeeded':
+                        exit(1)
+            else:
+                if args.job:
+                    print(json.dumps(request('GET', f'/jobs/{args.job}', url=args.url), indent=2, ensure_ascii=False))
+                else:
+                    print(json.dumps({'daemon': request('GET', '/health', url=args.url),
+                                      'jobs': request('GET', '/jobs', url=args.url)}, indent=2, ensure_ascii=False))
+        except ValueError as e:
+            log_print("ERROR", str(e))
+            exit(1)
+        except OSError as e:
+            log_print("ERROR", f"Could not reach the daemon at {args.url}: {str(e)}")
+            exit(1)
@@ -0,0 +1,268 @@
+import json
+import re
+import textwrap
+from dataclasses import dataclass, field, asdict
+from zodiac_telemetry import log_print, increment
+
+# The horoscope as a typed document: a header line, one entry per sign in zodiac order
+# and a closing line. Gemini's text is parsed and repaired once in zodiac_text, and the
+# later stages (TTS blocks, per-sign outputs) work from this instead of re-scanning text.
+
+# Bump when the parsed shape changes, so checkpoints from older runs are regenerated
+DOCUMENT_VERSION = 1
+
+# Canonical sign keys, in zodiac order
+SIGNS = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 'Libra', 'Scorpio',
+         'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
+
+# Sign names per zodiac_text language, in SIGNS order
+SIGN_NAMES = {
+    'en-in': SIGNS,
+    'ta': ['மேஷம்', 'ரிஷபம்', 'மிதுனம்', 'கடகம்', 'சிம்மம்', 'கன்னி', 'துலாம்', 'விருச்சிகம்',
+           'தனுசு', 'மகரம்', 'கும்பம்', 'மீனம்'],
+    'hi': ['मेष', 'वृषभ', 'मिथुन', 'कर्क', 'सिंह', 'कन्या', 'तुला', 'वृश्चिक', 'धनु', 'मकर', 'कुंभ', 'मीन'],
+}
+
+# Spellings seen in titles besides the names above ("மேஷ ராசி", "कुम्भ राशि", ...), in SIGNS order
+SIGN_ALIASES = [
+    ['மேஷ'], ['ரிஷப', 'वृष'], ['மிதுன'], ['கடக'], ['சிம்ம'], ['கன்னி'],
+    ['துலா'], ['விருச்சிக', 'वृश्चिक'], ['தனுசு', 'தனுஷ', 'धनुष'], ['மகர'], ['கும்ப', 'कुम्भ'], ['மீன'],
+]
+
+# First and last lines the prompts ask for, per zodiac_text language
+HEADERS = {
+    'ta': 'இன்றைய ராசி பலன்கள்:',
+    'en-in': "Today's horoscope results:",
+    'hi': 'आज का राशिफल परिणाम:',
+}
+FOOTERS = {
+    'ta': 'இது போல தினசரி ராசி பலன்கள் தெரிந்துகொள்ள like, share, subscribe மற்றும் comment செய்யுங்கள்.',
+    'en-in': 'To know daily horoscope results do like, share, subscribe and comment.',
+    'hi': 'ऐसे जानें दैनिक राशिफल परिणामlike, share, subscribe और comment इसे करें.',
+}
+# Enough of each line to recognise it when the model rewords the rest
+HEADER_MARKERS = ['இன்றைய ராசி பலன்கள்', "Today's horoscope results", 'आज का राशिफल']
+FOOTER_MARKERS = ['இது போல தினசரி ராசி பலன்கள்', 'To know daily horoscope results', 'ऐसे जानें दैनिक राशिफल']
+
+# A sign with less text than this was cut off or left empty
+MIN_SIGN_BODY_CHARS = 20
+# Longer text before a colon is a sentence, not a sign title
+MAX_TITLE_CHARS = 80
+WRAP_WIDTH = 75
+
+_MARKUP = re.compile(r'\*\*|__|##+|^\s*[-*•]\s+|^\s*\d{1,2}[.)]\s+')
+_NUMBER_COMMAS = re.compile(r'(?<=\d),(?=\d{2,3}\b)')
+
+class HoroscopeDocumentError(ValueError):
+    """The generated horoscope is unusable even after repair (missing signs, empty text, ...)."""
+
+@dataclass
+class SignEntry:
+    """One sign's summary. sign is the canonical SIGNS key, whatever the language."""
+    sign: str
+    title: str
+    body: str
+
+    def speech(self):
+        return f"{self.title}: {self.body}"
+
+@dataclass
+class HoroscopeDocument:
+    """
+    Parsed horoscope for one language. signs holds at most one entry per sign, in SIGNS
+    order; repairs lists what parse_horoscope changed to get there.
+    """
+    lang: str
+    header: str
+    signs: list
+    footer: str
+    repairs: list = field(default_factory=list)
+
+    def sign(self, name):
+        return next((entry for entry in self.signs if entry.sign == name), None)
+
+    def missing_signs(self):
+        """Signs with no entry or too little text to read out."""
+        present = {entry.sign for entry in self.signs if len(entry.body) >= MIN_SIGN_BODY_CHARS}
+        return [name for name in SIGNS if name not in present]
+
+    def validate(self):
+        """Raise HoroscopeDocumentError unless the document is complete; return it otherwise."""
+        problems = []
+        if not self.header.strip():
+            problems.append("empty header")
+        if not self.footer.strip():
+            problems.append("empty footer")
+        missing = self.missing_signs()
+        if missing:
+            problems.append(f"missing or empty signs: {', '.join(missing)}")
+        if problems:
+            raise HoroscopeDocumentError(f"Horoscope for {self.lang} is incomplete: {'; '.join(problems)}")
+        return self
+
+    def merge(self, other):
+        """Fill this document's missing signs from other, e.g. a regeneration of just those signs."""
+        filled = []
+        for name in self.missing_signs():
+            entry = other.sign(name)
+            if entry and len(entry.body) >= MIN_SIGN_BODY_CHARS:
+                self.signs = [current for current in self.signs if current.sign != name] + [entry]
+                filled.append(name)
+        self.signs.sort(key=lambda entry: SIGNS.index(entry.sign))
+        if filled:
+            self.repairs.append(f"regenerated {', '.join(filled)}")
+        return filled
+
+    def speech_blocks(self):
+        """Text spoken as one TTS block each: the header, every sign in order, the footer."""
+        return [self.header] + [entry.speech() for entry in self.signs] + [self.footer]
+
+    def to_text(self):
+        """Plain text in the layout format_response produces: wrapped, indented sign bodies."""
+        lines = [self.header]
+        for entry in self.signs:
+            lines.append(f"{entry.title}:")
+            lines.append(textwrap.fill(entry.body, width=WRAP_WIDTH, initial_indent='  ', subsequent_indent='  '))
+        lines.append(self.footer)
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return dict(asdict(self), version=DOCUMENT_VERSION)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['lang'], data['header'], [SignEntry(**entry) for entry in data['signs']],
+                   data['footer'], list(data.get('repairs', [])))
+
+def identify_sign(title):
+    """Return the SIGNS key named in a title line, or None."""
+    best = None
+    lowered = title.lower()
+    for index, name in enumerate(SIGNS):
+        match = re.search(rf'\b{name.lower()}\b', lowered)
+        candidates = [match.start()] if match else []
+        for names in SIGN_NAMES.values():
+            if names is not SIGNS and names[index] in title:
+                candidates.append(title.index(names[index]))
+        candidates += [title.index(alias) for alias in SIGN_ALIASES[index] if alias in title]
+        if candidates and (best is None or min(candidates) < best[0]):
+            best = (min(candidates), name)
+    return best[1] if best else None
+
+def _clean(line, repairs):
+    cleaned = _NUMBER_COMMAS.sub('', _MARKUP.sub('', line)).strip()
+    if cleaned != line.strip():
+        repairs.add("removed markup or number commas")
+    return cleaned
+
+def parse_horoscope(text, lang):
+    """
+    Parse Gemini's horoscope text into a HoroscopeDocument, repairing what can be repaired:
+    markdown and numbered-list markup, commas in numbers, preamble before the first sign,
+    missing header or footer lines, titles split from their text, subheadings inside a
+    sign, duplicate signs, signs out of order, and titles that do not name their sign
+    (assigned by position).
+    Missing signs are left for the caller: see HoroscopeDocument.missing_signs().
+    """
+    if lang not in HEADERS:
+        raise ValueError(f"Unsupported language: {lang}")
+    repairs = set()
+    header = footer = None
+    entries = []  # [sign or None, title, body lines]
+    for raw in text.split('\n'):
+        line = _clean(raw, repairs)
+        if not line:
+            continue
+        if header is None and not any(entry[0] for entry in entries) and any(marker in line for marker in HEADER_MARKERS):
+            header = line
+            continue
+        if any(marker in line for marker in FOOTER_MARKERS):
+            footer = line
+            continue
+
+        title, separator, content = line.partition(':')
+        if separator and 0 < len(title.strip()) <= MAX_TITLE_CHARS:
+            entries.append([identify_sign(title), title.strip(), [content.strip()] if content.strip() else []])
+        elif entries:
+            entries[-1][2].append(line)
+        else:
+            repairs.add("dropped text before the first sign")
+            log_print("DEBUG", "Dropped preamble line: %s", line[:50])
+
+    if sum(1 for entry in entries if entry[0]) * 2 >= len(entries):
+        # Most titles name their sign: unnamed titles before the first sign are preamble
+        # ("Here are the results: ...") and later ones are subheadings ("Career: ...")
+        while entries and entries[0][0] is None:
+            entries.pop(0)
+            repairs.add("dropped text before the first sign")
+        merged = []
+        for entry in entries:
+            if entry[0] is None:
+                merged[-1][2].append(f"{entry[1]}: {' '.join(entry[2])}".strip())
+                repairs.add("merged subheadings into their sign")
+            else:
+                merged.append(entry)
+        entries = merged
+    else:
+        # The model chose its own titles; they go by position, after any preamble
+        while len(entries) > len(SIGNS) and entries[0][0] is None:
+            entries.pop(0)
+            repairs.add("dropped text before the first sign")
+
+    # Titles that name no sign take the next unused sign in zodiac order
+    used = {entry[0] for entry in entries if entry[0]}
+    unassigned = iter([name for name in SIGNS if name not in used])
+    for entry in entries:
+        if entry[0] is None:
+            entry[0] = next(unassigned, None)
+            if entry[0]:
+                repairs.add("assigned unnamed titles by position")
+
+    signs = {}
+    for sign, title, body in entries:
+        if sign is None:
+            repairs.add("dropped entries beyond twelve signs")
+            continue
+        body = ' '.join(body)
+        if sign in signs:
+            repairs.add(f"dropped duplicate {sign}")
+            # A title repeated on its own line followed by the text: keep the text
+            if len(signs[sign].body) >= MIN_SIGN_BODY_CHARS or not body:
+                continue
+        signs[sign] = SignEntry(sign, title, body)
+    ordered = sorted(signs.values(), key=lambda entry: SIGNS.index(entry.sign))
+    if [entry.sign for entry in ordered] != [entry.sign for entry in signs.values()]:
+        repairs.add("reordered signs")
+
+    if header is None:
+        header = HEADERS[lang]
+        repairs.add("added missing header")
+    if footer is None:
+        footer = FOOTERS[lang]
+        repairs.add("added missing footer")
+
+    document = HoroscopeDocument(lang, header, ordered, footer, sorted(repairs))
+    for repair in document.repairs:
+        increment('document_repairs', repair=repair.split(' ')[0], lang=lang)
+    log_print("INFO", f"Parsed horoscope: {len(document.signs)}/{len(SIGNS)} signs"
+                      + (f", repairs: {'; '.join(document.repairs)}" if document.repairs else ""))
+    return document
+
+def document_serializer(filename):
+    """
+    RunStore save/load callbacks for a HoroscopeDocument: the document as JSON, plus the
+    plain-text rendering next to it for reading.
+    """
+    text_filename = filename.rsplit('.', 1)[0] + '.txt'
+
+    def save(document, store):
+        with open(store.path(filename), 'w', encoding='utf-8') as f:
+            json.dump(document.to_dict(), f, indent=2, ensure_ascii=False)
+        with open(store.path(text_filename), 'w', encoding='utf-8') as f:
+            f.write(document.to_text())
+        return [filename, text_filename]
+
+    def load(store):
+        with open(store.path(filename), 'r', encoding='utf-8') as f:
+            return HoroscopeDocument.from_dict(json.load(f))
+    return save, load
@@ -0,0 +1,243 @@
+import math
+import os
+import numpy as np
+from zodiac_telemetry import log_print, span
+
+# Narration mastering: loudness normalization (ITU-R BS.1770 / EBU R128), optional
+# compression and a true-peak limiter. Every stage streams fixed-size blocks and carries
+# its filter state between them, so working memory is bounded by DSP_BLOCK_SIZE
+# regardless of narration length. scipy is imported inside the stages that use it.
+
+# YouTube plays back at about -14 LUFS; louder uploads are turned down anyway
+LOUDNESS_TARGET_LUFS = float(os.getenv('ZODIAC_LOUDNESS_TARGET', '-14'))
+TRUE_PEAK_CEILING_DB = float(os.getenv('ZODIAC_TRUE_PEAK_CEILING', '-1'))
+COMPRESSOR_ENABLED = os.getenv('ZODIAC_COMPRESS', '') in ('1', 'true', 'yes')
+DSP_BLOCK_SIZE = 65536
+# Never raise near-silent input by more than this
+MAX_GAIN_DB = 30.0
+# Added to recursive filter inputs: in digital silence their state would otherwise decay
+# into subnormal floats, which makes sosfilt/lfilter several times slower (-240 dBFS)
+DENORMAL_GUARD = 1e-12
+
+def db_to_gain(db):
+    return 10.0 ** (db / 20.0)
+
+def k_weighting_filters(sample_rate):
+    """
+    The two BS.1770 K-weighting biquads (high shelf, then high-pass) for any sample rate,
+    as second-order sections for scipy.signal.sosfilt.
+    """
+    # High shelf
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10.0 ** (gain_db / 20.0)
+    vb = vh ** 0.4996667741545416
+    a0 = 1.0 + k / q + k * k
+    shelf = [(vh + vb * k / q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+    # High-pass
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1.0 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+    return np.array([shelf, highpass])
+
+def blocks(samples, block_size=DSP_BLOCK_SIZE):
+    """Yield consecutive block_size views of samples (the last one may be shorter)."""
+    for start in range(0, len(samples), block_size):
+        yield samples[start:start + block_size]
+
+class LoudnessMeter:
+    """
+    Streaming integrated loudness (LUFS) with BS.1770-4 gating: 400 ms blocks with 75%
+    overlap, an absolute gate at -70 LUFS and a relative gate 10 LU below the ungated level.
+    Only one mean-square value per 100 ms is kept between blocks.
+    """
+
+    def __init__(self, sample_rate):
+        self.sos = k_weighting_filters(sample_rate)
+        self.state = np.zeros((len(self.sos), 2))
+        self.step = int(round(0.1 * sample_rate))
+        self.pending = np.zeros(0, dtype=np.float64)
+        self.step_energies = []
+
+    def feed(self, block):
+        from scipy.signal import sosfilt
+        weighted, self.state = sosfilt(self.sos, np.asarray(block, dtype=np.float64) + DENORMAL_GUARD, zi=self.state)
+        weighted = np.concatenate([self.pending, weighted])
+        steps = len(weighted) // self.step
+        if steps:
+            squares = weighted[:steps * self.step].reshape(steps, self.step) ** 2
+            self.step_energies.extend(squares.mean(axis=1))
+        self.pending = weighted[steps * self.step:]
+
+    def integrated(self):
+        """Gated integrated loudness in LUFS; -inf for silence or input shorter than 400 ms."""
+        energies = np.asarray(self.step_energies)
+        if len(energies) < 4:
+            return float('-inf')
+        blocks = np.lib.stride_tricks.sliding_window_view(energies, 4).mean(axis=1)
+        with np.errstate(divide='ignore'):
+            loudness = -0.691 + 10.0 * np.log10(blocks)
+        gated = blocks[loudness > -70.0]
+        if not len(gated):
+            return float('-inf')
+        relative_gate = -0.691 + 10.0 * np.log10(gated.mean()) - 10.0
+        gated = blocks[(loudness > -70.0) & (loudness > relative_gate)]
+        return float(-0.691 + 10.0 * np.log10(gated.mean()))
+
+def integrated_loudness(samples, sample_rate, block_size=DSP_BLOCK_SIZE):
+    meter = LoudnessMeter(sample_rate)
+    for block in blocks(samples, block_size):
+        meter.feed(block)
+    return meter.integrated()
+
+class Compressor:
+    """
+    Feed-forward RMS compressor. The level detector is a one-pole smoother on the signal
+    power, so gain changes follow the RMS time constant and stay click-free.
+    """
+
+    def __init__(self, sample_rate, threshold_db=-20.0, ratio=3.0, rms_ms=50.0, makeup_db=0.0):
+        self.threshold_db = threshold_db
+        self.ratio = ratio
+        self.makeup = db_to_gain(makeup_db)
+        self.coefficient = math.exp(-1.0 / (rms_ms / 1000.0 * sample_rate))
+        self.state = np.zeros(1)
+
+    def process(self, block):
+        from scipy.signal import lfilter
+        a = self.coefficient
+        power, self.state = lfilter([1.0 - a], [1.0, -a], np.square(block, dtype=np.float64) + DENORMAL_GUARD,
+                                    zi=self.state)
+        level_db = 10.0 * np.log10(power)
+        over = np.maximum(level_db - self.threshold_db, 0.0)
+        gain_db = over / self.ratio - over
+        return (block * (db_to_gain(gain_db) * self.makeup)).astype(np.float32)
+
+class TruePeakLimiter:
+    """
+    Lookahead limiter that keeps the 4x-oversampled (true) peak under ceiling_db.
+
+    Interpolated samples are only computed where they could reach the ceiling: an
+    interpolated value is at most sum(|taps|) times the largest input sample under the
+    filter, so quiet stretches skip the oversampling entirely.
+
+    The required gain per sample is turned into a smooth gain curve with two vectorized
+    passes: a trailing minimum over lookahead + hold samples, then a moving average over
+    the lookahead. The audio is delayed by the lookahead, so the gain is already down when
+    a peak arrives and never exceeds what the peak needs; nothing is hard-clipped.
+    Output is delayed by `delay` samples; call flush() at the end to drain it.
+    """
+
+    def __init__(self, sample_rate, ceiling_db=TRUE_PEAK_CEILING_DB, lookahead_ms=5.0, hold_ms=40.0,
+                 oversample=4, taps_per_phase=12):
+        from scipy.signal import firwin
+        self.ceiling = db_to_gain(ceiling_db)
+        self.lookahead = max(1, int(round(lookahead_ms / 1000.0 * sample_rate)))
+        # +2 covers the +/-1 sample uncertainty of where an interpolated peak falls
+        self.window = self.lookahead + int(round(hold_ms / 1000.0 * sample_rate)) + 2
+        taps = firwin(oversample * taps_per_phase, 1.0 / oversample) * oversample
+        # One column per interpolation phase, reversed so a window of input times it is the FIR output
+        self.kernel = np.stack([taps[phase::oversample][::-1] for phase in range(oversample)],
+                               axis=1).astype(np.float32)
+        self.bound = float(np.abs(self.kernel).sum(axis=0).max())
+        self.input_history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        # Interpolated samples lag the input by the FIR's group delay
+        self.fir_delay = int(math.ceil((len(taps) - 1) / 2.0 / oversample))
+        self.delay = self.fir_delay + self.lookahead
+        self.delay_line = np.zeros(self.delay, dtype=np.float32)
+        self.gain_history = np.ones(self.window - 1)
+        self.min_history = np.ones(self.lookahead - 1)
+
+    def _true_peak(self, block):
+        from scipy.ndimage import maximum_filter1d
+        taps = len(self.kernel)
+        extended = np.concatenate([self.input_history, block])
+        self.input_history = extended[len(block):]
+        windows = np.lib.stride_tricks.sliding_window_view(extended, taps)
+        local = maximum_filter1d(np.abs(extended), taps, origin=(taps - 1) // 2)[taps - 1:]
+        peak = np.zeros(len(block), dtype=np.float32)
+        candidates = np.flatnonzero(local * self.bound > self.ceiling)
+        if len(candidates):
+            peak[candidates] = np.abs(windows[candidates] @ self.kernel).max(axis=1)
+        return peak
+
+    def process(self, block):
+        from scipy.ndimage import minimum_filter1d
+        block = np.asarray(block, dtype=np.float32)
+        n = len(block)
+        if not n:
+            return block
+
+        # Input delayed to line up with the interpolated peaks
+        line = np.concatenate([self.delay_line, block])
+        aligned = line[self.lookahead:self.lookahead + n]
+        peak = np.maximum(self._true_peak(block), np.abs(aligned))
+        required = np.minimum(1.0, self.ceiling / np.maximum(peak, 1e-9))
+
+        # Trailing minimum over the window: origin shifts scipy's centred window to end at each sample
+        extended = np.concatenate([self.gain_history, required])
+        minimum = minimum_filter1d(extended, self.window, origin=(self.window - 1) // 2)[self.window - 1:]
+        self.gain_history = extended[n:]
+
+        # Trailing moving average over the lookahead
+        extended = np.concatenate([self.min_history, minimum])
+        cumulative = np.concatenate([[0.0], np.cumsum(extended)])
+        gain = (cumulative[self.lookahead:] - cumulative[:-self.lookahead]) / self.lookahead
+        self.min_history = extended[n:] if self.lookahead > 1 else self.min_history
+
+        output = line[:n] * gain.astype(np.float32)
+        self.delay_line = line[n:]
+        return output
+
+    def flush(self):
+        """Return the delayed tail still held in the limiter."""
+        return self.process(np.zeros(self.delay, dtype=np.float32))
+
+def master(samples, sample_rate, target_lufs=LOUDNESS_TARGET_LUFS, ceiling_db=TRUE_PEAK_CEILING_DB,
+           compress=COMPRESSOR_ENABLED, block_size=DSP_BLOCK_SIZE):
+    """
+    Normalize mono float32 samples to target_lufs, optionally compress, and true-peak limit
+    to ceiling_db. Streaming passes over the input: one to measure, one more to measure the
+    compressed signal when compress is set, and one to process.
+    Returns a new float32 array of the same length; besides it, memory is O(block_size).
+    """
+    with span('dsp.master', samples=len(samples), target_lufs=target_lufs, compress=compress) as current:
+        with span('dsp.measure'):
+            loudness = integrated_loudness(samples, sample_rate, block_size)
+        gain_db = 0.0 if math.isinf(loudness) else min(target_lufs - loudness, MAX_GAIN_DB)
+        gain = db_to_gain(gain_db)
+        log_print("INFO", f"Narration loudness {loudness:.1f} LUFS, applying {gain_db:+.1f} dB "
+                          f"(target {target_lufs:.1f} LUFS, ceiling {ceiling_db:.1f} dBTP)")
+
+        compressor = None
+        if compress:
+            # Compression lowers the loudness just measured; measure what it leaves and make it up
+            with span('dsp.measure'):
+                compressor, meter = Compressor(sample_rate), LoudnessMeter(sample_rate)
+                for block in blocks(samples, block_size):
+                    meter.feed(compressor.process(block * np.float32(gain)))
+                compressed = meter.integrated()
+            makeup_db = 0.0 if math.isinf(compressed) else min(target_lufs - compressed, MAX_GAIN_DB)
+            compressor = Compressor(sample_rate, makeup_db=makeup_db)
+            log_print("INFO", f"Compression makeup gain {makeup_db:+.1f} dB")
+
+        limiter = TruePeakLimiter(sample_rate, ceiling_db)
+        output = np.empty(len(samples), dtype=np.float32)
+        written = -limiter.delay  # the first limiter.delay output samples are the delay line's zeros
+        for block in blocks(samples, block_size):
+            block = block * np.float32(gain)
+            if compressor:
+                block = compressor.process(block)
+            written = _write(output, limiter.process(block), written)
+        _write(output, limiter.flush(), written)
+        current.set(loudness_lufs=round(loudness, 2), gain_db=round(gain_db, 2))
+    return output
+
+def _write(output, block, position):
+    """Copy a limiter output block into output at position, dropping what falls outside."""
+    start, end = max(position, 0), min(position + len(block), len(output))
+    if end > start:
+        output[start:end] = block[start - position:end - position]
+    return position + len(block)
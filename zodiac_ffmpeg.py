@@ -0,0 +1,237 @@
+import subprocess
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict, replace
+from zodiac_telemetry import log_print, span, increment
+from zodiac_cache import CACHE_DIR
+import numpy as np
+
+# Same override moviepy honours, so both paths run the same ffmpeg build
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = os.getenv('FFPROBE_BINARY', 'ffprobe')
+
+MEZZANINE_VERSION = 2
+# Language threads may ask for the same mezzanine at once; only one of them encodes it
+_mezzanine_lock = threading.Lock()
+# Probe results and hashes by (path, size, mtime), so a long-lived process such as the
+# daemon or a reused render worker reads an unchanged template only once
+_file_info = {}
+_file_info_lock = threading.Lock()
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    """
+    Explicit x264 and AAC settings for the final render. The stream-copy backend applies
+    the video settings once, to the cached mezzanine, and only encodes audio per render.
+    """
+    name: str
+    preset: str
+    crf: int
+    tune: str = None
+    keyint_seconds: float = 2.0
+    threads: int = 0  # 0 lets x264 size its thread pool from the CPU count
+    audio_bitrate: str = '128k'
+
+    def gop(self, fps):
+        return max(1, round(fps * self.keyint_seconds))
+
+    def x264_args(self, fps):
+        """ffmpeg output arguments for libx264 with this profile."""
+        args = ['-c:v', 'libx264', '-preset', self.preset, '-crf', str(self.crf),
+                '-threads', str(self.threads), '-g', str(self.gop(fps)), '-pix_fmt', 'yuv420p']
+        if self.tune:
+            args += ['-tune', self.tune]
+        return args
+
+    def aac_args(self):
+        return ['-c:a', 'aac', '-b:a', self.audio_bitrate]
+
+    def moviepy_kwargs(self, fps):
+        """Keyword arguments for moviepy's write_videofile with this profile."""
+        params = ['-crf', str(self.crf), '-g', str(self.gop(fps)), '-pix_fmt', 'yuv420p']
+        if self.tune:
+            params += ['-tune', self.tune]
+        return {'codec': 'libx264', 'audio_codec': 'aac', 'preset': self.preset, 'threads': self.threads,
+                'audio_bitrate': self.audio_bitrate, 'ffmpeg_params': params}
+
+    def with_threads(self, threads):
+        return replace(self, threads=threads)
+
+# The template is a mostly static loop, so the published profiles tune for still
+# images: fewer bits on unchanged frames at the same visual quality
+ENCODE_PROFILES = {
+    'fast-draft': EncodeProfile('fast-draft', preset='ultrafast', crf=30, tune='zerolatency',
+                                keyint_seconds=2, audio_bitrate='96k'),
+    'publish': EncodeProfile('publish', preset='faster', crf=21, tune='stillimage',
+                             keyint_seconds=2, audio_bitrate='160k'),
+    'archive': EncodeProfile('archive', preset='slow', crf=16, tune='stillimage',
+                             keyint_seconds=1, audio_bitrate='256k'),
+}
+DEFAULT_ENCODE_PROFILE = os.getenv('ZODIAC_ENCODE_PROFILE', 'publish')
+
+def get_encode_profile(profile=None):
+    """Resolve a profile name (or None for the default) to an EncodeProfile."""
+    if isinstance(profile, EncodeProfile):
+        return profile
+    name = profile or DEFAULT_ENCODE_PROFILE
+    if name not in ENCODE_PROFILES:
+        raise ValueError(f"Unknown encode profile: {name}. Choose from: {', '.join(ENCODE_PROFILES)}")
+    return ENCODE_PROFILES[name]
+
+def run_ffmpeg(args, input_bytes=None):
+    """Run ffmpeg with the given arguments and return its stdout bytes."""
+    command = [FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error', '-y'] + list(args)
+    log_print("DEBUG", "Running: %s", ' '.join(command))
+    with span('ffmpeg', input_bytes=len(input_bytes) if input_bytes is not None else 0) as current:
+        result = subprocess.run(command, input=input_bytes, capture_output=True)
+        current.set(output_bytes=len(result.stdout), returncode=result.returncode)
+    increment('ffmpeg_runs')
+    increment('ffmpeg_pipe_bytes', len(input_bytes) if input_bytes is not None else 0, direction='in')
+    increment('ffmpeg_pipe_bytes', len(result.stdout), direction='out')
+    if result.returncode != 0:
+        stderr = result.stderr.decode('utf-8', errors='replace').strip()
+        log_print("ERROR", f"ffmpeg exited with code {result.returncode}: {stderr}")
+        raise RuntimeError(f"ffmpeg failed with code {result.returncode}: {stderr}")
+    return result.stdout
+
+def atempo_filter(speed_factor):
+    """Build an atempo chain for any speed; a single atempo stage is limited to 0.5-2.0 on older ffmpeg."""
+    if speed_factor <= 0:
+        raise ValueError(f"Speed factor must be positive: {speed_factor}")
+    stages = []
+    remaining = speed_factor
+    while remaining > 2.0:
+        stages.append(2.0)
+        remaining /= 2.0
+    while remaining < 0.5:
+        stages.append(0.5)
+        remaining /= 0.5
+    stages.append(remaining)
+    return ','.join(f"atempo={stage:.6g}" for stage in stages)
+
+def decode_audio(audio_bytes, sample_rate):
+    """Decode any audio ffmpeg understands into mono float32 samples at sample_rate."""
+    pcm = run_ffmpeg([
+        '-i', 'pipe:0',
+        '-f', 'f32le',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        'pipe:1',
+    ], input_bytes=audio_bytes)
+    return np.frombuffer(pcm, dtype=np.float32)
+
+def _memoized_file_info(kind, path, compute):
+    """compute() for path, reused until the file's size or modification time changes."""
+    stat = os.stat(path)
+    key = (kind, os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _file_info_lock:
+        if key in _file_info:
+            increment('cache_hits', cache=kind)
+            return _file_info[key]
+    increment('cache_misses', cache=kind)
+    value = compute()
+    with _file_info_lock:
+        _file_info[key] = value
+    return value
+
+def probe_media(path):
+    """Return ffprobe's format and stream information for a media file."""
+    return _memoized_file_info('probe', path, lambda: _run_ffprobe(path))
+
+def _run_ffprobe(path):
+    result = subprocess.run(
+        [FFPROBE_BINARY, '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', path],
+        capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        log_print("ERROR", f"ffprobe failed for {path}: {result.stderr}")
+        raise ValueError(f"Could not probe media file: {path}")
+    return json.loads(result.stdout)
+
+def get_video_fps(info):
+    """Return the frame rate of the first video stream in ffprobe output."""
+    for stream in info.get('streams', []):
+        if stream.get('codec_type') == 'video':
+            num, _, den = stream.get('avg_frame_rate', '0/1').partition('/')
+            if float(num) == 0:
+                num, _, den = stream.get('r_frame_rate', '0/1').partition('/')
+            return float(num) / float(den or 1)
+    raise ValueError("No video stream found")
+
+def get_video_size(info):
+    """Return (width, height) of the first video stream in ffprobe output."""
+    for stream in info.get('streams', []):
+        if stream.get('codec_type') == 'video':
+            return int(stream['width']), int(stream['height'])
+    raise ValueError("No video stream found")
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in fixed-size chunks."""
+    def compute():
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    return _memoized_file_info('sha256', path, compute)
+
+def frame_filter(frame):
+    """Scale and centre-crop to fill a 'WIDTHxHEIGHT' frame, e.g. a vertical 1080x1920 Short."""
+    width, height = frame.lower().split('x')
+    return f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},setsar=1"
+
+def prepare_template_mezzanine(video_path, profile=None, frame=None):
+    """
+    Encode the template once into a GOP-aligned, stream-copyable mezzanine and cache it.
+    Every GOP is closed and P-frame only, so the looped track can be cut on any frame
+    boundary. The cache key covers the template contents and the encode profile, so a
+    new template or changed settings produce a fresh mezzanine automatically.
+    With frame ('WIDTHxHEIGHT') the template is reframed to that size, see frame_filter.
+    """
+    profile = get_encode_profile(profile)
+    gop_seconds = profile.keyint_seconds
+    log_print("INFO", f"=== Preparing Template Mezzanine (profile: {profile.name}, frame: {frame or 'template'}) ===")
+    # Threads don't change the output, so they stay out of the key
+    settings = asdict(profile.with_threads(0))
+    key_source = f"{file_sha256(video_path)}:{json.dumps(settings, sort_keys=True)}:{MEZZANINE_VERSION}"
+    if frame:
+        key_source += f":{frame}"
+    key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()[:16]
+    mezzanine_path = os.path.join(CACHE_DIR, f"mezzanine-{key}.mp4")
+
+    with _mezzanine_lock:
+        if os.path.exists(mezzanine_path):
+            log_print("INFO", f"Using cached mezzanine: {mezzanine_path}")
+            increment('cache_hits', cache='mezzanine')
+            return mezzanine_path
+
+        increment('cache_misses', cache='mezzanine')
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fps = get_video_fps(probe_media(video_path))
+        gop = profile.gop(fps)
+        log_print("INFO", f"Encoding mezzanine at {fps:.3f} fps with a {gop}-frame closed GOP")
+
+        # Write next to the final path and rename so a crash never leaves a half-written cache entry
+        temp_path = f"{mezzanine_path}.{os.getpid()}.tmp.mp4"
+        try:
+            with span('mezzanine.encode', profile=profile.name, fps=fps, gop=gop, frame=frame):
+                run_ffmpeg([
+                    '-i', video_path,
+                    '-an',
+                ] + (['-vf', frame_filter(frame)] if frame else []) + profile.x264_args(fps) + [
+                    '-keyint_min', str(gop),
+                    '-sc_threshold', '0',
+                    '-bf', '0',
+                    '-flags', '+cgop',
+                    '-force_key_frames', f'expr:gte(t,n_forced*{gop_seconds})',
+                    '-movflags', '+faststart',
+                    temp_path,
+                ])
+            os.replace(temp_path, mezzanine_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    log_print("INFO", f"Mezzanine cached at {mezzanine_path} ({os.path.getsize(mezzanine_path)} bytes)")
+    return mezzanine_path
@@ -0,0 +1,237 @@
+import functools
+import os
+from dataclasses import dataclass
+from zodiac_telemetry import log_print, span, increment
+
+# On-screen cards naming the sign being read, drawn with Pillow instead of moviepy's
+# TextClip (an ImageMagick call per frame). Text is rasterized once per font and size,
+# each card is composited once into an RGBA image, and ffmpeg's overlay filter places
+# the cards over the looped template on the narration's timeline.
+
+# Bump when the card layout changes, so rendered videos are not reused
+OVERLAY_VERSION = 1
+
+# ZODIAC_OVERLAY_FONT is one font file for every language; otherwise the first candidate
+# Pillow finds in the system font directories
+OVERLAY_FONT = os.getenv('ZODIAC_OVERLAY_FONT')
+FONT_CANDIDATES = {
+    'ta': ['NotoSansTamil-Regular.ttf', 'Lohit-Tamil.ttf', 'FreeSans.ttf'],
+    'hi': ['NotoSansDevanagari-Regular.ttf', 'Lohit-Devanagari.ttf', 'FreeSans.ttf'],
+    'en-in': ['NotoSans-Regular.ttf', 'DejaVuSans.ttf', 'LiberationSans-Regular.ttf'],
+}
+
+# Layout, as fractions of the frame's shorter side unless noted
+TITLE_SIZE = 1 / 14
+BODY_SIZE = 1 / 24
+CARD_WIDTH = 0.9  # of the frame width
+CARD_PADDING = 1 / 36
+CARD_MARGIN = 1 / 20  # between the card and the bottom of the frame
+CARD_RADIUS = 1 / 54
+LINE_SPACING = 1.2
+# A sign's text is paged over its narration, this many lines at a time
+BODY_LINES = 4
+
+CARD_BACKGROUND = (0, 0, 0, 170)
+TITLE_COLOR = (255, 214, 102, 255)
+BODY_COLOR = (255, 255, 255, 255)
+
+OVERLAY_LIST = 'overlay.ffconcat'
+
+@functools.lru_cache(maxsize=None)
+def resolve_font(lang):
+    """Path of the font used for lang's cards, or None for Pillow's built-in font."""
+    from PIL import ImageFont
+    candidates = [OVERLAY_FONT] if OVERLAY_FONT else FONT_CANDIDATES.get(lang, FONT_CANDIDATES['en-in'])
+    for candidate in candidates:
+        try:
+            return ImageFont.truetype(candidate, 12).path
+        except OSError:
+            continue
+    log_print("WARNING", f"No overlay font found for {lang} (tried {', '.join(candidates)}); "
+                         "using Pillow's built-in font, which may lack the script's glyphs")
+    return None
+
+class GlyphAtlas:
+    """
+    Rasterized text for one font file and size. The cached unit is a word rather than a
+    single glyph: Tamil and Devanagari reorder vowel signs and form conjuncts within a
+    word, so per-codepoint glyphs would draw them wrong, while shaping never crosses a
+    space. A day's cards repeat most of their words, and the sign names and common
+    words recur across days in the same process.
+    """
+
+    def __init__(self, font_path, size):
+        from PIL import ImageFont, features
+        if font_path:
+            layout = ImageFont.Layout.RAQM if features.check('raqm') else ImageFont.Layout.BASIC
+            self.font = ImageFont.truetype(font_path, size, layout_engine=layout)
+        else:
+            self.font = ImageFont.load_default(size)
+        ascent, descent = self.font.getmetrics()
+        self.line_height = round((ascent + descent) * LINE_SPACING)
+        self.space = self.font.getlength(' ')
+        self.runs = {}
+        self.hits = 0
+        self.misses = 0
+
+    def run(self, word):
+        """(mask, (left, top) offset from the pen position, advance) for a word."""
+        run = self.runs.get(word)
+        if run is not None:
+            self.hits += 1
+            return run
+        from PIL import Image, ImageDraw
+        self.misses += 1
+        left, top, right, bottom = self.font.getbbox(word)
+        mask = Image.new('L', (max(1, right - left), max(1, bottom - top)))
+        ImageDraw.Draw(mask).text((-left, -top), word, fill=255, font=self.font)
+        run = self.runs[word] = (mask, (left, top), self.font.getlength(word))
+        return run
+
+    def advance(self, word):
+        return self.run(word)[2]
+
+    def draw(self, image, position, words, color):
+        """Paste a line of words onto image with its top-left at position."""
+        x, y = position
+        for word in words:
+            mask, (left, top), advance = self.run(word)
+            image.paste(color, (round(x + left), round(y + top)), mask)
+            x += advance + self.space
+
+@functools.lru_cache(maxsize=None)
+def get_atlas(font_path, size):
+    """The process-wide GlyphAtlas for a font and size."""
+    return GlyphAtlas(font_path, size)
+
+def wrap_words(atlas, text, width):
+    """Greedily wrap text into lines (lists of words) no wider than width."""
+    lines, line, line_width = [], [], 0
+    for word in text.split():
+        advance = atlas.advance(word)
+        if line and line_width + atlas.space + advance > width:
+            lines.append(line)
+            line, line_width = [], 0
+        line_width += (atlas.space if line else 0) + advance
+        line.append(word)
+    if line:
+        lines.append(line)
+    return lines
+
+@dataclass
+class CardLayout:
+    """Size and position of the cards on a frame, and the atlases they are drawn with."""
+    frame_width: int
+    frame_height: int
+    width: int
+    height: int
+    x: int
+    y: int
+    padding: int
+    radius: int
+    title: GlyphAtlas
+    body: GlyphAtlas
+
+    @classmethod
+    def for_frame(cls, frame_width, frame_height, lang):
+        font_path = resolve_font(lang)
+        side = min(frame_width, frame_height)
+        title = get_atlas(font_path, round(side * TITLE_SIZE))
+        body = get_atlas(font_path, round(side * BODY_SIZE))
+        padding = round(side * CARD_PADDING)
+        width = round(frame_width * CARD_WIDTH)
+        height = 2 * padding + title.line_height + BODY_LINES * body.line_height
+        x = (frame_width - width) // 2
+        y = frame_height - height - round(side * CARD_MARGIN)
+        return cls(frame_width, frame_height, width, height, x, y, padding, round(side * CARD_RADIUS), title, body)
+
+    def pages(self, entry):
+        """The sign's body wrapped to the card, BODY_LINES lines per page."""
+        lines = wrap_words(self.body, entry.body, self.width - 2 * self.padding)
+        return [lines[start:start + BODY_LINES] for start in range(0, len(lines), BODY_LINES)] or [[]]
+
+    def render(self, title, lines):
+        """One card as an RGBA image of the card's size."""
+        from PIL import Image, ImageDraw
+        card = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
+        ImageDraw.Draw(card).rounded_rectangle((0, 0, self.width - 1, self.height - 1), self.radius,
+                                               fill=CARD_BACKGROUND)
+        self.title.draw(card, (self.padding, self.padding), title.split(), TITLE_COLOR)
+        top = self.padding + self.title.line_height
+        for index, line in enumerate(lines):
+            self.body.draw(card, (self.padding, top + index * self.body.line_height), line, BODY_COLOR)
+        return card
+
+@dataclass
+class OverlayTrack:
+    """
+    Card images and their timeline as an ffconcat list, for the ffmpeg mux: every card
+    is decoded once and overlay holds it until the next one starts.
+    """
+    list_path: str
+    x: int
+    y: int
+    cards: int
+
+    def input_args(self):
+        return ['-f', 'concat', '-i', self.list_path]
+
+    def filter_graph(self, video_input, overlay_input, output='v'):
+        """-filter_complex graph compositing the cards over video_input, labelled output."""
+        return (f"[{video_input}:v][{overlay_input}:v]overlay=x={self.x}:y={self.y}:eof_action=repeat"
+                f"[{output}]")
+
+def card_timeline(document, audio, speed):
+    """
+    (entry, start, end) in output seconds for every sign. audio is the document's
+    narration (header, signs, footer segments) before the speed change.
+    """
+    if len(audio.segments) != len(document.signs) + 2:
+        raise ValueError(f"Narration has {len(audio.segments)} segments, the document "
+                         f"{len(document.signs) + 2} blocks")
+    return [(entry, start / audio.sample_rate / speed, end / audio.sample_rate / speed)
+            for entry, (start, end) in zip(document.signs, audio.segments[1:-1])]
+
+def build_overlay_track(document, audio, speed, frame_size, directory):
+    """Render the document's cards into directory and return the OverlayTrack timing them."""
+    width, height = frame_size
+    with span('overlay.cards', lang=document.lang, frame=f"{width}x{height}") as current:
+        layout = CardLayout.for_frame(width, height, document.lang)
+        from PIL import Image
+        Image.new('RGBA', (layout.width, layout.height), (0, 0, 0, 0)).save(os.path.join(directory, 'blank.png'))
+
+        # (start time, file) for each card, with the blank card covering the gaps
+        entries = [(0.0, 'blank.png')]
+        cards = 0
+        for sign_index, (entry, start, end) in enumerate(card_timeline(document, audio, speed)):
+            pages = layout.pages(entry)
+            # Pages share their sign's time in proportion to their text
+            weights = [max(1, sum(len(word) for line in page for word in line)) for page in pages]
+            elapsed = 0
+            for page_index, (page, weight) in enumerate(zip(pages, weights)):
+                filename = f"card-{sign_index + 1:02d}-{page_index + 1}.png"
+                layout.render(entry.title, page).save(os.path.join(directory, filename), compress_level=1)
+                entries.append((start + (end - start) * elapsed / sum(weights), filename))
+                elapsed += weight
+                cards += 1
+            entries.append((end, 'blank.png'))
+
+        lines = ['ffconcat version 1.0']
+        for (start, filename), (end, _) in zip(entries, entries[1:]):
+            lines += [f"file '{filename}'", f"duration {max(0.0, end - start):.3f}"]
+        # The closing blank has no duration; overlay holds it to the end of the video
+        lines.append(f"file '{entries[-1][1]}'")
+        list_path = os.path.join(directory, OVERLAY_LIST)
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        current.set(cards=cards)
+
+    increment('overlay_cards', cards)
+    log_print("INFO", f"Rendered {cards} overlay cards ({layout.width}x{layout.height}) for {len(document.signs)} signs; "
+                      f"text cache hits: {layout.title.hits + layout.body.hits}, "
+                      f"misses: {layout.title.misses + layout.body.misses}")
+    return OverlayTrack(list_path, layout.x, layout.y, cards)
+
+def overlay_key(lang):
+    """Part of the video stage key that changes whenever the cards would render differently."""
+    return ('overlay', OVERLAY_VERSION, resolve_font(lang))
@@ -0,0 +1,200 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from zodiac_audio import main as zodiac_audio_main
+from zodiac_video import render_video, video_stage_key, overlay_document, RENDER_BACKENDS, OUTPUT_FILES
+from zodiac_shorts import shorts_stage
+from upload_youtube import (metadata_stage, upload_stage, playlist_stage, get_youtube_credentials,
+                            build_youtube_service, PLAYLIST_ID)
+from zodiac_artifacts import RunStore, bytes_serializer
+from zodiac_ffmpeg import ENCODE_PROFILES, get_encode_profile
+from zodiac_telemetry import log_print, span, propagate, call_with_metrics, merge_metrics, write_metrics
+import argparse
+import os
+import time
+
+# Language name -> language code used by the zodiac_* modules
+LANGUAGES = {'ta': 0, 'en-in': 1, 'hi': 2}
+
+def render_in_pool(render_pool, audio, backend, profile, document=None):
+    """Render in a worker process and fold the worker's metrics into this process's."""
+    video_buffer, metrics = render_pool.submit(call_with_metrics, render_video, audio, backend, profile=profile,
+                                               document=document).result()
+    merge_metrics(metrics)
+    return video_buffer
+
+def run_language(lang, render_pool, metadata_pool, credentials, backend, fresh=False, profile=None, shorts=False,
+                 overlay=False, run_date=None, youtube=None, playlist_id=PLAYLIST_ID, publish_at=None):
+    """
+    Run text, audio, video (and with shorts, the per-sign Shorts) and upload for one language.
+    overlay draws each sign's card over the main video. run_date selects the RunStore
+    (today by default), and youtube is an already built service to upload with.
+    Returns the uploaded video's ID, or None without credentials; with playlist_id None
+    the caller adds it to the playlist. publish_at schedules the upload to go public then.
+    Network-bound stages run on the calling thread or the metadata pool;
+    the CPU-bound speed change and encode run on the shared process pool.
+    Every stage is checkpointed in today's RunStore, so a rerun after a failure
+    picks up at the first stage that did not complete.
+    """
+    with span('pipeline.language', lang=lang, backend=backend):
+        lang_code = LANGUAGES[lang]
+        store = RunStore(lang, run_date)
+        if fresh:
+            store.reset()
+        started = time.monotonic()
+        log_print("INFO", f"=== [{lang}] Starting language pipeline ===")
+
+        # Metadata only needs the language, so it is generated while the narration is produced
+        metadata_future = metadata_pool.submit(propagate(metadata_stage), lang_code, store) if credentials else None
+
+        log_print("INFO", f"[{lang}] Generating text and audio")
+        audio = zodiac_audio_main(lang_code, store=store)
+
+        log_print("INFO", f"[{lang}] Submitting render to process pool")
+        with span('video', backend=backend):
+            document = overlay_document(store) if overlay else None
+            video_buffer = store.checkpoint(
+                'video', video_stage_key(store, backend, profile=profile, overlay=overlay),
+                lambda: render_in_pool(render_pool, audio, backend, profile, document), *bytes_serializer('video.mp4'))
+
+        output_file = OUTPUT_FILES[lang_code]
+        with open(output_file, "wb") as f:
+            f.write(video_buffer.getbuffer())
+        log_print("INFO", f"[{lang}] Video saved to {output_file}")
+
+        if shorts:
+            log_print("INFO", f"[{lang}] Submitting per-sign Shorts to process pool")
+            manifest = shorts_stage(store, audio, render_pool, profile)
+            log_print("INFO", f"[{lang}] {len(manifest['shorts'])} Shorts saved in {store.directory}")
+
+        video_id = None
+        if credentials:
+            metadata = metadata_future.result()
+            youtube = youtube or build_youtube_service(credentials)
+            video_id = upload_stage(youtube, store.path('video.mp4'), metadata, store, playlist_id, publish_at)
+
+        elapsed = time.monotonic() - started
+        log_print("INFO", f"=== [{lang}] Language pipeline completed in {elapsed:.1f}s ===")
+        return video_id
+
+def run_languages(langs, render_pool, metadata_pool, credentials, backend, fresh=False, profile=None, shorts=False,
+                  overlay=False, run_date=None, services=None):
+    """
+    run_language for every language at once on the given pools. Returns {lang: error or None}.
+    services maps languages to already built YouTube services to upload with. The
+    uploaded videos are added to the playlist together, in one batched request.
+    """
+    services = services or {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(langs)) as language_pool:
+        futures = {
+            lang: language_pool.submit(propagate(run_language), lang, render_pool, metadata_pool, credentials, backend,
+                                       fresh, profile, shorts, overlay, run_date, services.get(lang), None)
+            for lang in langs
+        }
+        # One language failing must not abort the others
+        uploads = {}
+        for lang, future in futures.items():
+            try:
+                video_id = future.result()
+                results[lang] = None
+                if video_id:
+                    uploads[lang] = video_id
+            except Exception as e:
+                log_print("ERROR", f"[{lang}] Pipeline failed: {str(e)}")
+                results[lang] = e
+
+    add_to_playlist(credentials, services, {RunStore(lang, run_date): video_id for lang, video_id in uploads.items()})
+    return results
+
+def add_to_playlist(credentials, services, uploads):
+    """
+    Add {RunStore: video_id} uploads to the playlist in one batched request. A video left
+    out of the playlist is a warning, as it is for a single upload.
+    """
+    if not uploads:
+        return
+    try:
+        youtube = next(iter(services.values()), None) if services else None
+        errors = playlist_stage(youtube or build_youtube_service(credentials), list(uploads.items()))
+    except Exception as e:
+        errors = {video_id: e for video_id in uploads.values()}
+    for store, video_id in uploads.items():
+        if errors[video_id]:
+            log_print("WARNING", f"[{store.lang} {store.run_date.isoformat()}] Could not add {video_id} to the playlist: "
+                                 f"{str(errors[video_id])}")
+
+def start_render_workers(render_pool, workers):
+    """
+    Start every process of render_pool now, before any thread spawns ffmpeg. A worker
+    forked later would inherit the pipes of an ffmpeg being started on another thread,
+    and that ffmpeg would never see the end of its input.
+    """
+    # One task per worker makes the pool start all of its processes
+    for future in [render_pool.submit(os.getpid) for _ in range(workers or os.cpu_count() or 1)]:
+        future.result()
+
+def render_threads(workers, langs):
+    """x264 threads per render so that concurrent renders share the CPUs instead of oversubscribing them."""
+    cpus = os.cpu_count() or 1
+    concurrent = min(workers or cpus, len(langs))
+    return max(1, cpus // concurrent)
+
+def main(langs, workers=None, backend='stream-copy', upload=True, fresh=False, profile=None, shorts=False, overlay=False):
+    """Run the full pipeline for every language concurrently. Returns {lang: error or None}."""
+    profile = get_encode_profile(profile)
+    if not profile.threads:
+        profile = profile.with_threads(render_threads(workers, langs))
+    log_print("INFO", "=== Starting Zodiac Pipeline ===")
+    log_print("INFO", f"Languages: {', '.join(langs)}, render workers: {workers or 'auto'}, backend: {backend}, "
+                      f"profile: {profile.name} ({profile.threads} threads per render)")
+    started = time.monotonic()
+
+    # Authenticate once up front so every upload thread shares the same fresh credentials
+    credentials = get_youtube_credentials() if upload else None
+
+    with span('pipeline', langs=','.join(langs), backend=backend), \
+            ProcessPoolExecutor(max_workers=workers) as render_pool, \
+            ThreadPoolExecutor(max_workers=len(langs)) as metadata_pool:
+        start_render_workers(render_pool, workers)
+        results = run_languages(langs, render_pool, metadata_pool, credentials, backend, fresh, profile, shorts, overlay)
+
+    elapsed = time.monotonic() - started
+    failed = [lang for lang, error in results.items() if error]
+    log_print("INFO", f"=== Zodiac Pipeline finished in {elapsed:.1f}s ({len(langs) - len(failed)}/{len(langs)} succeeded) ===")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate and upload zodiac videos for several languages in parallel.")
+    parser.add_argument('--lang', type=str, default='all', help="'all' or a comma separated list of: ta, en-in, hi")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('ZODIAC_RENDER_WORKERS', '0')) or None, help='Maximum render processes (default: CPU count)')
+    parser.add_argument('--backend', type=str, default='stream-copy', choices=list(RENDER_BACKENDS), help='Render backend passed to zodiac_video')
+    parser.add_argument('--profile', type=str, default=None, choices=list(ENCODE_PROFILES), help='Encode profile for the final renders (default: ZODIAC_ENCODE_PROFILE or publish)')
+    parser.add_argument('--shorts', action='store_true', help='Also render a vertical Short per sign into each run directory')
+    parser.add_argument('--overlay', action='store_true', help='Show a card with the sign being read over each video (re-encodes the video)')
+    parser.add_argument('--skip-upload', action='store_true', help='Only render the videos')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the Gemini response cache; completed text and metadata stages are still reused (--fresh regenerates them)')
+    parser.add_argument('--fresh', action='store_true', help="Ignore today's completed stages in the run directory and start over")
+    parser.add_argument('--log-level', type=str, choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help='Minimum log level printed (default: ZODIAC_LOG_LEVEL or INFO)')
+    parser.add_argument('--trace-file', type=str, help='Append spans and log records as JSON lines (default: ZODIAC_TRACE_FILE)')
+    parser.add_argument('--metrics-file', type=str, help='Write a Prometheus textfile when the run ends (default: ZODIAC_METRICS_FILE)')
+    args = parser.parse_args()
+    if args.no_cache:
+        os.environ['ZODIAC_NO_CACHE'] = '1'
+    # Set through the environment so the render worker processes pick them up too
+    if args.log_level:
+        os.environ['ZODIAC_LOG_LEVEL'] = args.log_level
+    if args.trace_file:
+        os.environ['ZODIAC_TRACE_FILE'] = args.trace_file
+    if args.metrics_file:
+        os.environ['ZODIAC_METRICS_FILE'] = args.metrics_file
+
+    langs = list(LANGUAGES) if args.lang == 'all' else [lang.strip() for lang in args.lang.split(',')]
+    unknown = [lang for lang in langs if lang not in LANGUAGES]
+    if unknown:
+        parser.error(f"Unsupported language(s): {', '.join(unknown)}")
+
+    try:
+        results = main(langs, workers=args.workers, backend=args.backend, upload=not args.skip_upload, fresh=args.fresh, profile=args.profile, shorts=args.shorts, overlay=args.overlay)
+    finally:
+        write_metrics()
+    if any(results.values()):
+        exit(1)
@@ -0,0 +1,153 @@
+import asyncio
+import contextlib
+import fcntl
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zodiac_cache import CACHE_DIR
+from zodiac_telemetry import log_print, increment
+
+# Request budgets for the external services, shared by every thread in the process.
+# Per-minute limits are token buckets: a call reserves its cost and sleeps until the
+# bucket covers it, so bursts are spread out rather than rejected. Daily quotas are
+# counted in QUOTA_FILE across runs on this machine and raise QuotaExceededError
+# instead of waiting, since they only reset at midnight Pacific time.
+# A limit of 0 turns that check off.
+
+QUOTA_FILE = os.path.join(CACHE_DIR, 'quota.json')
+# Google resets daily quotas at midnight Pacific time; UTC-8 is within an hour of it
+QUOTA_DAY_OFFSET = timedelta(hours=-8)
+
+# YouTube Data API quota units per call
+YOUTUBE_UNITS = {'videos.insert': 1600, 'playlistItems.insert': 50}
+
+class QuotaExceededError(Exception):
+    """A service's daily quota would be exceeded by the call; retry after the quota day ends."""
+
+    def __init__(self, service, used, limit):
+        super().__init__(f"Daily {service} quota used up ({used:g} of {limit:g}); it resets at midnight Pacific time")
+        self.service = service
+        self.used = used
+        self.limit = limit
+
+class TokenBucket:
+    """per_minute units, refilled continuously; a reservation may take it below zero."""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.available = per_minute
+        self.updated = time.monotonic()
+
+    def reserve(self, cost, now):
+        """Take cost from the bucket and return the seconds until the bucket covers it."""
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+        self.available -= cost
+        return max(0.0, -self.available / self.rate)
+
+_ledger_lock = threading.Lock()
+
+@contextlib.contextmanager
+def _locked_ledger():
+    """
+    Hold the ledger against the other threads in this process and, with an flock, against
+    other processes: the daemon, the scheduler and the CLIs all charge the same QUOTA_FILE.
+    """
+    with _ledger_lock:
+        os.makedirs(os.path.dirname(QUOTA_FILE) or '.', exist_ok=True)
+        with open(f"{QUOTA_FILE}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+def quota_day():
+    return (datetime.now(timezone.utc) + QUOTA_DAY_OFFSET).date().isoformat()
+
+def _read_ledger():
+    try:
+        with open(QUOTA_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def used_today(service):
+    """Units of service's daily quota spent so far on this machine."""
+    with _locked_ledger():
+        return _read_ledger().get(quota_day(), {}).get(service, 0)
+
+def charge_daily(service, cost, limit):
+    """Record cost against today's quota for service, or raise QuotaExceededError if it does not fit."""
+    with _locked_ledger():
+        day = quota_day()
+        # Only today's counts are kept
+        usage = _read_ledger().get(day, {})
+        used = usage.get(service, 0)
+        if used + cost > limit:
+            raise QuotaExceededError(service, used, limit)
+        usage[service] = used + cost
+        temp_path = f"{QUOTA_FILE}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({day: usage}, f)
+        os.replace(temp_path, QUOTA_FILE)
+
+class ServiceBudget:
+    """Requests per minute, tokens per minute and units per day for one service."""
+
+    def __init__(self, service, per_minute=0, tokens_per_minute=0, per_day=0):
+        self.service = service
+        self.requests = TokenBucket(per_minute) if per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.per_day = per_day
+        self._lock = threading.Lock()
+
+    def remaining_today(self):
+        return max(0, self.per_day - used_today(self.service)) if self.per_day else float('inf')
+
+    def reserve(self, cost=1, tokens=0):
+        """Charge a call of cost units and tokens, and return the seconds to wait before making it."""
+        with self._lock:
+            if self.per_day:
+                charge_daily(self.service, cost, self.per_day)
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests:
+                wait = max(wait, self.requests.reserve(cost, now))
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+        if wait > 0:
+            increment('rate_limit_waits', service=self.service)
+            increment('rate_limit_wait_seconds', round(wait, 3), service=self.service)
+            log_print("DEBUG", "Waiting %.1fs for the %s rate limit", wait, self.service)
+        return wait
+
+    def acquire(self, cost=1, tokens=0):
+        """Block until a call of cost units and tokens fits the budget."""
+        wait = self.reserve(cost, tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, cost=1, tokens=0):
+        wait = self.reserve(cost, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+def _limit(name, default):
+    return float(os.getenv(name, str(default)))
+
+# Defaults are the Gemini 2.0 Flash free tier and the YouTube Data API's default
+# project quota. gTTS publishes no limit; 100 requests a minute stays clear of blocks
+BUDGETS = {
+    'gemini': ServiceBudget('gemini', per_minute=_limit('ZODIAC_GEMINI_RPM', 15),
+                            tokens_per_minute=_limit('ZODIAC_GEMINI_TPM', 1000000),
+                            per_day=_limit('ZODIAC_GEMINI_RPD', 1500)),
+    'tts': ServiceBudget('tts', per_minute=_limit('ZODIAC_TTS_RPM', 100)),
+    'youtube': ServiceBudget('youtube', per_day=_limit('ZODIAC_YOUTUBE_UNITS_PER_DAY', 10000)),
+}
+
+def budget(service):
+    return BUDGETS[service]
@@ -0,0 +1,158 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import date, datetime, time as clock, timedelta, timezone
+from zodiac_pipeline import run_language, add_to_playlist, render_threads, start_render_workers, LANGUAGES
+from zodiac_video import RENDER_BACKENDS
+from zodiac_ffmpeg import ENCODE_PROFILES, get_encode_profile
+from upload_youtube import get_youtube_credentials
+from zodiac_quota import QuotaExceededError
+from zodiac_artifacts import RunStore
+from zodiac_telemetry import log_print, span, increment, propagate, write_metrics
+import argparse
+import os
+import threading
+import time
+
+# Pre-generate the videos for a range of dates, so that a Gemini or TTS outage on the
+# morning of a run no longer costs that day's video. Every (date, language) is one
+# run_language job, earliest date first, on a thread pool larger than the render pool:
+# while some jobs wait on a render, the others generate text and narration within the
+# zodiac_quota budgets, so the next render is ready as soon as a worker is free.
+# Uploads are scheduled with publishAt for their date's publish time. Once YouTube's
+# daily quota runs out the remaining videos are still rendered, and the next run
+# uploads them from their RunStores.
+
+PUBLISH_TIME = os.getenv('ZODIAC_PUBLISH_TIME', '06:30')
+# Indian Standard Time, where the channel's audience is
+PUBLISH_TIMEZONE = timezone(timedelta(hours=5, minutes=30))
+# YouTube rejects a publishAt that is not in the future; any closer than this publishes right away
+PUBLISH_MIN_LEAD = timedelta(minutes=15)
+# Jobs generating text and narration ahead of the renders, on top of one per render worker
+NETWORK_LOOKAHEAD = int(os.getenv('ZODIAC_SCHEDULER_LOOKAHEAD', '3'))
+DEFAULT_DAYS = 7
+
+def publish_at(run_date, publish_time=PUBLISH_TIME, now=None):
+    """When run_date's videos go public, or None if that is too soon to schedule (publish right away)."""
+    hour, minute = (int(part) for part in publish_time.split(':'))
+    at = datetime.combine(run_date, clock(hour, minute), PUBLISH_TIMEZONE)
+    now = now or datetime.now(timezone.utc)
+    return at if at - now >= PUBLISH_MIN_LEAD else None
+
+def date_range(start, days):
+    return [start + timedelta(days=offset) for offset in range(days)]
+
+def pregenerate(dates, langs, workers=None, backend='stream-copy', upload=True, fresh=False, profile=None,
+                shorts=False, overlay=False, publish_time=PUBLISH_TIME, lookahead=NETWORK_LOOKAHEAD):
+    """
+    Generate and render every language for every date, and with upload schedule each
+    video for its date's publish time. Returns {(date, lang): status}, where status is
+    'scheduled', 'uploaded', 'rendered', 'upload deferred' (YouTube quota), 'deferred'
+    (Gemini quota; not started) or the exception the job failed with.
+    """
+    profile = get_encode_profile(profile)
+    if not profile.threads:
+        profile = profile.with_threads(render_threads(workers, langs))
+    jobs = [(run_date, lang) for run_date in sorted(dates) for lang in langs]
+    threads = min(len(jobs), (workers or os.cpu_count() or 1) + lookahead)
+    log_print("INFO", f"=== Pre-generating {len(jobs)} videos: {dates[0].isoformat()} to {dates[-1].isoformat()}, "
+                      f"{', '.join(langs)}; {workers or 'auto'} render workers, {threads} jobs at once ===")
+    started = time.monotonic()
+
+    credentials = get_youtube_credentials() if upload else None
+    # Set once a daily generation quota is spent: the jobs not yet started are left for the next run
+    generation_stopped = threading.Event()
+    uploads = {}
+
+    def run_job(run_date, lang):
+        if generation_stopped.is_set():
+            return 'deferred'
+        at = publish_at(run_date, publish_time)
+        try:
+            video_id = run_language(lang, render_pool, metadata_pool, credentials, backend, fresh, profile, shorts,
+                                    overlay, run_date, None, None, at)
+        except QuotaExceededError as e:
+            log_print("WARNING", f"[{lang} {run_date.isoformat()}] {str(e)}; leaving the rest for the next run")
+            if e.service == 'youtube':
+                return 'upload deferred'
+            generation_stopped.set()
+            return 'deferred'
+        if not video_id:
+            return 'rendered'
+        uploads[(run_date, lang)] = video_id
+        return 'scheduled' if at else 'uploaded'
+
+    results = {}
+    with span('scheduler', days=len(dates), langs=','.join(langs), backend=backend), \
+            ProcessPoolExecutor(max_workers=workers) as render_pool, \
+            ThreadPoolExecutor(max_workers=threads) as metadata_pool, \
+            ThreadPoolExecutor(max_workers=threads) as job_pool:
+        start_render_workers(render_pool, workers)
+        futures = {job: job_pool.submit(propagate(run_job), *job) for job in jobs}
+        # One job failing must not stop the others
+        for (run_date, lang), future in futures.items():
+            try:
+                results[(run_date, lang)] = future.result()
+            except Exception as e:
+                log_print("ERROR", f"[{lang} {run_date.isoformat()}] Pre-generation failed: {str(e)}")
+                results[(run_date, lang)] = e
+
+    add_to_playlist(credentials, None, {RunStore(lang, run_date): uploads[(run_date, lang)]
+                                        for run_date, lang in jobs if (run_date, lang) in uploads})
+    for status in results.values():
+        increment('pregenerated_videos', status=status if isinstance(status, str) else 'failed')
+
+    elapsed = time.monotonic() - started
+    failed = sum(1 for status in results.values() if not isinstance(status, str))
+    log_print("INFO", f"=== Pre-generation finished in {elapsed:.1f}s ({len(jobs) - failed}/{len(jobs)} without errors) ===")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate, render and schedule zodiac videos for the coming days.")
+    parser.add_argument('--start', type=date.fromisoformat, default=None, help='First date, YYYY-MM-DD (default: tomorrow)')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help=f'Number of dates from --start (default: {DEFAULT_DAYS})')
+    parser.add_argument('--lang', type=str, default='all', help="'all' or a comma separated list of: ta, en-in, hi")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('ZODIAC_RENDER_WORKERS', '0')) or None, help='Maximum render processes (default: CPU count)')
+    parser.add_argument('--lookahead', type=int, default=NETWORK_LOOKAHEAD, help='Jobs generating text and audio ahead of the renders (default: ZODIAC_SCHEDULER_LOOKAHEAD or 3)')
+    parser.add_argument('--backend', type=str, default='stream-copy', choices=list(RENDER_BACKENDS), help='Render backend passed to zodiac_video')
+    parser.add_argument('--profile', type=str, default=None, choices=list(ENCODE_PROFILES), help='Encode profile for the renders (default: ZODIAC_ENCODE_PROFILE or publish)')
+    parser.add_argument('--shorts', action='store_true', help='Also render a vertical Short per sign into each run directory')
+    parser.add_argument('--overlay', action='store_true', help='Show a card with the sign being read over each video (re-encodes the video)')
+    parser.add_argument('--publish-time', type=str, default=PUBLISH_TIME, help='Time of day (HH:MM, IST) each video goes public (default: ZODIAC_PUBLISH_TIME or 06:30)')
+    parser.add_argument('--skip-upload', action='store_true', help='Only render the videos; a later run schedules them')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the Gemini response cache; completed text and metadata stages are still reused (--fresh regenerates them)')
+    parser.add_argument('--fresh', action='store_true', help='Ignore completed stages in the run directories and start over')
+    parser.add_argument('--log-level', type=str, choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help='Minimum log level printed (default: ZODIAC_LOG_LEVEL or INFO)')
+    parser.add_argument('--trace-file', type=str, help='Append spans and log records as JSON lines (default: ZODIAC_TRACE_FILE)')
+    parser.add_argument('--metrics-file', type=str, help='Write a Prometheus textfile when the run ends (default: ZODIAC_METRICS_FILE)')
+    args = parser.parse_args()
+    if args.no_cache:
+        os.environ['ZODIAC_NO_CACHE'] = '1'
+    # Set through the environment so the render worker processes pick them up too
+    if args.log_level:
+        os.environ['ZODIAC_LOG_LEVEL'] = args.log_level
+    if args.trace_file:
+        os.environ['ZODIAC_TRACE_FILE'] = args.trace_file
+    if args.metrics_file:
+        os.environ['ZODIAC_METRICS_FILE'] = args.metrics_file
+
+    langs = list(LANGUAGES) if args.lang == 'all' else [lang.strip() for lang in args.lang.split(',')]
+    unknown = [lang for lang in langs if lang not in LANGUAGES]
+    if unknown:
+        parser.error(f"Unsupported language(s): {', '.join(unknown)}")
+    if args.days < 1:
+        parser.error("--days must be at least 1")
+    try:
+        publish_at(date.today(), args.publish_time)
+    except ValueError:
+        parser.error(f"--publish-time must be HH:MM, got {args.publish_time!r}")
+
+    dates = date_range(args.start or date.today() + timedelta(days=1), args.days)
+    try:
+        results = pregenerate(dates, langs, workers=args.workers, backend=args.backend, upload=not args.skip_upload,
+                              fresh=args.fresh, profile=args.profile, shorts=args.shorts, overlay=args.overlay,
+                              publish_time=args.publish_time, lookahead=args.lookahead)
+    finally:
+        write_metrics()
+    for (run_date, lang), status in results.items():
+        print(f"{run_date.isoformat()}  {lang:<6} {status if isinstance(status, str) else f'failed: {status}'}")
+    if any(not isinstance(status, str) for status in results.values()):
+        exit(1)
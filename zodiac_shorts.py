@@ -0,0 +1,166 @@
+from zodiac_audio import main as zodiac_audio_main, NarrationAudio, DOCUMENT_FILE, ZODIAC_LANGS
+from zodiac_video import mux_with_ffmpeg, validate_video_file, video_stage_key, SPEED_FACTOR, TEMPLATE_PATH
+from zodiac_ffmpeg import prepare_template_mezzanine, get_encode_profile, ENCODE_PROFILES
+from zodiac_document import document_serializer, SIGNS
+from zodiac_artifacts import RunStore
+from zodiac_cache import make_key
+from zodiac_telemetry import (log_print, span, increment, propagate, call_with_metrics, merge_metrics,
+                              write_metrics)
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import hashlib
+import json
+import os
+
+# One vertical Short per sign, cut from the day's narration. The template is reframed
+# and encoded once into a cached mezzanine that every sign stream-copies, so a Short
+# costs an audio encode and a remux rather than a video encode.
+
+SHORTS_FRAME = os.getenv('ZODIAC_SHORTS_FRAME', '1080x1920')
+# YouTube only treats videos up to a minute as Shorts
+SHORTS_MAX_SECONDS = 60.0
+SHORTS_WORKERS = int(os.getenv('ZODIAC_SHORTS_WORKERS', '4'))
+SHORTS_MANIFEST = 'shorts.json'
+
+def sign_clips(audio):
+    """
+    Slice narration built from a HoroscopeDocument into one NarrationAudio per sign.
+    Its segments are the header, the twelve signs in order and the footer.
+    """
+    if len(audio.segments) != len(SIGNS) + 2:
+        raise ValueError(f"Expected {len(SIGNS) + 2} narration segments (header, signs, footer), "
+                         f"got {len(audio.segments)}")
+    clips = []
+    for sign, (start, end) in zip(SIGNS, audio.segments[1:-1]):
+        clips.append((sign, NarrationAudio(audio.samples[start:end], audio.sample_rate, [(0, end - start)])))
+    return clips
+
+def short_filename(index, sign):
+    return f"short-{index + 1:02d}-{sign.lower()}.mp4"
+
+def short_speed(clip, speed):
+    """The requested speed, raised when needed to keep the clip within SHORTS_MAX_SECONDS."""
+    # Leave half a second for the mux to round the duration up
+    needed = clip.duration / (SHORTS_MAX_SECONDS - 0.5)
+    return max(speed, needed)
+
+def render_short(mezzanine_path, clip, speed, profile, output_path):
+    """Mux one sign's narration onto the shared mezzanine and write it to output_path."""
+    video_buffer = mux_with_ffmpeg(mezzanine_path, clip, speed, ['-c:v', 'copy'], profile)
+    data = video_buffer.getbuffer()
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return {'bytes': data.nbytes, 'sha256': hashlib.sha256(data).hexdigest()}
+
+def render_shorts(audio, output_dir, document=None, process_pool=None, speed=SPEED_FACTOR, video_path=None,
+                  profile=None, frame=None):
+    """
+    Render a Short per sign into output_dir and return the manifest describing them.
+    The reframed mezzanine is prepared once here; the per-sign muxes then run on
+    process_pool (folding worker metrics back in) or on a local thread pool.
+    document, when given, supplies each Short's title.
+    """
+    video_path = video_path or TEMPLATE_PATH
+    frame = frame or SHORTS_FRAME
+    profile = get_encode_profile(profile)
+    clips = sign_clips(audio)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with span('shorts', shorts=len(clips), frame=frame, profile=profile.name) as current:
+        validate_video_file(video_path)
+        mezzanine_path = prepare_template_mezzanine(video_path, profile, frame)
+
+        jobs = []
+        for index, (sign, clip) in enumerate(clips):
+            clip_speed = short_speed(clip, speed)
+            if clip_speed > speed:
+                log_print("WARNING", f"{sign} runs {clip.duration / speed:.1f}s at {speed}x; "
+                                     f"speeding it up to {clip_speed:.2f}x to stay a Short")
+            jobs.append((index, sign, clip, clip_speed, os.path.join(output_dir, short_filename(index, sign))))
+
+        log_print("INFO", f"Rendering {len(jobs)} Shorts at {frame} "
+                          f"({'process pool' if process_pool else f'{SHORTS_WORKERS} threads'})")
+        if process_pool:
+            futures = [process_pool.submit(call_with_metrics, render_short, mezzanine_path, clip, clip_speed,
+                                           profile, path) for _, _, clip, clip_speed, path in jobs]
+            results = []
+            for future in futures:
+                result, metrics = future.result()
+                merge_metrics(metrics)
+                results.append(result)
+        else:
+            with ThreadPoolExecutor(max_workers=min(SHORTS_WORKERS, len(jobs))) as pool:
+                results = list(pool.map(propagate(lambda job: render_short(mezzanine_path, job[2], job[3], profile, job[4])),
+                                        jobs))
+
+        shorts = []
+        for (index, sign, clip, clip_speed, path), result in zip(jobs, results):
+            entry = document.sign(sign) if document else None
+            shorts.append({
+                'sign': sign,
+                'title': entry.title if entry else sign,
+                'file': os.path.basename(path),
+                'seconds': round(clip.duration / clip_speed, 3),
+                'speed': round(clip_speed, 4),
+                'bytes': result['bytes'],
+                'sha256': result['sha256'],
+            })
+        total_bytes = sum(short['bytes'] for short in shorts)
+        current.set(output_bytes=total_bytes)
+    increment('shorts_rendered', len(shorts))
+    increment('video_bytes_encoded', total_bytes, backend='shorts')
+    log_print("INFO", f"Rendered {len(shorts)} Shorts ({total_bytes} bytes) into {output_dir}")
+    return {'frame': frame, 'profile': profile.name, 'speed': speed, 'shorts': shorts}
+
+def shorts_serializer():
+    """RunStore callbacks for render_shorts output: the Shorts are already in the run directory."""
+    def save(manifest, store):
+        with open(store.path(SHORTS_MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        return [SHORTS_MANIFEST] + [short['file'] for short in manifest['shorts']]
+
+    def load(store):
+        with open(store.path(SHORTS_MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return save, load
+
+def shorts_stage_key(store, speed=SPEED_FACTOR, video_path=None, profile=None, frame=None):
+    """RunStore input hash for the shorts stage: the video stage's inputs plus the Shorts settings."""
+    return make_key(video_stage_key(store, 'shorts', speed, video_path, profile), frame or SHORTS_FRAME,
+                    SHORTS_MAX_SECONDS)
+
+def shorts_stage(store, audio, process_pool=None, profile=None, video_path=None):
+    """Checkpointed render_shorts into the store's run directory, titled from its text stage."""
+    video_path = video_path or TEMPLATE_PATH
+    document = document_serializer(DOCUMENT_FILE)[1](store)
+    return store.checkpoint(
+        'shorts', shorts_stage_key(store, video_path=video_path, profile=profile),
+        lambda: render_shorts(audio, store.directory, document, process_pool, video_path=video_path, profile=profile),
+        *shorts_serializer())
+
+def main(lang_code=0, store=None, profile=None, video_path=None):
+    """Generate today's narration for lang_code (or load it from store) and render its Shorts."""
+    log_print("INFO", "=== Starting Zodiac Shorts Generation Process ===")
+    store = store or RunStore(ZODIAC_LANGS[lang_code])
+    audio = zodiac_audio_main(lang_code, store=store)
+    manifest = shorts_stage(store, audio, profile=profile, video_path=video_path)
+    log_print("INFO", f"=== Zodiac Shorts Generation Completed: {len(manifest['shorts'])} Shorts in {store.directory} ===")
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render one vertical Short per zodiac sign.")
+    parser.add_argument('--lang', type=str, default='ta', choices=['ta', 'en-in', 'hi'], help='Language code: ta for Tamil, en-in for English, hi for Hindi')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the Gemini response cache; completed text and metadata stages are still reused (--fresh regenerates them)')
+    parser.add_argument('--fresh', action='store_true', help="Ignore today's completed stages in the run directory and start over")
+    parser.add_argument('--profile', type=str, default=None, choices=list(ENCODE_PROFILES), help='Encode profile for the Shorts (default: ZODIAC_ENCODE_PROFILE or publish)')
+    args = parser.parse_args()
+    if args.no_cache:
+        os.environ['ZODIAC_NO_CACHE'] = '1'
+    lang_map = {'ta': 0, 'en-in': 1, 'hi': 2}
+    try:
+        store = RunStore(args.lang)
+        if args.fresh:
+            store.reset()
+        main(lang_map[args.lang], store=store, profile=args.profile)
+    finally:
+        write_metrics()
@@ -0,0 +1,236 @@
+import contextvars
+import functools
+import itertools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Shared logging, timing spans and metrics for every zodiac module.
+# Human-readable lines go to stdout as before. With ZODIAC_TRACE_FILE set, every log
+# record and finished span is also appended there as one JSON object per line, and
+# with ZODIAC_METRICS_FILE set, write_metrics() leaves a Prometheus textfile there.
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+_current_span = contextvars.ContextVar('zodiac_span', default=None)
+_span_ids = itertools.count(1)
+_lock = threading.Lock()
+_counters = {}
+_span_totals = {}
+_trace_fd = None
+_trace_pid = None
+
+def log_level():
+    """Minimum level printed; ZODIAC_LOG_LEVEL=DEBUG brings back the per-line detail."""
+    return LEVELS.get(os.getenv('ZODIAC_LOG_LEVEL', 'INFO').upper(), LEVELS['INFO'])
+
+def _trace(record):
+    """Append one JSON line to the trace file, if one is configured."""
+    global _trace_fd, _trace_pid
+    path = os.getenv('ZODIAC_TRACE_FILE')
+    if not path:
+        return
+    line = (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+    with _lock:
+        # One O_APPEND descriptor per process and a single write per record, so render
+        # workers and threads can share the file without interleaving lines
+        if _trace_fd is None or _trace_pid != os.getpid():
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            _trace_fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            _trace_pid = os.getpid()
+        os.write(_trace_fd, line)
+
+def log_print(level, message, *args):
+    """
+    Print a timestamped log line. With args, message is a %-format string that is only
+    formatted when the level is enabled, so hot DEBUG calls cost almost nothing.
+    """
+    if LEVELS.get(level, LEVELS['INFO']) < log_level():
+        return
+    if args:
+        message = message % args
+    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} [{level}] {message}")
+    span = _current_span.get()
+    _trace({'type': 'log', 'ts': time.time(), 'level': level, 'message': message,
+            'span': span.id if span else None, 'pid': os.getpid()})
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def increment(name, value=1, **labels):
+    """Add value to a counter, e.g. increment('gemini_requests', kind='async')."""
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def counter_value(name, **labels):
+    with _lock:
+        return _counters.get((name, _label_key(labels)), 0)
+
+class Span:
+    """One timed unit of work; spans nest through a context variable."""
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.id = f"{os.getpid()}-{next(_span_ids)}"
+        parent = _current_span.get()
+        self.parent = parent.id if parent else None
+        self.seconds = None
+
+    def set(self, **attrs):
+        """Attach attributes discovered while the span runs (sizes, cache outcome, ...)."""
+        self.attrs.update(attrs)
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block as a named span: with span('tts.block', lang=lang) as s: ...
+    Finished spans are traced with their duration, status, parent and peak RSS,
+    and add to the per-name duration summary in the metrics.
+    """
+    current = Span(name, attrs)
+    token = _current_span.set(current)
+    started_at = time.time()
+    started = time.perf_counter()
+    status, error = 'ok', None
+    try:
+        yield current
+    except BaseException as e:
+        status, error = 'error', f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.seconds = time.perf_counter() - started
+        _current_span.reset(token)
+        peak = peak_rss_bytes()
+        with _lock:
+            total = _span_totals.setdefault(name, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += current.seconds
+            total[2] = max(total[2], peak)
+        log_print("DEBUG", "Span %s finished in %.3fs (%s)", name, current.seconds, status)
+        _trace({'type': 'span', 'ts': started_at, 'name': name, 'id': current.id, 'parent': current.parent,
+                'seconds': round(current.seconds, 6), 'status': status, 'error': error,
+                'attrs': current.attrs, 'peak_rss_mb': round(peak / (1024 * 1024), 1),
+                'pid': os.getpid(), 'thread': threading.current_thread().name})
+
+def traced(name=None, **attrs):
+    """Decorator form of span(); the span is named after the function by default."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name or function.__qualname__, **attrs):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def propagate(function):
+    """
+    Wrap function so it runs under the caller's current span when handed to a thread pool;
+    worker threads otherwise start with no parent span.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # A Context can only be entered by one thread at a time, so each call gets a copy
+        return context.copy().run(function, *args, **kwargs)
+    return wrapper
+
+def _snapshot():
+    with _lock:
+        return dict(_counters), {name: list(total) for name, total in _span_totals.items()}
+
+def call_with_metrics(function, *args, **kwargs):
+    """
+    Run function and return (value, metrics recorded during the call). Submit this to a
+    process pool and pass the metrics to merge_metrics() so worker counters and span
+    timings reach the parent's textfile.
+    """
+    counters_before, spans_before = _snapshot()
+    value = function(*args, **kwargs)
+    counters_after, spans_after = _snapshot()
+    counters = {key: value - counters_before.get(key, 0) for key, value in counters_after.items()
+                if value != counters_before.get(key, 0)}
+    spans = {}
+    for name, (count, seconds, peak) in spans_after.items():
+        before = spans_before.get(name, [0, 0.0, 0])
+        if count != before[0]:
+            spans[name] = [count - before[0], seconds - before[1], peak]
+    return value, (counters, spans)
+
+def merge_metrics(metrics):
+    """Add metrics returned by call_with_metrics() in another process to this process's."""
+    counters, spans = metrics
+    with _lock:
+        for key, value in counters.items():
+            _counters[key] = _counters.get(key, 0) + value
+        for name, (count, seconds, peak) in spans.items():
+            total = _span_totals.setdefault(name, [0, 0.0, 0])
+            total[0] += count
+            total[1] += seconds
+            total[2] = max(total[2], peak)
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def metrics_text():
+    """Render counters, span summaries and peak memory in the Prometheus text format."""
+    with _lock:
+        counters = dict(_counters)
+        spans = {name: list(total) for name, total in _span_totals.items()}
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE zodiac_{name}_total counter")
+        for (counter, labels), value in sorted(counters.items()):
+            if counter == name:
+                lines.append(f"zodiac_{name}_total{_labels(labels)} {value}")
+    if spans:
+        lines.append("# TYPE zodiac_span_duration_seconds summary")
+        for name, (count, seconds, _) in sorted(spans.items()):
+            lines.append(f"zodiac_span_duration_seconds_sum{_labels([('span', name)])} {seconds:.6f}")
+            lines.append(f"zodiac_span_duration_seconds_count{_labels([('span', name)])} {count}")
+        lines.append("# TYPE zodiac_span_peak_rss_bytes gauge")
+        for name, (_, _, peak) in sorted(spans.items()):
+            lines.append(f"zodiac_span_peak_rss_bytes{_labels([('span', name)])} {peak}")
+    lines.append("# TYPE zodiac_peak_rss_bytes gauge")
+    lines.append(f"zodiac_peak_rss_bytes {peak_rss_bytes()}")
+    lines.append("# TYPE zodiac_last_run_timestamp_seconds gauge")
+    lines.append(f"zodiac_last_run_timestamp_seconds {time.time():.0f}")
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(path=None):
+    """
+    Write the metrics as a Prometheus textfile (for node_exporter's textfile collector)
+    to path or ZODIAC_METRICS_FILE. Render workers keep their own counters, so call this
+    from the process that ran the stages you want to see.
+    """
+    path = path or os.getenv('ZODIAC_METRICS_FILE')
+    if not path:
+        return None
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # The collector may read at any moment, so never expose a half-written file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(metrics_text())
+    os.replace(temp_path, path)
+    log_print("INFO", f"Metrics written to {path}")
+    return path
@@ -1,10 +1,19 @@
-import google.generativeai as genai
 import textwrap
+import asyncio
+import concurrent.futures
+import contextvars
+import copy
+import json
 import os
-from datetime import datetime
-
-def log_print(level, message):
-    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} [{level}] {message}")
+import random
+import threading
+import time
+import weakref
+from datetime import date
+from zodiac_cache import DiskCache, cache_enabled, make_key
+from zodiac_telemetry import log_print, span, increment
+from zodiac_quota import budget
+from zodiac_document import parse_horoscope, SIGN_NAMES, SIGNS
 
 prompt_en = """TL;DR: Generate today's Zodiac Result summaries in English language.
 
@@ -54,17 +63,78 @@ Requirements and rules:
 
 Please proceed with generating the Zodiac Result summaries."""
 
-# Configure the API with your key from environment variable
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if not GEMINI_API_KEY:
-    raise RuntimeError("GEMINI_API_KEY environment variable not set!")
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
+
+GENERATION_CONFIG = {
+    "temperature": 0.7,  # Controls randomness (0.0 to 1.0)
+    "top_p": 0.9,       # Nucleus sampling parameter
+    "top_k": 40,        # Top-k sampling parameter
+    "max_output_tokens": 2048,  # Maximum length of response
+}
+
+SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+]
+
+# Request limits for the Gemini client
+GEMINI_MAX_CONCURRENCY = int(os.getenv('ZODIAC_GEMINI_CONCURRENCY', '4'))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv('ZODIAC_GEMINI_TIMEOUT', '120'))
+GEMINI_MAX_RETRIES = int(os.getenv('ZODIAC_GEMINI_RETRIES', '4'))
+GEMINI_BACKOFF_SECONDS = 1.0
+GEMINI_RATE_LIMIT_BACKOFF_SECONDS = 5.0
+GEMINI_MAX_BACKOFF_SECONDS = 60.0
+
+# Raw Gemini responses, keyed by prompt, model, generation config and calendar date,
+# so a re-run on the same day replays the original narration and metadata
+response_cache = DiskCache(
+    'gemini',
+    max_bytes=int(os.getenv('ZODIAC_GEMINI_CACHE_BYTES', str(50 * 1024 * 1024))),
+    ttl_seconds=int(os.getenv('ZODIAC_GEMINI_CACHE_TTL', str(7 * 24 * 3600))),
+)
+
+# Models are built once per (model name, generation config) and shared by every
+# call in the process; GenerativeModel holds no per-request state
+_model_pool = {}
+_model_pool_lock = threading.Lock()
+_gemini_configured = False
+model_pool_stats = {'created': 0, 'reused': 0}
 
-log_print("INFO", "Configuring Gemini API with environment variable")
-genai.configure(api_key=GEMINI_API_KEY)
+def configure_gemini():
+    """Configure the API with your key from environment variable, once per process."""
+    global _gemini_configured
+    with _model_pool_lock:
+        if _gemini_configured:
+            return
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise RuntimeError("GEMINI_API_KEY environment variable not set!")
+
+        log_print("INFO", "Configuring Gemini API with environment variable")
+        # The SDK takes about a second to import, so it is only loaded once a request is made
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        _gemini_configured = True
 
 def list_available_models():
     """List all available models."""
     log_print("INFO", "Listing available Gemini models")
+    configure_gemini()
+    import google.generativeai as genai
     try:
         for m in genai.list_models():
             log_print("DEBUG", f"Model: {m.name}")
@@ -76,48 +146,38 @@ def list_available_models():
         log_print("ERROR", f"Error listing models: {str(e)}")
         raise
 
-def setup_model():
+def setup_model(generation_config=None, model_name=GEMINI_MODEL_NAME):
     """Set up the Gemini model with optimized parameters."""
     log_print("INFO", "Setting up Gemini model with optimized parameters")
-    generation_config = {
-        "temperature": 0.7,  # Controls randomness (0.0 to 1.0)
-        "top_p": 0.9,       # Nucleus sampling parameter
-        "top_k": 40,        # Top-k sampling parameter
-        "max_output_tokens": 2048,  # Maximum length of response
-    }
-    
-    safety_settings = [
-        {
-            "category": "HARM_CATEGORY_HARASSMENT",
-            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-        },
-        {
-            "category": "HARM_CATEGORY_HATE_SPEECH",
-            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-        },
-        {
-            "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-        },
-        {
-            "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-            "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-        },
-    ]
-    
+    import google.generativeai as genai
     model = genai.GenerativeModel(
-        model_name="gemini-2.0-flash",
-        generation_config=generation_config,
-        safety_settings=safety_settings
+        model_name=model_name,
+        generation_config=copy.deepcopy(generation_config or GENERATION_CONFIG),
+        safety_settings=SAFETY_SETTINGS
     )
     
     log_print("INFO", "Gemini model setup completed successfully")
     return model
 
+def get_model(generation_config=None, model_name=GEMINI_MODEL_NAME):
+    """Return the shared model for this name and config, creating it on first use."""
+    configure_gemini()
+    key = make_key(model_name, generation_config or GENERATION_CONFIG)
+    with _model_pool_lock:
+        model = _model_pool.get(key)
+        if model is None:
+            model = setup_model(generation_config, model_name)
+            _model_pool[key] = model
+            model_pool_stats['created'] += 1
+        else:
+            model_pool_stats['reused'] += 1
+        log_print("DEBUG", "Gemini model pool: %d created, %d reused", model_pool_stats['created'], model_pool_stats['reused'])
+    return model
+
 def format_response(text):
     """Format the response text for better readability."""
     log_print("DEBUG", "Starting text formatting process")
-    log_print("DEBUG", f"Original text length: {len(text)} characters")
+    log_print("DEBUG", "Original text length: %d characters", len(text))
     
     # Split the text into lines
     lines = text.split('\n')
@@ -133,7 +193,7 @@ def format_response(text):
             line.startswith("Today's horoscope results:") or
             line.startswith('आज का राशिफल परिणाम:')):
             formatted_lines.append(line)
-            log_print("DEBUG", f"Added title line: {line[:50]}...")
+            log_print("DEBUG", "Added title line: %s...", line[:50])
             continue
             
         # Handle the social media lines (different languages)
@@ -141,7 +201,7 @@ def format_response(text):
             'To know daily horoscope results' in line or
             'ऐसे जानें दैनिक राशिफल' in line):
             formatted_lines.append(line)
-            log_print("DEBUG", f"Added social media line: {line[:50]}...")
+            log_print("DEBUG", "Added social media line: %s...", line[:50])
             continue
             
         # Format zodiac sign lines
@@ -154,39 +214,266 @@ def format_response(text):
                 # Wrap the content with proper indentation
                 wrapped_content = textwrap.fill(content.strip(), width=75, initial_indent='  ', subsequent_indent='  ')
                 formatted_lines.append(wrapped_content)
-                log_print("DEBUG", f"Formatted zodiac line {i+1}: {title.strip()[:30]}...")
+                log_print("DEBUG", "Formatted zodiac line %d: %s...", i+1, title.strip()[:30])
             else:
                 formatted_lines.append(line)
-                log_print("DEBUG", f"Added unformatted line {i+1}: {line[:50]}...")
+                log_print("DEBUG", "Added unformatted line %d: %s...", i+1, line[:50])
         else:
             formatted_lines.append(line)
-            log_print("DEBUG", f"Added simple line {i+1}: {line[:50]}...")
+            log_print("DEBUG", "Added simple line %d: %s...", i+1, line[:50])
     
     formatted_text = '\n'.join(formatted_lines)
     log_print("INFO", f"Text formatting completed. Final length: {len(formatted_text)} characters")
     return formatted_text
 
-def get_gemini_response(prompt):
-    """Get response from Gemini API for the given prompt."""
+class GeminiError(Exception):
+    """A Gemini request failed and should not be retried (bad request, blocked response, ...)."""
+
+class GeminiTransientError(GeminiError):
+    """A Gemini request failed in a way that is worth retrying (5xx, dropped connection)."""
+
+class GeminiRateLimitError(GeminiTransientError):
+    """Gemini rejected the request for quota or rate-limit reasons (HTTP 429)."""
+
+class GeminiTimeoutError(GeminiTransientError):
+    """A Gemini request did not finish within its per-call timeout."""
+
+def classify_gemini_error(error):
+    """Map an exception raised by the Gemini SDK onto the typed errors above."""
+    if isinstance(error, GeminiError):
+        return error
+    from google.api_core import exceptions as google_exceptions
+    if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return GeminiRateLimitError(str(error))
+    if isinstance(error, (asyncio.TimeoutError, google_exceptions.DeadlineExceeded)):
+        return GeminiTimeoutError(str(error) or "Gemini request timed out")
+    if isinstance(error, (google_exceptions.ServiceUnavailable, google_exceptions.InternalServerError,
+                          google_exceptions.BadGateway, google_exceptions.GatewayTimeout, ConnectionError)):
+        return GeminiTransientError(str(error))
+    return GeminiError(str(error))
+
+def backoff_delay(attempt, error):
+    """Full-jitter exponential backoff; rate limits start from a longer base delay."""
+    base = GEMINI_RATE_LIMIT_BACKOFF_SECONDS if isinstance(error, GeminiRateLimitError) else GEMINI_BACKOFF_SECONDS
+    return random.uniform(0, min(GEMINI_MAX_BACKOFF_SECONDS, base * (2 ** attempt)))
+
+def _response_text(response):
+    """Return the text of a Gemini response, raising GeminiError if it was blocked or empty."""
+    try:
+        return response.text
+    except ValueError as e:
+        raise GeminiError(f"Gemini returned no usable text: {str(e)}")
+
+def estimated_tokens(prompt, generation_config):
+    """A request's tokens for the tokens-per-minute budget: about 4 characters a token in, plus the most it may generate."""
+    return len(prompt) // 4 + generation_config.get('max_output_tokens', 0)
+
+def _cache_key(prompt, generation_config, for_date):
+    return make_key(prompt, GEMINI_MODEL_NAME, generation_config, for_date.isoformat())
+
+def _cached_text(key, use_cache, for_date):
+    if use_cache is None:
+        use_cache = cache_enabled()
+    if not use_cache:
+        return None
+    cached = response_cache.get(key)
+    if cached is None:
+        return None
+    log_print("INFO", f"Using cached Gemini response for {for_date.isoformat()} ({len(cached)} bytes)")
+    return cached.decode('utf-8')
+
+def _store_text(key, text):
+    log_print("INFO", "Received response from Gemini API")
+    log_print("DEBUG", "Raw response length: %d characters", len(text))
+    increment('gemini_response_chars', len(text))
+    # Stored even when bypassing, so the next cached run replays this response
+    response_cache.set(key, text.encode('utf-8'))
+    return text
+
+def generate_text(prompt, use_cache=None, for_date=None, generation_config=None,
+                  timeout=GEMINI_TIMEOUT_SECONDS, max_retries=GEMINI_MAX_RETRIES):
+    """
+    Return Gemini's raw text for the prompt, served from the response cache when possible.
+    The cache is used unless use_cache is False or ZODIAC_NO_CACHE is set. Rate-limit and
+    transient failures are retried with backoff; anything else raises a GeminiError.
+    """
+    generation_config = generation_config or GENERATION_CONFIG
+    for_date = for_date or date.today()
+    key = _cache_key(prompt, generation_config, for_date)
+    cached = _cached_text(key, use_cache, for_date)
+    if cached is not None:
+        return cached
+
+    model = get_model(generation_config)
+    for attempt in range(max_retries + 1):
+        # Outside the try: a spent daily quota is not a Gemini error to retry
+        budget('gemini').acquire(tokens=estimated_tokens(prompt, generation_config))
+        try:
+            log_print("INFO", "Sending request to Gemini API...")
+            increment('gemini_requests', mode='sync')
+            with span('gemini.request', mode='sync', attempt=attempt + 1, prompt_chars=len(prompt)):
+                response = model.generate_content(prompt, request_options={"timeout": timeout})
+            return _store_text(key, _response_text(response))
+        except Exception as e:
+            error = classify_gemini_error(e)
+            increment('gemini_errors', error=type(error).__name__)
+            if not isinstance(error, GeminiTransientError) or attempt == max_retries:
+                raise error from e
+            increment('gemini_retries')
+            delay = backoff_delay(attempt, error)
+            log_print("WARNING", f"{type(error).__name__} on attempt {attempt + 1}/{max_retries + 1}, retrying in {delay:.1f}s: {str(error)}")
+            time.sleep(delay)
+
+# One semaphore per event loop bounds the number of in-flight Gemini requests
+_semaphores = weakref.WeakKeyDictionary()
+
+def _get_semaphore():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+async def generate_text_async(prompt, use_cache=None, for_date=None, generation_config=None,
+                              timeout=GEMINI_TIMEOUT_SECONDS, max_retries=GEMINI_MAX_RETRIES):
+    """
+    Async version of generate_text. At most GEMINI_MAX_CONCURRENCY requests run at once
+    per event loop; each attempt is bounded by timeout and retried with jittered backoff.
+    """
+    generation_config = generation_config or GENERATION_CONFIG
+    for_date = for_date or date.today()
+    key = _cache_key(prompt, generation_config, for_date)
+    cached = _cached_text(key, use_cache, for_date)
+    if cached is not None:
+        return cached
+
+    model = get_model(generation_config)
+    semaphore = _get_semaphore()
+    for attempt in range(max_retries + 1):
+        await budget('gemini').acquire_async(tokens=estimated_tokens(prompt, generation_config))
+        try:
+            async with semaphore:
+                log_print("INFO", "Sending async request to Gemini API...")
+                increment('gemini_requests', mode='async')
+                with span('gemini.request', mode='async', attempt=attempt + 1, prompt_chars=len(prompt)):
+                    response = await asyncio.wait_for(model.generate_content_async(prompt), timeout)
+            return _store_text(key, _response_text(response))
+        except Exception as e:
+            error = classify_gemini_error(e)
+            increment('gemini_errors', error=type(error).__name__)
+            if not isinstance(error, GeminiTransientError) or attempt == max_retries:
+                raise error from e
+            increment('gemini_retries')
+            # Back off outside the semaphore so waiting retries don't hold a slot
+            delay = backoff_delay(attempt, error)
+            log_print("WARNING", f"{type(error).__name__} on attempt {attempt + 1}/{max_retries + 1}, retrying in {delay:.1f}s: {str(error)}")
+            await asyncio.sleep(delay)
+
+async def generate_many_async(prompts, **kwargs):
+    """Run many prompts concurrently; the result list holds text or the GeminiError for each prompt."""
+    return await asyncio.gather(*(generate_text_async(prompt, **kwargs) for prompt in prompts),
+                                return_exceptions=True)
+
+# Every async Gemini call runs on one long-lived event loop. The SDK creates its async
+# client on first use and binds it to the running loop, so with the pooled models a
+# loop per call (asyncio.run) fails from the second call on with a closed loop
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+def gemini_loop():
+    """The process's Gemini event loop, running on a daemon thread; started on first use."""
+    global _loop, _loop_pid
+    with _loop_lock:
+        # A forked child inherits the loop but not the thread running it
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name='gemini-loop', daemon=True).start()
+        return _loop
+
+def run_on_gemini_loop(coroutine):
+    """Run coroutine on the Gemini loop from any other thread and return its result, under the caller's span."""
+    loop = gemini_loop()
+    done = concurrent.futures.Future()
+
+    def on_done(task):
+        if task.cancelled():
+            done.cancel()
+        elif task.exception() is not None:
+            done.set_exception(task.exception())
+        else:
+            done.set_result(task.result())
+
+    def start():
+        loop.create_task(coroutine).add_done_callback(on_done)
+
+    # The task copies the context start() runs in, which is the caller's
+    loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+    return done.result()
+
+def generate_many(prompts, **kwargs):
+    """Blocking wrapper around generate_many_async for synchronous callers, on the shared Gemini loop."""
+    return run_on_gemini_loop(generate_many_async(prompts, **kwargs))
+
+def generate_json(prompt, response_schema, use_cache=None, for_date=None):
+    """Ask Gemini for a JSON response constrained to response_schema and return it parsed."""
+    generation_config = dict(GENERATION_CONFIG, response_mime_type="application/json", response_schema=response_schema)
+    text = generate_text(prompt, use_cache=use_cache, for_date=for_date, generation_config=generation_config)
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise GeminiError(f"Gemini returned invalid JSON: {str(e)}")
+
+def get_gemini_response(prompt, use_cache=None):
+    """Get response from Gemini API for the given prompt. Raises GeminiError on failure."""
     log_print("INFO", "Initiating Gemini API request")
-    log_print("DEBUG", f"Prompt length: {len(prompt)} characters")
-    
-    model = setup_model()
+    log_print("DEBUG", "Prompt length: %d characters", len(prompt))
     
     try:
-        log_print("INFO", "Sending request to Gemini API...")
-        response = model.generate_content(prompt)
-        log_print("INFO", "Received response from Gemini API")
-        log_print("DEBUG", f"Raw response length: {len(response.text)} characters")
+        text = generate_text(prompt, use_cache=use_cache)
         
-        formatted_response = format_response(response.text)
+        formatted_response = format_response(text)
         log_print("INFO", "Successfully processed Gemini response")
         return formatted_response
-    except Exception as e:
+    except GeminiError as e:
         log_print("ERROR", f"Error getting Gemini response: {str(e)}")
-        return f"An error occurred: {str(e)}"
+        raise
+
+def repair_prompt(prompt, lang, missing):
+    """The original prompt narrowed to the signs a generation left out."""
+    names = ', '.join(SIGN_NAMES[lang][SIGNS.index(name)] for name in missing)
+    return f"{prompt}\n\nOnly generate the Zodiac Result summaries for these zodiac signs: {names}."
 
-def main(lang):
+def dated_prompt(prompt, for_date):
+    """The prompt for the horoscope of for_date, which need not be today."""
+    return f"{prompt}\n\nThe Zodiac Results are for {for_date.strftime('%A %d %B %Y')}."
+
+def get_horoscope_document(prompt, lang, use_cache=None, max_repairs=1, for_date=None):
+    """
+    Generate the horoscope and parse it into a validated HoroscopeDocument. Signs missing
+    from the response are requested again on their own, up to max_repairs times, so a
+    malformed generation fails here with a HoroscopeDocumentError instead of mid-render.
+    """
+    for_date = for_date or date.today()
+    prompt = dated_prompt(prompt, for_date)
+    text = generate_text(prompt, use_cache=use_cache, for_date=for_date)
+    with span('text.parse', lang=lang) as current:
+        document = parse_horoscope(text, lang)
+        current.set(signs=len(document.signs), repairs=len(document.repairs))
+    for attempt in range(max_repairs):
+        missing = document.missing_signs()
+        if not missing:
+            break
+        log_print("WARNING", f"Horoscope is missing {', '.join(missing)}; requesting them again")
+        increment('document_regenerations', lang=lang)
+        document.merge(parse_horoscope(generate_text(repair_prompt(prompt, lang, missing), use_cache=use_cache,
+                                                     for_date=for_date), lang))
+    return document.validate()
+
+def main(lang, for_date=None):
+    """Generate the horoscope of for_date (today by default) for lang ('ta', 'en-in' or 'hi') as a HoroscopeDocument."""
     log_print("INFO", "=== Starting Zodiac Text Generation Process ===")
     log_print("INFO", f"Selected language: {lang}")
 
@@ -204,14 +491,11 @@ def main(lang):
         raise ValueError(f"Unsupported language: {lang}")
     
     log_print("INFO", "Generating zodiac content with Gemini AI...")
-    response = get_gemini_response(prompt)
-    
-    if response.startswith("An error occurred"):
-        log_print("ERROR", "Failed to generate zodiac content")
-        return response
+    with span('text', lang=lang):
+        document = get_horoscope_document(prompt, lang, for_date=for_date)
     
     log_print("INFO", "=== Zodiac Text Generation Completed Successfully ===")
-    return response
+    return document
 
 # if __name__ == "__main__":
 #     main(ta)
\ No newline at end of file
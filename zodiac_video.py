@@ -1,91 +1,88 @@
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
-from zodiac_audio import main as zodiac_audio_main
-import librosa
-import soundfile as sf
+from zodiac_audio import main as zodiac_audio_main, DOCUMENT_FILE
+from zodiac_ffmpeg import (prepare_template_mezzanine, run_ffmpeg, atempo_filter, file_sha256,
+                           probe_media, get_video_fps, get_video_size, get_encode_profile, ENCODE_PROFILES)
+from dataclasses import asdict
+from zodiac_artifacts import RunStore, bytes_serializer
+from zodiac_document import document_serializer
+from zodiac_overlay import build_overlay_track, overlay_key
+from zodiac_cache import make_key
 import math
 import io
+import subprocess
 import tempfile
 import os
-from datetime import datetime
+from zodiac_telemetry import log_print, span, increment, write_metrics
+from zodiac_dsp import master, db_to_gain, LOUDNESS_TARGET_LUFS, TRUE_PEAK_CEILING_DB, COMPRESSOR_ENABLED
 import argparse
 import numpy as np
 
-def log_print(level, message):
-    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} [{level}] {message}")
+TEMPLATE_PATH = "template.mp4"
+SPEED_FACTOR = 1.5  # 1.5x speed (change this value as needed)
 
-def change_audio_speed(input_buffer, speed_factor=1.0):
+# Output file for each language code
+OUTPUT_FILES = {0: "output_video.mp4", 1: "output_video_1.mp4", 2: "output_video_2.mp4"}
+
+def stretch_with_atempo(samples, sample_rate, speed_factor):
+    """Time-stretch with ffmpeg's atempo (WSOLA), piping raw float32 samples in and out."""
+    pcm = run_ffmpeg([
+        '-f', 'f32le',
+        '-ar', str(sample_rate),
+        '-ac', '1',
+        '-i', 'pipe:0',
+        '-filter:a', atempo_filter(speed_factor),
+        '-f', 'f32le',
+        'pipe:1',
+    ], input_bytes=memoryview(np.ascontiguousarray(samples, dtype=np.float32)).cast('B'))
+    return np.frombuffer(pcm, dtype=np.float32)
+
+def stretch_with_phase_vocoder(samples, sample_rate, speed_factor):
+    """Time-stretch with librosa's STFT phase vocoder (slower, the original engine)."""
+    import librosa
+    return librosa.effects.time_stretch(samples, rate=speed_factor)
+
+# Time-stretch engines: (float32 samples, sample rate, speed_factor) -> float32 samples
+TIME_STRETCH_ENGINES = {
+    'atempo': stretch_with_atempo,
+    'phase-vocoder': stretch_with_phase_vocoder,
+}
+TIME_STRETCH_ENGINE = os.getenv('ZODIAC_TIME_STRETCH', 'atempo')
+
+def change_audio_speed(audio, speed_factor=1.0, engine=None):
     """
-    Change the playback speed of an audio buffer using librosa and return the audio data.
+    Change the playback speed of decoded narration audio and return new NarrationAudio.
+    Nothing is encoded or written to disk; engine selects a TIME_STRETCH_ENGINES entry.
     """
+    engine = engine or TIME_STRETCH_ENGINE
     log_print("INFO", "=== Starting Audio Speed Change Process ===")
-    log_print("INFO", f"Speed factor: {speed_factor}x")
+    log_print("INFO", f"Speed factor: {speed_factor}x, engine: {engine}")
     
     try:
-        log_print("INFO", "Creating temporary audio file for processing")
-        # Create a temporary file from the audio buffer
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            temp_file.write(input_buffer.read())
-            temp_file_path = temp_file.name
+        if engine not in TIME_STRETCH_ENGINES:
+            raise ValueError(f"Unsupported time-stretch engine: {engine}")
+
+        log_print("INFO", f"Audio received. Duration: {audio.duration:.2f}s, Sample rate: {audio.sample_rate}Hz")
+
+        with span('audio.stretch', engine=engine, speed=speed_factor):
+            y_stretched = TIME_STRETCH_ENGINES[engine](audio.samples, audio.sample_rate, speed_factor)
+        log_print("INFO", f"Audio stretching completed using {engine}")
         
-        try:
-            log_print("INFO", "Loading audio file with librosa")
-            # Load the audio file
-            y, sr = librosa.load(temp_file_path, sr=None)
-            log_print("INFO", f"Audio loaded successfully. Duration: {len(y)/sr:.2f}s, Sample rate: {sr}Hz")
-            
-            # Use librosa's time_stretch with the correct parameter name
-            # In newer versions of librosa, the parameter is 'rate' not 'rate'
-            try:
-                log_print("INFO", "Attempting to stretch audio using librosa.effects.time_stretch")
-                # Try the newer librosa version approach
-                y_stretched = librosa.effects.time_stretch(y, rate=speed_factor)
-                log_print("INFO", "Audio stretching completed using primary method")
-            except TypeError:
-                log_print("WARNING", "Primary stretching method failed, trying fallback")
-                # Fallback for older versions or different parameter names
-                try:
-                    y_stretched = librosa.effects.time_stretch(y, rate=speed_factor)
-                    log_print("INFO", "Audio stretching completed using fallback method 1")
-                except:
-                    log_print("WARNING", "Fallback method 1 failed, using simple resampling approach")
-                    # If all else fails, use a simple resampling approach
-                    print("Using fallback method for audio speed change")
-                    new_length = int(len(y) / speed_factor)
-                    y_stretched = librosa.util.fix_length(y, size=new_length)
-                    log_print("INFO", "Audio stretching completed using simple resampling")
-            
-            # Normalize and boost audio volume
-            log_print("INFO", "Normalizing and boosting audio volume")
-            # Normalize to prevent clipping
-            y_normalized = librosa.util.normalize(y_stretched)
-            # Boost volume by multiplying by a factor (adjust this value as needed)
-            volume_boost = 2.0  # Increase this value to make audio louder
-            y_boosted = y_normalized * volume_boost
-            # Clip to prevent distortion
-            y_boosted = np.clip(y_boosted, -1.0, 1.0)
-            log_print("INFO", f"Audio volume boosted by {volume_boost}x factor")
-            
-            # Save to bytes buffer instead of file
-            log_print("INFO", "Converting stretched audio to buffer")
-            audio_buffer = io.BytesIO()
-            sf.write(audio_buffer, y_boosted, sr, format='WAV')
-            audio_buffer.seek(0)
-            
-            buffer_size = len(audio_buffer.getvalue())
-            log_print("INFO", f"Audio buffer created. Size: {buffer_size} bytes")
-            log_print("INFO", f"Original duration: {len(y)/sr:.2f}s, New duration: {len(y_stretched)/sr:.2f}s")
-            log_print("INFO", "=== Audio Speed Change Completed Successfully ===")
-            return audio_buffer
-            
-        finally:
-            # Clean up temporary file
-            log_print("INFO", "Cleaning up temporary audio file")
-            os.unlink(temp_file_path)
+        stretched = master_narration(audio.with_samples(y_stretched))
+        log_print("INFO", f"Original duration: {audio.duration:.2f}s, New duration: {stretched.duration:.2f}s")
+        log_print("INFO", "=== Audio Speed Change Completed Successfully ===")
+        return stretched
         
     except Exception as e:
         log_print("ERROR", f"Error in audio speed change: {str(e)}")
         raise
 
+def master_narration(audio):
+    """
+    Loudness-normalize and true-peak limit narration (zodiac_dsp.master) and return new
+    NarrationAudio. Replaces the old peak normalize, 2x boost and hard clip.
+    """
+    log_print("INFO", f"Mastering narration to {LOUDNESS_TARGET_LUFS:.1f} LUFS, {TRUE_PEAK_CEILING_DB:.1f} dBTP")
+    return audio.with_samples(master(audio.samples, audio.sample_rate))
+
 def validate_video_file(video_path):
     """Validate that the video file exists and is not corrupted."""
     log_print("INFO", f"=== Validating video file: {video_path} ===")
@@ -104,14 +101,10 @@ def validate_video_file(video_path):
     if file_size < 1000000:  # Less than 1MB
         log_print("WARNING", f"Video file seems too small ({file_size} bytes). It might be corrupted.")
     
-    # Try to get basic file info using ffprobe if available
+    # Try to get basic file info using ffprobe if available; the probe is cached
+    # until the file changes, so repeated renders of one template validate it once
     try:
-        import subprocess
-        result = subprocess.run(['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', video_path], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode != 0:
-            log_print("ERROR", f"Failed to validate video file with ffprobe: {result.stderr}")
-            raise ValueError(f"Video file appears to be corrupted or invalid: {video_path}")
+        probe_media(video_path)
         log_print("INFO", "Video file validation passed")
     except FileNotFoundError:
         log_print("WARNING", "ffprobe not available, skipping detailed validation")
@@ -120,13 +113,18 @@ def validate_video_file(video_path):
     except Exception as e:
         log_print("WARNING", f"Video validation failed but continuing: {str(e)}")
 
-def repeat_video_to_match_audio(video_path, audio_buffer):
+def repeat_video_to_match_audio(video_path, audio_samples, profile=None):
     """Repeat video to match audio duration and combine them."""
+    profile = get_encode_profile(profile)
     log_print("INFO", "=== Starting Video-Audio Combination Process ===")
     log_print("INFO", f"Video path: {video_path}")
     
     # Validate the video file first
     validate_video_file(video_path)
+
+    # moviepy is only needed by this backend and takes seconds to import
+    from moviepy.editor import VideoFileClip, concatenate_videoclips
+    from moviepy.audio.AudioClip import AudioArrayClip
     
     try:
         log_print("INFO", "Loading video file")
@@ -134,15 +132,10 @@ def repeat_video_to_match_audio(video_path, audio_buffer):
         video = VideoFileClip(video_path)
         log_print("INFO", f"Video loaded successfully. Duration: {video.duration:.2f}s, FPS: {video.fps}")
         
-        log_print("INFO", "Creating temporary audio file for MoviePy")
-        # Create a temporary file from the audio buffer for MoviePy
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_audio_file:
-            temp_audio_file.write(audio_buffer.read())
-            temp_audio_path = temp_audio_file.name
-        
         try:
-            log_print("INFO", "Loading audio file with MoviePy")
-            audio = AudioFileClip(temp_audio_path)  # MoviePy still needs FFmpeg here, but only for reading
+            log_print("INFO", "Wrapping audio samples for MoviePy")
+            # Stereo-duplicate the mono samples; AudioArrayClip reads them straight from memory
+            audio = AudioArrayClip(np.column_stack([audio_samples.samples, audio_samples.samples]), fps=audio_samples.sample_rate)
             log_print("INFO", f"Audio loaded successfully. Duration: {audio.duration:.2f}s")
             
             # Get durations
@@ -151,7 +144,6 @@ def repeat_video_to_match_audio(video_path, audio_buffer):
             
             log_print("INFO", f"Video duration: {video_duration:.2f}s")
             log_print("INFO", f"Audio duration: {audio_duration:.2f}s")
-            log_print("INFO", f"Using audio file: {temp_audio_path}")
             
             # Calculate how many times we need to repeat the video
             num_repeats = math.ceil(audio_duration / video_duration)
@@ -181,13 +173,13 @@ def repeat_video_to_match_audio(video_path, audio_buffer):
             with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_video_file:
                 temp_video_path = temp_video_file.name
 
-            final_video.write_videofile(
-                temp_video_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=video.fps,
-                verbose=False
-            )
+            with span('moviepy.write_videofile', fps=video.fps, seconds=round(final_video.duration, 2)):
+                final_video.write_videofile(
+                    temp_video_path,
+                    fps=video.fps,
+                    verbose=False,
+                    **profile.moviepy_kwargs(video.fps)
+                )
 
             # Read the file into a buffer
             with open(temp_video_path, 'rb') as f:
@@ -197,9 +189,8 @@ def repeat_video_to_match_audio(video_path, audio_buffer):
             os.unlink(temp_video_path)
             log_print("INFO", f"Video buffer created successfully. Size: {video_buffer.getbuffer().nbytes} bytes")
             
-            # Close the clips to free resources
+            # Close the clips to free resources (video is closed in the finally below)
             log_print("INFO", "Cleaning up video and audio resources")
-            video.close()
             audio.close()
             final_video.close()
             
@@ -207,38 +198,190 @@ def repeat_video_to_match_audio(video_path, audio_buffer):
             return video_buffer
             
         finally:
-            # Clean up temporary audio file
-            log_print("INFO", "Cleaning up temporary audio file")
-            os.unlink(temp_audio_path)
+            video.close()
         
     except Exception as e:
         log_print("ERROR", f"Error in video-audio combination: {str(e)}")
         raise
 
-def main(lang_code=0):
-    """Main function to generate zodiac video. lang_code=0 for Tamil, 1 for English."""
+def mux_with_ffmpeg(video_path, audio, speed_factor, video_args, profile=None, overlay=None):
+    """
+    Build the final mp4 with a single ffmpeg process graph.
+    The template is looped with -stream_loop, the mastered narration samples are fed over
+    stdin and sped up with atempo, and the output is trimmed to the sped-up audio length.
+    This is the only place the narration is encoded. An OverlayTrack's cards are
+    composited over the video in the same graph, so video_args must then encode.
+    """
+    log_print("INFO", "=== Starting FFmpeg Video-Audio Combination Process ===")
+    profile = get_encode_profile(profile)
+    log_print("INFO", f"Video input: {video_path}, video args: {' '.join(video_args)}, audio bitrate: {profile.audio_bitrate}")
+
+    try:
+        source_duration = audio.duration
+        audio_duration = source_duration / speed_factor
+        log_print("INFO", f"Source audio duration: {source_duration:.2f}s, after {speed_factor}x: {audio_duration:.2f}s")
+
+        # Loudness does not change with tempo, so mastering runs before atempo and the
+        # speed change stays in this graph; alimiter only catches the small peaks that
+        # atempo's overlap-add can add back above the ceiling
+        audio = master_narration(audio)
+        ceiling = db_to_gain(TRUE_PEAK_CEILING_DB)
+        audio_filter = f"{atempo_filter(speed_factor)},alimiter=limit={ceiling:.4f}:level=disabled"
+
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_video_file:
+            temp_video_path = temp_video_file.name
+
+        if overlay:
+            video_map = overlay.input_args() + ['-filter_complex', overlay.filter_graph(0, 2), '-map', '[v]']
+        else:
+            video_map = ['-map', '0:v:0']
+
+        try:
+            run_ffmpeg([
+                '-stream_loop', '-1',
+                '-i', video_path,
+                '-f', 'f32le',
+                '-ar', str(audio.sample_rate),
+                '-ac', '1',
+                '-i', 'pipe:0',
+            ] + video_map + [
+                '-map', '1:a:0',
+                '-filter:a', audio_filter,
+            ] + list(video_args) + profile.aac_args() + [
+                '-t', f'{audio_duration:.3f}',
+                '-movflags', '+faststart',
+                temp_video_path,
+            ], input_bytes=audio.pcm_bytes())
+
+            with open(temp_video_path, 'rb') as f:
+                video_buffer = io.BytesIO(f.read())
+        finally:
+            os.unlink(temp_video_path)
+
+        log_print("INFO", f"Video buffer created successfully. Size: {video_buffer.getbuffer().nbytes} bytes")
+        log_print("INFO", "=== FFmpeg Video-Audio Combination Completed Successfully ===")
+        return video_buffer
+
+    except Exception as e:
+        log_print("ERROR", f"Error in ffmpeg video-audio combination: {str(e)}")
+        raise
+
+def render_with_stream_copy(video_path, audio, speed_factor, profile=None, overlay=None):
+    """Loop the cached template mezzanine by stream copy; only the audio is encoded."""
+    validate_video_file(video_path)
+    mezzanine_path = prepare_template_mezzanine(video_path, profile)
+    if overlay:
+        # Cards are composited into the picture, so the video has to be encoded after
+        # all; the mezzanine is still the cheaper input to decode
+        log_print("INFO", "Overlay cards need a video encode; re-encoding the mezzanine")
+        profile = get_encode_profile(profile)
+        fps = get_video_fps(probe_media(mezzanine_path))
+        return mux_with_ffmpeg(mezzanine_path, audio, speed_factor, profile.x264_args(fps), profile, overlay)
+    # The mezzanine has closed, B-frame free GOPs, so cutting the copied
+    # track at the audio length never leaves an undecodable tail
+    return mux_with_ffmpeg(mezzanine_path, audio, speed_factor, ['-c:v', 'copy'], profile)
+
+def render_with_ffmpeg(video_path, audio, speed_factor, profile=None, overlay=None):
+    """Loop and re-encode the template in one ffmpeg process, without the mezzanine cache."""
+    validate_video_file(video_path)
+    profile = get_encode_profile(profile)
+    fps = get_video_fps(probe_media(video_path))
+    return mux_with_ffmpeg(video_path, audio, speed_factor, profile.x264_args(fps), profile, overlay)
+
+def render_with_moviepy(video_path, audio, speed_factor, profile=None, overlay=None):
+    """Original path: in-process speed change, then moviepy concatenation and re-encode."""
+    if overlay:
+        raise ValueError("The moviepy backend cannot draw overlay cards; use stream-copy or ffmpeg")
+    log_print("INFO", "Processing audio speed change")
+    audio_speeded = change_audio_speed(audio, speed_factor)
+    return repeat_video_to_match_audio(video_path, audio_speeded, profile)
+
+# Render backends share one signature:
+# (video_path, NarrationAudio, speed_factor, encode profile, OverlayTrack or None) -> io.BytesIO
+RENDER_BACKENDS = {
+    'stream-copy': render_with_stream_copy,
+    'ffmpeg': render_with_ffmpeg,
+    'moviepy': render_with_moviepy,
+}
+
+def render_video(audio, backend='stream-copy', speed=SPEED_FACTOR, video_path=None, profile=None, document=None):
+    """
+    Render the looped template (TEMPLATE_PATH by default) with the narration using the
+    selected backend and encode profile (an ENCODE_PROFILES name or an EncodeProfile).
+    With the HoroscopeDocument the narration was read from, each sign's card is shown
+    over the video while it is read.
+    """
+    video_path = video_path or TEMPLATE_PATH
+    profile = get_encode_profile(profile)
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(f"Unsupported render backend: {backend}")
+
+    log_print("INFO", f"Applying speed factor: {speed}x")
+    log_print("INFO", f"Combining video and audio (backend: {backend}, profile: {profile.name})")
+    with span('render', backend=backend, profile=profile.name, speed=speed, audio_seconds=round(audio.duration, 2),
+              overlay=document is not None) as current:
+        if document is None:
+            video_buffer = RENDER_BACKENDS[backend](video_path, audio, speed, profile)
+        else:
+            with tempfile.TemporaryDirectory(prefix='zodiac-overlay-') as overlay_dir:
+                frame_size = get_video_size(probe_media(video_path))
+                overlay = build_overlay_track(document, audio, speed, frame_size, overlay_dir)
+                video_buffer = RENDER_BACKENDS[backend](video_path, audio, speed, profile, overlay)
+        current.set(output_bytes=video_buffer.getbuffer().nbytes)
+    increment('video_renders', backend=backend)
+    increment('video_bytes_encoded', video_buffer.getbuffer().nbytes, backend=backend)
+    return video_buffer
+
+def video_stage_key(store, backend, speed=SPEED_FACTOR, video_path=None, profile=None, overlay=False):
+    """
+    RunStore input hash for the video stage: the narration, render and mastering settings,
+    template, and the card layout when overlays are drawn.
+    """
+    settings = asdict(get_encode_profile(profile).with_threads(0))
+    mastering = (LOUDNESS_TARGET_LUFS, TRUE_PEAK_CEILING_DB, COMPRESSOR_ENABLED)
+    parts = [store.output_hash('audio'), backend, speed, settings, mastering, file_sha256(video_path or TEMPLATE_PATH)]
+    if overlay:
+        parts.append(overlay_key(store.lang))
+    return make_key(*parts)
+
+def overlay_document(store):
+    """The text stage's HoroscopeDocument, whose cards are drawn over the video."""
+    return document_serializer(DOCUMENT_FILE)[1](store)
+
+def main(lang_code=0, backend='stream-copy', store=None, profile=None, overlay=False):
+    """
+    Main function to generate zodiac video. lang_code=0 for Tamil, 1 for English.
+    With a RunStore, completed stages are loaded from it instead of being rerun.
+    overlay draws each sign's card over the video; it needs the store's text stage.
+    """
     log_print("INFO", "=== Starting Zodiac Video Generation Process ===")
     try:
-        video_path = "template.mp4"
-        log_print("INFO", f"Using template video: {video_path}")
+        log_print("INFO", f"Using template video: {TEMPLATE_PATH}")
+
+        if backend not in RENDER_BACKENDS:
+            raise ValueError(f"Unsupported render backend: {backend}")
 
         log_print("INFO", f"Calling zodiac_audio_main to generate audio (lang_code={lang_code})")
-        audio_buffer = zodiac_audio_main(lang_code) # 0 for Tamil, 1 for English
+        audio = zodiac_audio_main(lang_code, store=store) # 0 for Tamil, 1 for English
 
-        if not audio_buffer:
-            log_print("ERROR", "No audio buffer received from zodiac_audio_main")
+        if audio is None or not len(audio.samples):
+            log_print("ERROR", "No audio received from zodiac_audio_main")
             raise Exception("Audio generation failed")
 
-        log_print("INFO", "Audio buffer received successfully")
-
-        speed = 1.5  # 1.5x speed (change this value as needed)
-        log_print("INFO", f"Applying speed factor: {speed}x")
+        log_print("INFO", "Audio received successfully")
 
-        log_print("INFO", "Processing audio speed change")
-        audio_speeded_buffer = change_audio_speed(audio_buffer, speed)
+        if overlay and not store:
+            raise ValueError("Overlay cards are drawn from the run store's text stage; pass a RunStore")
 
-        log_print("INFO", "Combining video and audio")
-        final_video_buffer = repeat_video_to_match_audio(video_path, audio_speeded_buffer)
+        with span('video', backend=backend):
+            if store:
+                document = overlay_document(store) if overlay else None
+                final_video_buffer = store.checkpoint(
+                    'video', video_stage_key(store, backend, profile=profile, overlay=overlay),
+                    lambda: render_video(audio, backend=backend, profile=profile, document=document),
+                    *bytes_serializer('video.mp4'))
+            else:
+                final_video_buffer = render_video(audio, backend=backend, profile=profile)
 
         log_print("INFO", "=== Zodiac Video Generation Completed Successfully ===")
         return final_video_buffer
@@ -250,22 +393,33 @@ def main(lang_code=0):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate zodiac video in Tamil or English.")
     parser.add_argument('--lang', type=str, default='ta', choices=['ta', 'en-in', 'hi'], help='Language code: ta for Tamil, en-in for English, hi for Hindi')
+    parser.add_argument('--backend', type=str, default='stream-copy', choices=list(RENDER_BACKENDS), help='stream-copy loops a cached pre-encoded template, ffmpeg re-encodes in one ffmpeg process, moviepy is the original frame-by-frame path')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the Gemini response cache; completed text and metadata stages are still reused (--fresh regenerates them)')
+    parser.add_argument('--fresh', action='store_true', help="Ignore today's completed stages in the run directory and start over")
+    parser.add_argument('--profile', type=str, default=None, choices=list(ENCODE_PROFILES), help='Encode profile for the final render (default: ZODIAC_ENCODE_PROFILE or publish)')
+    parser.add_argument('--overlay', action='store_true', help='Show a card with the sign being read over the video (re-encodes the video)')
     args = parser.parse_args()
+    if args.no_cache:
+        os.environ['ZODIAC_NO_CACHE'] = '1'
     lang_map = {'ta': 0, 'en-in': 1, 'hi': 2}
     lang_code = lang_map.get(args.lang, 0)
     try:
-        video_buffer = main(lang_code=lang_code)
+        store = RunStore(args.lang)
+        if args.fresh:
+            store.reset()
+        video_buffer = main(lang_code=lang_code, backend=args.backend, store=store, profile=args.profile, overlay=args.overlay)
         if not video_buffer:
             log_print("ERROR", "No video data generated!")
             exit(1)
         log_print("INFO", "Video generated successfully!")
         # Save the video buffer to the correct file
-        output_map = {0: "output_video.mp4", 1: "output_video_1.mp4", 2: "output_video_2.mp4"}
-        output_file = output_map.get(lang_code, "output_video.mp4")
+        output_file = OUTPUT_FILES.get(lang_code, "output_video.mp4")
         with open(output_file, "wb") as f:
             f.write(video_buffer.getbuffer())
         log_print("INFO", f"Video saved to {output_file}")
     except Exception as e:
         log_print("ERROR", f"An error occurred in the video generation workflow: {str(e)}")
         raise
+    finally:
+        write_metrics()
     